@@ -0,0 +1,101 @@
+"""
+Decode throughput of the available JSON codecs on `update/order_book` frames and `OrderBookOrders` responses.
+
+    python benchmarks/bench_codec.py [--frames recorded_frames.jsonl] [--number 20000]
+
+`--frames` takes a file with one raw WS frame per line (e.g. captured from `WsClient`); without it,
+representative frames are generated. OrderBookOrders is also decoded through `ApiClient.deserialize`
+in the validated and unvalidated (`construct`) response modes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import timeit
+
+# makes the lighter package of this checkout importable when run as `python benchmarks/bench_codec.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lighter import codec  # noqa: E402
+from lighter.api_client import ApiClient  # noqa: E402
+from lighter.configuration import Configuration  # noqa: E402
+
+
+def synthetic_update_frame(levels=20):
+    def side(start, step):
+        return [
+            {"price": f"{start + i * step:.2f}", "size": f"{random.random() * 10:.4f}"}
+            for i in range(levels)
+        ]
+
+    return json.dumps({
+        "channel": "order_book:0",
+        "offset": 41231,
+        "order_book": {"code": 0, "asks": side(3024.66, 0.01), "bids": side(3024.65, -0.01), "offset": 41231},
+        "type": "update/order_book",
+    })
+
+
+def synthetic_order_book_orders(levels=100):
+    def side(start, step):
+        return [
+            {
+                "order_index": 281474976710656 + i,
+                "order_id": str(281474976710656 + i),
+                "owner_account_index": 1000 + i,
+                "initial_base_amount": "1.2000",
+                "remaining_base_amount": f"{random.random() * 10:.4f}",
+                "price": f"{start + i * step:.2f}",
+                "order_expiry": 1767225600000,
+            }
+            for i in range(levels)
+        ]
+
+    return json.dumps({
+        "code": 200,
+        "total_asks": levels,
+        "asks": side(3024.66, 0.01),
+        "total_bids": levels,
+        "bids": side(3024.65, -0.01),
+    })
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", help="file with one recorded WS frame per line")
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    if args.frames:
+        with open(args.frames) as f:
+            frames = [line.strip() for line in f if line.strip()]
+    else:
+        frames = [synthetic_update_frame() for _ in range(100)]
+    response = synthetic_order_book_orders()
+    api_client = ApiClient(Configuration(host="http://localhost"))
+
+    for name in codec.available_codecs():
+        codec.set_codec(name)
+        frame_iter = iter(frames * (args.number // len(frames) + 1))
+        ws_seconds = timeit.timeit(lambda: codec.loads(next(frame_iter)), number=args.number)
+        rest_number = max(args.number // 20, 1)
+        raw_seconds = timeit.timeit(lambda: codec.loads(response), number=rest_number)
+        rates = []
+        for response_mode in (ApiClient.RESPONSE_MODE_MODEL, ApiClient.RESPONSE_MODE_CONSTRUCT):
+            with api_client.using_response_mode(response_mode):
+                seconds = timeit.timeit(
+                    lambda: api_client.deserialize(response, "OrderBookOrders", "application/json"), number=rest_number
+                )
+            rates.append(f"OrderBookOrders {response_mode}: {rest_number / seconds:6.0f}/s")
+        print(
+            f"{name:8s} ws frames: {args.number / ws_seconds:8.0f}/s   "
+            f"OrderBookOrders json: {rest_number / raw_seconds:6.0f}/s   " + "   ".join(rates)
+        )
+    codec.set_codec()
+    await api_client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
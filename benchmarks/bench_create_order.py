@@ -0,0 +1,114 @@
+"""
+Orders/sec through `SignerClient.create_order`, isolating the SDK overhead around signing and sending:
+the native signer and the HTTP request are replaced by constant results, everything else (the
+`process_api_key_and_nonce` decorator, the nonce manager, the signing executor hop, logging) is the real code path.
+
+    python benchmarks/bench_create_order.py [--number 20000]
+
+Variants:
+  nonce manager      nonce / api_key_index allocated by the nonce manager
+  explicit nonce     nonce / api_key_index passed by the caller (decorator fast path)
+  per-call binding   the former decorator, which bound the signature with inspect on every call
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+# makes the lighter package of this checkout importable when run as `python benchmarks/bench_create_order.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lighter import nonce_manager  # noqa: E402
+from lighter.models.resp_send_tx import RespSendTx  # noqa: E402
+from lighter.signer_client import SignerClient  # noqa: E402
+
+TX_INFO = json.dumps({"AccountIndex": 1, "OrderBookIndex": 0, "BaseAmount": 1000, "Price": 170000, "Nonce": 0, "Sig": "00"})
+RESPONSE = RespSendTx(code=200, tx_hash="00", predicted_execution_time_ms=0)
+
+
+class LocalNonceManager(nonce_manager.OptimisticNonceManager):
+    def __init__(self):
+        # skips fetching the initial nonces from the API
+        self.start_api_key = self.end_api_key = self.current_api_key = 0
+        self.api_key_scheduler = None
+        self.nonce_journal = None
+        self._lock = threading.Lock()
+        self.trackers = {0: nonce_manager.NonceTracker(0)}
+
+
+class BenchSignerClient(SignerClient):
+    def __init__(self, inline_signing):
+        self.nonce_manager = LocalNonceManager()
+        self.signing_pool = None
+        self.tx_trace = None
+        self.signing_executor = ThreadPoolExecutor(max_workers=1)
+        self.inline_signing = inline_signing
+
+    async def _sign_async(self, api_key_index, sign, *args):
+        if self.inline_signing:
+            return sign(*args)
+        return await super()._sign_async(api_key_index, sign, *args)
+
+    def sign_with_api_key(self, api_key_index, sign, *args):
+        return sign(*args)
+
+    def sign_create_order(self, *args):
+        return TX_INFO, None
+
+    async def _send_tx(self, tx_type, tx_info):
+        return RESPONSE
+
+
+def per_call_binding(func):
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        bound_args = inspect.signature(func).bind(self, *args, **kwargs)
+        bound_args.apply_defaults()
+        api_key_index = bound_args.arguments.get("api_key_index", -1)
+        nonce = bound_args.arguments.get("nonce", -1)
+        if api_key_index == -1 and nonce == -1:
+            api_key_index, nonce = await self.next_nonce_async()
+        partial_arguments = {k: v for k, v in bound_args.arguments.items() if k not in ("self", "nonce", "api_key_index")}
+        created_tx, ret, err = await func(self, **partial_arguments, nonce=nonce, api_key_index=api_key_index)
+        self.nonce_manager.acknowledge_success(api_key_index, nonce)
+        return created_tx, ret, err
+
+    return wrapper
+
+
+per_call_binding_create_order = per_call_binding(SignerClient.create_order.__wrapped__)
+
+
+async def run(name, client, create_order, number, explicit_nonce=False):
+    start = time.perf_counter()
+    for i in range(number):
+        if explicit_nonce:
+            await create_order(client, 0, i, 1000, 170000, True, 0, 1, nonce=i, api_key_index=0)
+        else:
+            await create_order(client, 0, i, 1000, 170000, True, 0, 1)
+    elapsed = time.perf_counter() - start
+    print(f"{name:45s} {number / elapsed:10.0f} orders/s {elapsed / number * 1e6:8.1f} us/order")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    for inline_signing in (True, False):
+        client = BenchSignerClient(inline_signing)
+        suffix = "inline signing" if inline_signing else "executor signing"
+        await run(f"nonce manager, {suffix}", client, SignerClient.create_order, args.number)
+        await run(f"explicit nonce, {suffix}", client, SignerClient.create_order, args.number, explicit_nonce=True)
+        await run(f"per-call binding, {suffix}", client, per_call_binding_create_order, args.number)
+        client.signing_executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
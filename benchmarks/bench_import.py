@@ -0,0 +1,48 @@
+"""
+Cold-start import time of the SDK, measured in fresh interpreters.
+
+    python benchmarks/bench_import.py [--runs 10]
+
+Reports the median wall time of `python -c "<statement>"` minus the median of an empty interpreter start.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# the interpreters import the lighter package of this checkout, wherever the benchmark is run from
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATEMENTS = [
+    "import lighter",
+    "import lighter; lighter.ApiClient; lighter.OrderApi",
+    "import lighter; lighter.SignerClient",
+    "import lighter; lighter.WsClient",
+]
+
+
+def median_run_time(statement, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True, cwd=ROOT)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = median_run_time("pass", args.runs)
+    print(f"{'interpreter start':55s} {baseline * 1000:8.1f} ms")
+    for statement in STATEMENTS:
+        elapsed = median_run_time(statement, args.runs) - baseline
+        print(f"{statement:55s} {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
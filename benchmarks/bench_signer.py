@@ -0,0 +1,61 @@
+"""
+Signing throughput of the ctypes signer library, with the function signatures bound once at load time
+compared to re-binding argtypes / restype before every call (as the SDK used to).
+
+    python benchmarks/bench_signer.py [--number 20000]
+
+Needs the signer library for this platform in lighter/signers. A throwaway API key is generated and no
+network requests are made.
+"""
+import argparse
+import os
+import sys
+import time
+
+# makes the lighter package of this checkout importable when run as `python benchmarks/bench_signer.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lighter import signer_client  # noqa: E402
+
+
+def sign_create_order(signer, nonce):
+    return signer.SignCreateOrder(1, nonce, 1000, 170000, 1, 0, 1, 0, 0, -1, nonce)
+
+
+def rebind_and_sign_create_order(signer, nonce):
+    argtypes, restype = signer_client._SIGNER_FUNCTIONS["SignCreateOrder"]
+    signer.SignCreateOrder.argtypes = list(argtypes)
+    signer.SignCreateOrder.restype = restype
+    return sign_create_order(signer, nonce)
+
+
+def run(name, sign, signer, number):
+    start = time.perf_counter()
+    for nonce in range(number):
+        result = sign(signer, nonce)
+        if result.err:
+            raise Exception(result.err.decode("utf-8"))
+    elapsed = time.perf_counter() - start
+    print(f"{name:22s} {number / elapsed:10.0f} signatures/s {elapsed / number * 1e6:8.1f} us/signature")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    private_key, _, err = signer_client.create_api_key()
+    if err is not None:
+        raise Exception(err)
+
+    signer = signer_client._initialize_signer()
+    err = signer.CreateClient(b"https://testnet.zklighter.elliot.ai", private_key.encode("utf-8"), 300, 2, 1)
+    if err is not None:
+        raise Exception(err.decode("utf-8"))
+
+    run("bound once", sign_create_order, signer, args.number)
+    run("re-bound per call", rebind_and_sign_create_order, signer, args.number)
+
+
+if __name__ == "__main__":
+    main()
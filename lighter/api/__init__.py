@@ -1,16 +1,57 @@
 # flake8: noqa
 
-# import apis into api package
-from lighter.api.account_api import AccountApi
-from lighter.api.announcement_api import AnnouncementApi
-from lighter.api.block_api import BlockApi
-from lighter.api.bridge_api import BridgeApi
-from lighter.api.candlestick_api import CandlestickApi
-from lighter.api.funding_api import FundingApi
-from lighter.api.info_api import InfoApi
-from lighter.api.notification_api import NotificationApi
-from lighter.api.order_api import OrderApi
-from lighter.api.referral_api import ReferralApi
-from lighter.api.root_api import RootApi
-from lighter.api.transaction_api import TransactionApi
+import importlib
+from typing import TYPE_CHECKING
 
+# public name -> module defining it, the module is only imported on first access
+_lazy_imports = {
+    # import apis into api package
+    "AccountApi": "lighter.api.account_api",
+    "AnnouncementApi": "lighter.api.announcement_api",
+    "BlockApi": "lighter.api.block_api",
+    "BridgeApi": "lighter.api.bridge_api",
+    "CandlestickApi": "lighter.api.candlestick_api",
+    "FundingApi": "lighter.api.funding_api",
+    "InfoApi": "lighter.api.info_api",
+    "NotificationApi": "lighter.api.notification_api",
+    "OrderApi": "lighter.api.order_api",
+    "ReferralApi": "lighter.api.referral_api",
+    "RootApi": "lighter.api.root_api",
+    "TransactionApi": "lighter.api.transaction_api",
+}
+
+__all__ = list(_lazy_imports)
+
+
+def __getattr__(name):
+    module_name = _lazy_imports.get(name)
+    if module_name is None:
+        # submodules, e.g. `lighter.api.order_api`, which used to be imported along with the package
+        try:
+            return importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as e:
+            if e.name != f"{__name__}.{name}":
+                raise
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_imports))
+
+
+if TYPE_CHECKING:
+    from lighter.api.account_api import AccountApi
+    from lighter.api.announcement_api import AnnouncementApi
+    from lighter.api.block_api import BlockApi
+    from lighter.api.bridge_api import BridgeApi
+    from lighter.api.candlestick_api import CandlestickApi
+    from lighter.api.funding_api import FundingApi
+    from lighter.api.info_api import InfoApi
+    from lighter.api.notification_api import NotificationApi
+    from lighter.api.order_api import OrderApi
+    from lighter.api.referral_api import ReferralApi
+    from lighter.api.root_api import RootApi
+    from lighter.api.transaction_api import TransactionApi
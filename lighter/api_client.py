@@ -12,7 +12,12 @@
 """  # noqa: E501
 
 
+import asyncio
+import contextlib
+import contextvars
 import datetime
+import functools
+import logging
 from dateutil.parser import parse
 from enum import Enum
 import json
@@ -20,14 +25,17 @@ import mimetypes
 import os
 import re
 import tempfile
+import weakref
 
 from urllib.parse import quote
+import typing
 from typing import Tuple, Optional, List, Dict, Union
-from pydantic import SecretStr
+from pydantic import BaseModel, SecretStr
 
 from lighter.configuration import Configuration
 from lighter.api_response import ApiResponse, T as ApiResponseT
 import lighter.models
+from lighter import codec
 from lighter import rest
 from lighter.exceptions import (
     ApiValueError,
@@ -39,8 +47,99 @@ from lighter.exceptions import (
     ServiceException
 )
 
+logger = logging.getLogger(__name__)
+
 RequestSerialized = Tuple[str, str, Dict[str, str], Optional[str], List[str]]
 
+# weakref to ApiClient -> response mode overriding its own, see `ApiClient.using_response_mode`
+_response_mode_overrides = contextvars.ContextVar("lighter_response_mode_overrides", default={})
+
+
+def _nested_model(annotation):
+    """Returns (model class, is_list) if a model field holds a generated model or a list of them, otherwise None."""
+    origin = typing.get_origin(annotation)
+    if origin is Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return _nested_model(args[0]) if len(args) == 1 else None
+    if origin is list:
+        nested = _nested_model(typing.get_args(annotation)[0])
+        if nested is not None and not nested[1]:
+            return nested[0], True
+        return None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None
+
+
+class _ConstructPlan:
+    def __init__(self, klass):
+        self.names: Dict[str, str] = {}  # json key -> field name
+        self.nested: Dict[str, Tuple[type, bool]] = {}
+        self.defaults: Dict[str, object] = {}
+        self.mutable_defaults: Dict[str, object] = {}
+        for name, field in klass.model_fields.items():
+            self.names[field.alias or name] = name
+            nested = _nested_model(field.annotation)
+            if nested is not None:
+                self.nested[name] = nested
+            if not field.is_required():
+                default = field.get_default(call_default_factory=True)
+                if isinstance(default, (dict, list, set)):
+                    self.mutable_defaults[name] = default
+                else:
+                    self.defaults[name] = default
+        self.has_additional_properties = "additional_properties" in klass.model_fields
+
+
+_construct_plans: Dict[type, _ConstructPlan] = {}
+
+
+def construct_model(klass, data):
+    """
+    Builds `klass` from response data without running pydantic validation, recursing into nested models.
+    Values are kept as received: no type coercion, and enums or datetimes are not parsed. Like the generated
+    `from_dict`, unknown keys end up in `additional_properties`.
+    """
+    plan = _construct_plans.get(klass)
+    if plan is None:
+        plan = _construct_plans[klass] = _ConstructPlan(klass)
+
+    values = {}
+    extra = None
+    for key, value in data.items():
+        name = plan.names.get(key)
+        if name is None:
+            if extra is None:
+                extra = {}
+            extra[key] = value
+            continue
+        nested = plan.nested.get(name)
+        if nested is not None and value is not None:
+            sub_klass, is_list = nested
+            if is_list:
+                value = [construct_model(sub_klass, item) for item in value]
+            else:
+                value = construct_model(sub_klass, value)
+        values[name] = value
+    fields_set = set(values)
+    for name, default in plan.defaults.items():
+        if name not in values:
+            values[name] = default
+    for name, default in plan.mutable_defaults.items():
+        if name not in values:
+            values[name] = default.copy()
+    if extra is not None and plan.has_additional_properties:
+        values["additional_properties"].update(extra)
+
+    # same attributes `BaseModel.model_construct` sets, without its per-field default handling overhead
+    obj = klass.__new__(klass)
+    object.__setattr__(obj, "__dict__", values)
+    object.__setattr__(obj, "__pydantic_fields_set__", fields_set)
+    object.__setattr__(obj, "__pydantic_extra__", None)
+    object.__setattr__(obj, "__pydantic_private__", None)
+    return obj
+
+
 class ApiClient:
     """Generic API client for OpenAPI client library builds.
 
@@ -55,6 +154,10 @@ class ApiClient:
         the API.
     :param cookie: a cookie to include in the header when making calls
         to the API
+    :param single_flight: if True, concurrent identical GET requests share
+        one HTTP request and its deserialized result, see `call_api`
+    :param response_cache: a `ResponseCache` serving the GET requests of
+        slow-changing endpoints from memory
     """
 
     PRIMITIVE_TYPES = (float, bool, bytes, str, int)
@@ -70,12 +173,21 @@ class ApiClient:
     }
     _pool = None
 
+    # how response bodies are turned into return values
+    RESPONSE_MODE_MODEL = "model"  # validated pydantic models (default)
+    RESPONSE_MODE_CONSTRUCT = "construct"  # unvalidated models, see `construct_model`
+    RESPONSE_MODE_DICT = "dict"  # the decoded JSON, as plain dicts / lists
+    RESPONSE_MODES = (RESPONSE_MODE_MODEL, RESPONSE_MODE_CONSTRUCT, RESPONSE_MODE_DICT)
+
     def __init__(
         self,
         configuration=None,
         header_name=None,
         header_value=None,
-        cookie=None
+        cookie=None,
+        response_mode=RESPONSE_MODE_MODEL,
+        single_flight=False,
+        response_cache=None,
     ) -> None:
         # use default configuration if none is provided
         if configuration is None:
@@ -90,6 +202,17 @@ class ApiClient:
         # Set default User-Agent.
         self.user_agent = 'OpenAPI-Generator/1.0.0/python'
         self.client_side_validation = configuration.client_side_validation
+        if response_mode not in self.RESPONSE_MODES:
+            raise ApiValueError(f"invalid response mode {response_mode}")
+        self.response_mode = response_mode
+        # (response type, construct) -> function deserializing data of that type, see `__deserialize`
+        self._deserializer_plans = {}
+        self.single_flight = single_flight
+        # (url, headers) -> [task making the request, number of callers waiting for it]
+        self._in_flight = {}
+        self.single_flight_hits = 0  # calls served by a request already in flight
+        self.single_flight_merges = 0  # requests shared by more than one call
+        self.response_cache = response_cache
 
     async def __aenter__(self):
         return self
@@ -113,6 +236,31 @@ class ApiClient:
         self.default_headers[header_name] = header_value
 
 
+    @contextlib.contextmanager
+    def using_response_mode(self, response_mode):
+        """Overrides the response mode for the calls made within the block, e.g. to fetch plain dicts:
+
+            with api_client.using_response_mode(ApiClient.RESPONSE_MODE_DICT):
+                order_book = await order_api.order_book_orders(market_id=0, limit=100)
+
+        The override is scoped to the current task / context, so concurrent callers are not affected.
+        """
+        if response_mode not in self.RESPONSE_MODES:
+            raise ApiValueError(f"invalid response mode {response_mode}")
+        overrides = dict(_response_mode_overrides.get())
+        overrides[weakref.ref(self)] = response_mode
+        token = _response_mode_overrides.set(overrides)
+        try:
+            yield
+        finally:
+            _response_mode_overrides.reset(token)
+
+    def get_response_mode(self):
+        overrides = _response_mode_overrides.get()
+        if overrides:
+            return overrides.get(weakref.ref(self), self.response_mode)
+        return self.response_mode
+
     _default = None
 
     @classmethod
@@ -269,6 +417,15 @@ class ApiClient:
         :return: RESTResponse
         """
 
+        if method == "GET" and body is None and not post_params:
+            if self.response_cache is not None:
+                ttl = self.response_cache.ttl_for(url)
+                if ttl is not None:
+                    return await self._call_api_cached(url, header_params, _request_timeout, ttl)
+            if self.single_flight:
+                key = self._request_key(url, header_params)
+                return await asyncio.shield(self._shared_request(key, url, header_params, _request_timeout))
+
         try:
             # perform request and return response
             response_data = await self.rest_client.request(
@@ -283,6 +440,59 @@ class ApiClient:
 
         return response_data
 
+    @staticmethod
+    def _request_key(url, header_params):
+        return url, tuple(sorted(header_params.items())) if header_params else ()
+
+    def _shared_request(self, key, url, header_params, _request_timeout) -> asyncio.Task:
+        """
+        Returns the task of the identical GET request in flight, or starts one. The request runs in its own task, so
+        callers cancelling don't affect the others, and its body is read before it is shared. The first caller's
+        timeout applies.
+        """
+        in_flight = self._in_flight.get(key)
+        if in_flight is None:
+            task = asyncio.ensure_future(self._request_shared(key, url, header_params, _request_timeout))
+            in_flight = self._in_flight[key] = [task, 1]
+        else:
+            self.single_flight_hits += 1
+            if in_flight[1] == 1:
+                self.single_flight_merges += 1
+            in_flight[1] += 1
+        return in_flight[0]
+
+    async def _request_shared(self, key, url, header_params, _request_timeout) -> rest.RESTResponse:
+        try:
+            response_data = await self.rest_client.request(
+                "GET", url, headers=header_params, _request_timeout=_request_timeout
+            )
+            await response_data.read()
+            response_data.deserialized = {}
+            return response_data
+        finally:
+            del self._in_flight[key]
+
+    async def _call_api_cached(self, url, header_params, _request_timeout, ttl) -> rest.RESTResponse:
+        key = self._request_key(url, header_params)
+        response_data, fresh = self.response_cache.get(key)
+        if response_data is not None:
+            if not fresh and key not in self._in_flight:
+                refresh = self._shared_request(key, url, header_params, _request_timeout)
+                refresh.add_done_callback(functools.partial(self._cache_refreshed, key, ttl))
+            return response_data
+        response_data = await asyncio.shield(self._shared_request(key, url, header_params, _request_timeout))
+        self.response_cache.put(key, response_data, ttl)
+        return response_data
+
+    def _cache_refreshed(self, key, ttl, task) -> None:
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            # the stale response is served until it runs out, then callers make the request themselves
+            logger.debug("refreshing %s failed: %s", key[0], task.exception())
+            return
+        self.response_cache.put(key, task.result(), ttl)
+
     def response_deserialize(
         self,
         response_data: rest.RESTResponse,
@@ -317,7 +527,15 @@ class ApiClient:
                     match = re.search(r"charset=([a-zA-Z\-\d]+)[\s;]?", content_type)
                 encoding = match.group(1) if match else "utf-8"
                 response_text = response_data.data.decode(encoding)
-                return_data = self.deserialize(response_text, response_type, content_type)
+                shared = response_data.deserialized
+                if shared is None:
+                    return_data = self.deserialize(response_text, response_type, content_type)
+                else:
+                    # a single-flight response, deserialized once for all its callers
+                    shared_key = (response_type, self.get_response_mode())
+                    if shared_key not in shared:
+                        shared[shared_key] = self.deserialize(response_text, response_type, content_type)
+                    return_data = shared[shared_key]
         finally:
             if not 200 <= response_data.status <= 299:
                 raise ApiException.from_response(
@@ -399,14 +617,14 @@ class ApiClient:
         # fetch data from response object
         if content_type is None:
             try:
-                data = json.loads(response_text)
+                data = codec.loads(response_text)
             except ValueError:
                 data = response_text
         elif content_type.startswith("application/json"):
             if response_text == "":
                 data = ""
             else:
-                data = json.loads(response_text)
+                data = codec.loads(response_text)
         elif content_type.startswith("text/plain"):
             data = response_text
         else:
@@ -415,6 +633,8 @@ class ApiClient:
                 reason="Unsupported content type: {0}".format(content_type)
             )
 
+        if self.get_response_mode() == self.RESPONSE_MODE_DICT:
+            return data
         return self.__deserialize(data, response_type)
 
     def __deserialize(self, data, klass):
@@ -428,20 +648,37 @@ class ApiClient:
         if data is None:
             return None
 
+        construct = self.get_response_mode() == self.RESPONSE_MODE_CONSTRUCT
+        key = (klass, construct)
+        plan = self._deserializer_plans.get(key)
+        if plan is None:
+            plan = self.__build_deserializer_plan(klass, construct)
+            self._deserializer_plans[key] = plan
+        return plan(data)
+
+    def __build_deserializer_plan(self, klass, construct):
+        """Resolves a type (string) once into a function deserializing data of that type.
+
+        :param klass: class literal, or string of class name.
+        :param construct: whether models are built without validation.
+        :return: function taking the data and returning the deserialized object.
+        """
         if isinstance(klass, str):
             if klass.startswith('List['):
                 m = re.match(r'List\[(.*)]', klass)
                 assert m is not None, "Malformed List type definition"
-                sub_kls = m.group(1)
-                return [self.__deserialize(sub_data, sub_kls)
-                        for sub_data in data]
+                sub_plan = self.__build_deserializer_plan(m.group(1), construct)
+                return lambda data: [
+                    None if sub_data is None else sub_plan(sub_data) for sub_data in data
+                ]
 
             if klass.startswith('Dict['):
                 m = re.match(r'Dict\[([^,]*), (.*)]', klass)
                 assert m is not None, "Malformed Dict type definition"
-                sub_kls = m.group(2)
-                return {k: self.__deserialize(v, sub_kls)
-                        for k, v in data.items()}
+                sub_plan = self.__build_deserializer_plan(m.group(2), construct)
+                return lambda data: {
+                    k: None if v is None else sub_plan(v) for k, v in data.items()
+                }
 
             # convert str to class
             if klass in self.NATIVE_TYPES_MAPPING:
@@ -450,17 +687,19 @@ class ApiClient:
                 klass = getattr(lighter.models, klass)
 
         if klass in self.PRIMITIVE_TYPES:
-            return self.__deserialize_primitive(data, klass)
+            return lambda data: self.__deserialize_primitive(data, klass)
         elif klass == object:
-            return self.__deserialize_object(data)
+            return self.__deserialize_object
         elif klass == datetime.date:
-            return self.__deserialize_date(data)
+            return self.__deserialize_date
         elif klass == datetime.datetime:
-            return self.__deserialize_datetime(data)
+            return self.__deserialize_datetime
         elif issubclass(klass, Enum):
-            return self.__deserialize_enum(data, klass)
+            return lambda data: self.__deserialize_enum(data, klass)
+        elif construct:
+            return lambda data: construct_model(klass, data) if isinstance(data, dict) else klass.from_dict(data)
         else:
-            return self.__deserialize_model(data, klass)
+            return klass.from_dict
 
     def parameters_to_tuples(self, params, collection_formats):
         """Get parameters as list of tuples, formatting collections.
@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from lighter.api.order_api import OrderApi
+from lighter.api.transaction_api import TransactionApi
+from lighter.pagination import PAGE_LIMIT, _cursor_paging, _index_paging, paginate
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Spaces requests `1 / rate` seconds apart, allowing bursts of `burst` requests after idling."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"invalid rate limit {rate=} {burst=}")
+        self.rate = rate
+        self.burst = burst
+        self._next = 0.0
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        self._next = max(self._next, now - (self.burst - 1) / self.rate)
+        wait = self._next - now
+        self._next += 1 / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class BackfillSource:
+    """
+    A paged endpoint walked in ascending `key` order (e.g. timestamp or sequence index) from a given start key.
+    `fetch(start, cursor)` requests a page, `paging()` returns fresh `(items, next_cursor)` functions for `paginate`
+    and `identity(item)` is unique per item, to de-duplicate the items fetched twice.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[int, Any], Awaitable[Any]],
+        paging: Callable[[], Tuple[Callable, Callable]],
+        key: Callable[[Any], int],
+        identity: Callable[[Any], Any],
+        serialize: Callable[[Any], str] = lambda item: item.to_json(),
+    ):
+        self.name = name
+        self.fetch = fetch
+        self.paging = paging
+        self.key = key
+        self.identity = identity
+        self.serialize = serialize
+
+    def iterate(self, start: int, before_request: Optional[Callable[[], Awaitable[None]]] = None) -> AsyncIterator[Any]:
+        async def fetch(cursor):
+            if before_request is not None:
+                await before_request()
+            return await self.fetch(start, cursor)
+
+        items, next_cursor = self.paging()
+        return paginate(fetch, items, next_cursor)
+
+
+def _source_name(endpoint: str, params: Dict[str, Any]) -> str:
+    return ":".join([endpoint] + [f"{k}={v}" for k, v in sorted(params.items()) if k not in ("auth", "authorization")])
+
+
+def trades_source(order_api: OrderApi, sort_by: str = "timestamp", limit: int = PAGE_LIMIT, **params) -> BackfillSource:
+    """Trades by `sort_by` ("timestamp" or "trade_id"), `params` (e.g. market_id, account_index) filter them."""
+
+    def fetch(start, cursor):
+        return order_api.trades(sort_by=sort_by, sort_dir="asc", limit=limit, var_from=start, cursor=cursor, **params)
+
+    return BackfillSource(
+        name=_source_name(f"trades/{sort_by}", params),
+        fetch=fetch,
+        paging=lambda: _cursor_paging("trades", "next_cursor"),
+        key=lambda trade: getattr(trade, sort_by),
+        identity=lambda trade: trade.trade_id,
+    )
+
+
+def account_txs_source(tx_api: TransactionApi, by: str, value: str, limit: int = PAGE_LIMIT, **params) -> BackfillSource:
+    """Transactions of an account by sequence index, which `TransactionApi.account_txs` pages by."""
+
+    def fetch(start, index):
+        return tx_api.account_txs(limit=limit, by=by, value=value, index=start if index is None else index, **params)
+
+    return BackfillSource(
+        name=_source_name("account_txs", dict(params, by=by, value=value)),
+        fetch=fetch,
+        paging=lambda: _index_paging("txs", "sequence_index", limit),
+        key=lambda tx: tx.sequence_index,
+        identity=lambda tx: tx.hash,
+    )
+
+
+class BackfillStore:
+    """
+    SQLite file with the backfilled items, unique per source and identity, and the progress of each shard.
+    Items and the checkpoint of their shard are committed together, so a crashed backfill resumes where it stopped.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "source TEXT NOT NULL, id TEXT NOT NULL, key INTEGER NOT NULL, data TEXT NOT NULL, "
+            "PRIMARY KEY (source, id))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS items_by_key ON items (source, key)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS shards ("
+            "source TEXT NOT NULL, start INTEGER NOT NULL, end INTEGER NOT NULL, position INTEGER NOT NULL, "
+            "done INTEGER NOT NULL, PRIMARY KEY (source, start, end))"
+        )
+
+    def checkpoints(self, source: str) -> Dict[Tuple[int, int], Tuple[int, bool]]:
+        """(start, end) of each shard started so far -> (key to resume from, whether it is done)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT start, end, position, done FROM shards WHERE source = ?", (source,)).fetchall()
+        return {(start, end): (position, bool(done)) for start, end, position, done in rows}
+
+    def write(self, source: str, shard: Tuple[int, int], items: List[Tuple[str, int, str]], position: int, done: bool) -> int:
+        """Stores (id, key, data) items and the shard checkpoint in one transaction, returns the number of new items."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO items (source, id, key, data) VALUES (?, ?, ?, ?)",
+                    [(source, item_id, key, data) for item_id, key, data in items],
+                )
+                inserted = self._conn.total_changes - before
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO shards (source, start, end, position, done) VALUES (?, ?, ?, ?, ?)",
+                    (source, shard[0], shard[1], position, int(done)),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return inserted
+
+    def items(self, source: str) -> Iterator[str]:
+        """The stored items of a source as JSON, in key order."""
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM items WHERE source = ? ORDER BY key, id", (source,)).fetchall()
+        return (data for data, in rows)
+
+    def count(self, source: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM items WHERE source = ?", (source,)).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class Backfill:
+    """
+    Fetches the items of `source` with keys in [start, end) into `store`. The range is split into `shards` equal
+    shards, of which `concurrency` are fetched at a time, all requests sharing `rate_limiter`. Items are written
+    every `batch_size` items along with the shard checkpoint; running the same backfill again skips the finished
+    shards and resumes the others from their checkpoint. Items fetched twice, at shard boundaries or when resuming,
+    are stored once.
+    """
+
+    def __init__(
+        self,
+        source: BackfillSource,
+        store: BackfillStore,
+        start: int,
+        end: int,
+        shards: int = 8,
+        concurrency: int = 4,
+        rate_limiter: Optional[RateLimiter] = None,
+        batch_size: int = 500,
+    ):
+        if end <= start or shards < 1 or concurrency < 1:
+            raise ValueError(f"invalid backfill {start=} {end=} {shards=} {concurrency=}")
+        self.source = source
+        self.store = store
+        self.start = start
+        self.end = end
+        self.shards = shards
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.batch_size = batch_size
+        self.items_fetched = 0
+        self.items_written = 0
+
+    def shard_ranges(self) -> List[Tuple[int, int]]:
+        step = -(-(self.end - self.start) // self.shards)
+        return [(lo, min(lo + step, self.end)) for lo in range(self.start, self.end, step)]
+
+    async def run(self) -> int:
+        """Runs the backfill until every shard is done, returns the number of new items written."""
+        self.items_fetched = self.items_written = 0
+        checkpoints = self.store.checkpoints(self.source.name)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_shard(shard):
+            async with semaphore:
+                await self._run_shard(shard, checkpoints[shard][0] if shard in checkpoints else shard[0])
+
+        shards = [shard for shard in self.shard_ranges() if not checkpoints.get(shard, (None, False))[1]]
+        logger.debug("backfilling %d/%d shards of %s", len(shards), self.shards, self.source.name)
+        tasks = [asyncio.ensure_future(run_shard(shard)) for shard in shards]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # stop the other shards too, they resume from their checkpoints on the next run
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return self.items_written
+
+    async def _run_shard(self, shard: Tuple[int, int], position: int) -> None:
+        source = self.source
+        batch = []
+        before_request = self.rate_limiter.acquire if self.rate_limiter is not None else None
+        items = source.iterate(position, before_request)
+        try:
+            async for item in items:
+                key = source.key(item)
+                if key < position:
+                    continue
+                if key >= shard[1]:
+                    break
+                self.items_fetched += 1
+                batch.append((str(source.identity(item)), key, source.serialize(item)))
+                if len(batch) >= self.batch_size:
+                    # items sharing the last key are fetched again when resuming, and ignored by the store
+                    position = key
+                    self.items_written += self.store.write(source.name, shard, batch, position, done=False)
+                    batch = []
+        finally:
+            await items.aclose()
+        self.items_written += self.store.write(source.name, shard, batch, shard[1], done=True)
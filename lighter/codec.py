@@ -0,0 +1,113 @@
+"""
+JSON encoding / decoding used on the SDK hot paths (WsClient messages, REST request bodies and responses).
+
+orjson or msgspec is used when installed, falling back to the stdlib `json` module otherwise.
+The codec can be selected explicitly with `set_codec("json" | "orjson" | "msgspec")`.
+
+What orjson / msgspec can't encode (integers wider than 64 bits, non-str dict keys) or decode (NaN, Infinity,
+out of range floats) is handed to `json`, so every codec accepts the same input. Known differences remain:
+- NaN and infinite floats are encoded as null by orjson and msgspec, as NaN / Infinity by `json`
+- orjson decodes integers wider than 64 bits as floats, losing precision; use "msgspec" or "json" if they matter
+"""
+import json
+from typing import Any, Callable, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+class JsonCodec:
+    name = "json"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj)
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # e.g. NaN or Infinity, which the stdlib accepts, and raises ValueError if the data is malformed
+            return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except (TypeError, OverflowError):
+            # e.g. non-str dict keys or integers wider than 64 bits, which the stdlib handles
+            return json.dumps(obj)
+
+
+class MsgspecCodec(JsonCodec):
+    name = "msgspec"
+
+    def __init__(self):
+        self._decoder = msgspec.json.Decoder()
+        self._encoder = msgspec.json.Encoder()
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError:
+            # e.g. NaN, Infinity or out of range floats, which the stdlib accepts
+            return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        try:
+            return self._encoder.encode(obj).decode("utf-8")
+        except (TypeError, OverflowError):
+            # e.g. integers wider than 64 bits, which older msgspec versions reject with OverflowError
+            return json.dumps(obj)
+
+
+_CODECS: Dict[str, Callable[[], JsonCodec]] = {"json": JsonCodec}
+if orjson is not None:
+    _CODECS["orjson"] = OrjsonCodec
+if msgspec is not None:
+    _CODECS["msgspec"] = MsgspecCodec
+
+_codec: Optional[JsonCodec] = None
+loads: Callable[[Union[str, bytes]], Any] = json.loads
+dumps: Callable[[Any], str] = json.dumps
+
+
+def available_codecs():
+    return list(_CODECS.keys())
+
+
+def get_codec() -> JsonCodec:
+    return _codec
+
+
+def set_codec(codec: Union[str, JsonCodec, None] = None) -> JsonCodec:
+    """
+    Selects the codec used by the SDK. Accepts a codec name, a `JsonCodec` instance or None,
+    which picks the fastest installed one. Decode errors are always raised as `ValueError`.
+    """
+    global _codec, loads, dumps
+    if codec is None:
+        codec = next(name for name in ("orjson", "msgspec", "json") if name in _CODECS)
+    if isinstance(codec, str):
+        if codec not in _CODECS:
+            raise ValueError(f"unknown or unavailable json codec {codec}, available: {available_codecs()}")
+        codec = _CODECS[codec]()
+    _codec = codec
+    loads = codec.loads
+    dumps = codec.dumps
+    return codec
+
+
+set_codec()
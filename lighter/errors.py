@@ -1,2 +1,8 @@
 class ValidationError(ValueError):
     pass
+
+
+class TxOutcomeUnknownError(Exception):
+    """A transaction was sent, but whether the server accepted it is unknown (e.g. no response in time)."""
+
+    pass
@@ -0,0 +1,217 @@
+import asyncio
+import time
+from decimal import Decimal
+from typing import Dict, Iterable, List, MutableSequence, Optional, Union
+
+from lighter.api.order_api import OrderApi
+
+Number = Union[str, int, float, Decimal]
+
+
+def to_units(value: Number, decimals: int) -> int:
+    """
+    Converts a human readable amount into integer units with `decimals` fractional digits. Strings and Decimals are
+    converted exactly and raise ValueError if they are more precise than `decimals`; floats are rounded.
+    """
+    if isinstance(value, str):
+        whole, _, frac = value.partition(".")
+        frac = frac.rstrip("0")
+        if len(frac) > decimals:
+            raise ValueError(f"{value} has more than {decimals} decimals")
+        return int(whole + frac.ljust(decimals, "0"))
+    if isinstance(value, int):
+        return value * 10**decimals
+    if isinstance(value, Decimal):
+        units = value.scaleb(decimals)
+        if units != units.to_integral_value():
+            raise ValueError(f"{value} has more than {decimals} decimals")
+        return int(units)
+    return round(value * 10**decimals)
+
+
+def from_units(units: int, decimals: int) -> str:
+    """Converts integer units back into a decimal string with exactly `decimals` fractional digits."""
+    if decimals == 0:
+        return str(units)
+    sign = "-" if units < 0 else ""
+    whole, frac = divmod(abs(units), 10**decimals)
+    return f"{sign}{whole}.{frac:0{decimals}d}"
+
+
+class MarketSpec:
+    """Static metadata of one market, with conversions between human readable prices / sizes and integer units."""
+
+    __slots__ = (
+        "market_id",
+        "symbol",
+        "status",
+        "price_decimals",
+        "size_decimals",
+        "quote_decimals",
+        "taker_fee",
+        "maker_fee",
+        "min_base_amount",
+        "min_quote_amount",
+        "_price_scale",
+        "_size_scale",
+    )
+
+    def __init__(
+        self,
+        market_id: int,
+        symbol: str,
+        price_decimals: int,
+        size_decimals: int,
+        quote_decimals: int = 0,
+        status: str = "active",
+        taker_fee: str = "0",
+        maker_fee: str = "0",
+        min_base_amount: str = "0",
+        min_quote_amount: str = "0",
+    ):
+        self.market_id = market_id
+        self.symbol = symbol
+        self.status = status
+        self.price_decimals = price_decimals
+        self.size_decimals = size_decimals
+        self.quote_decimals = quote_decimals
+        self.taker_fee = taker_fee
+        self.maker_fee = maker_fee
+        self.min_base_amount = min_base_amount
+        self.min_quote_amount = min_quote_amount
+        self._price_scale = 10**price_decimals
+        self._size_scale = 10**size_decimals
+
+    @classmethod
+    def from_order_book(cls, order_book) -> "MarketSpec":
+        """Builds it from an `OrderApi.order_books` entry."""
+        return cls(
+            market_id=order_book.market_id,
+            symbol=order_book.symbol,
+            price_decimals=order_book.supported_price_decimals,
+            size_decimals=order_book.supported_size_decimals,
+            quote_decimals=order_book.supported_quote_decimals,
+            status=order_book.status,
+            taker_fee=order_book.taker_fee,
+            maker_fee=order_book.maker_fee,
+            min_base_amount=order_book.min_base_amount,
+            min_quote_amount=order_book.min_quote_amount,
+        )
+
+    def price_to_units(self, price: Number) -> int:
+        if type(price) is float:
+            return round(price * self._price_scale)
+        return to_units(price, self.price_decimals)
+
+    def size_to_units(self, size: Number) -> int:
+        if type(size) is float:
+            return round(size * self._size_scale)
+        return to_units(size, self.size_decimals)
+
+    def units_to_price(self, units: int) -> str:
+        return from_units(units, self.price_decimals)
+
+    def units_to_size(self, units: int) -> str:
+        return from_units(units, self.size_decimals)
+
+    def prices_to_units(self, prices: Iterable[Number], out: Optional[MutableSequence[int]] = None) -> MutableSequence[int]:
+        """
+        Converts many prices at once. With `out` (e.g. a preallocated list or `array.array("q")` of the same length)
+        the units are written in place instead of allocating a new list.
+        """
+        return self._convert_all(self.price_to_units, prices, out)
+
+    def sizes_to_units(self, sizes: Iterable[Number], out: Optional[MutableSequence[int]] = None) -> MutableSequence[int]:
+        return self._convert_all(self.size_to_units, sizes, out)
+
+    @staticmethod
+    def _convert_all(convert, values, out) -> MutableSequence[int]:
+        if out is None:
+            return list(map(convert, values))
+        for i, value in enumerate(values):
+            out[i] = convert(value)
+        return out
+
+    def __repr__(self) -> str:
+        return (
+            f"MarketSpec(market_id={self.market_id}, symbol={self.symbol}, "
+            f"price_decimals={self.price_decimals}, size_decimals={self.size_decimals})"
+        )
+
+
+class MarketRegistry:
+    """
+    Market metadata (decimals, fees, minimum amounts) loaded once from `OrderApi.order_books`, with symbol <-> market_id
+    lookups. Once `ttl` seconds old, the data is still served while it is refreshed in the background. Looking up an
+    unknown market reloads the markets, unless they were loaded less than `unknown_market_cooldown` seconds ago.
+    """
+
+    def __init__(self, order_api: OrderApi, ttl: float = 3600.0, unknown_market_cooldown: float = 60.0):
+        self.order_api = order_api
+        self.ttl = ttl
+        self.unknown_market_cooldown = unknown_market_cooldown
+        self.markets: Dict[int, MarketSpec] = {}
+        self.market_ids: Dict[str, int] = {}
+        self.loaded_at: Optional[float] = None
+        self._loading: Optional[asyncio.Task] = None
+
+    async def load(self) -> None:
+        """(Re)loads the markets, concurrent calls share the same request."""
+        await asyncio.shield(self._start_load())
+
+    def _start_load(self) -> asyncio.Task:
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._load())
+            self._loading.add_done_callback(self._loaded)
+        return self._loading
+
+    def _loaded(self, task: asyncio.Task) -> None:
+        self._loading = None
+        if not task.cancelled():
+            task.exception()  # retrieved, so a failed background refresh isn't reported as never retrieved
+
+    async def _load(self) -> None:
+        response = await self.order_api.order_books()
+        self.set_markets(MarketSpec.from_order_book(order_book) for order_book in response.order_books)
+
+    def set_markets(self, markets: Iterable[MarketSpec]) -> None:
+        markets = list(markets)
+        self.markets = {market.market_id: market for market in markets}
+        self.market_ids = {market.symbol: market.market_id for market in markets}
+        self.loaded_at = time.monotonic()
+
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl
+
+    async def get_market(self, market: Union[int, str]) -> MarketSpec:
+        """Returns the market by id or symbol, loading the markets if needed."""
+        if self.market_key(market) not in self.markets:
+            # a load in flight may bring the market, otherwise it may have been listed since the last load
+            if (
+                self._loading is not None
+                or self.loaded_at is None
+                or time.monotonic() - self.loaded_at >= self.unknown_market_cooldown
+            ):
+                await self.load()
+        elif self.is_stale():
+            self._start_load()  # refreshed in the background, the current data is served meanwhile
+        return self.market(market)
+
+    def market_key(self, market: Union[int, str]) -> Optional[int]:
+        return self.market_ids.get(market) if isinstance(market, str) else market
+
+    def market(self, market: Union[int, str]) -> MarketSpec:
+        """Returns an already loaded market by id or symbol, raising KeyError if it is unknown."""
+        market_id = self.market_key(market)
+        if market_id not in self.markets:
+            raise KeyError(f"unknown market {market}")
+        return self.markets[market_id]
+
+    def market_id(self, symbol: str) -> int:
+        return self.market(symbol).market_id
+
+    def symbol(self, market_id: int) -> str:
+        return self.market(market_id).symbol
+
+    def symbols(self) -> List[str]:
+        return list(self.market_ids)
@@ -1,6 +1,11 @@
 import abc
+import asyncio
 import enum
-from typing import Optional, Tuple
+import heapq
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple, Union
 
 import requests
 
@@ -20,37 +25,114 @@ def get_nonce_from_api(client: api_client.ApiClient, account_index: int, api_key
     return req.json()["nonce"]
 
 
-class NonceManager(abc.ABC):
+class _BaseNonceManager:
+    """API key range, scheduling and acknowledgements shared by NonceManager and AsyncNonceManager."""
+
     def __init__(
         self,
         account_index: int,
         api_client: api_client.ApiClient,
         start_api_key: int,
         end_api_key: Optional[int] = None,
+        api_key_scheduler: Optional["ApiKeyScheduler"] = None,
+        nonce_journal: Optional["NonceJournal"] = None,
     ):
         if end_api_key is None:
             end_api_key = start_api_key
         if start_api_key > end_api_key or start_api_key >= 255 or end_api_key >= 255:
             raise ValidationError(f"invalid range {start_api_key=} {end_api_key=}")
+        _check_scheduler_range(api_key_scheduler, start_api_key, end_api_key)
         self.start_api_key = start_api_key
         self.end_api_key = end_api_key
         self.current_api_key = end_api_key  # start will be used for the first tx
+        self.api_key_scheduler = api_key_scheduler
+        self._scheduled = set()  # (api key, nonce) handed out by api_key_scheduler and not acknowledged yet
+        self.nonce_journal = nonce_journal
         self.account_index = account_index
         self.api_client = api_client
-        self.nonce = {
-            api_key_index: get_nonce_from_api(api_client, account_index, api_key_index) - 1
-            for api_key_index in range(start_api_key, end_api_key + 1)
-        }
+        self._lock = threading.Lock()
+
+    def _handed_out(self, api_key_index: int, nonce: int) -> None:
+        if self.api_key_scheduler is not None:
+            with self._lock:
+                self._scheduled.add((api_key_index, nonce))
+
+    def _release_api_key(
+        self, api_key_index: int, nonce: Optional[int], predicted_execution_time_ms: Optional[int] = None
+    ) -> None:
+        """Releases the key to the scheduler if it handed it out for `nonce` (defaults to its highest nonce)."""
+        if self.api_key_scheduler is None:
+            return
+        with self._lock:
+            if not _pop_scheduled(self._scheduled, api_key_index, nonce):
+                return
+        self.api_key_scheduler.release(api_key_index, predicted_execution_time_ms)
+
+    def acknowledge_success(
+        self, api_key_index: int, nonce: int, predicted_execution_time_ms: Optional[int] = None
+    ) -> None:
+        self._release_api_key(api_key_index, nonce, predicted_execution_time_ms)
+
+    def acknowledge_failure(self, api_key_index: int, nonce: Optional[int] = None) -> None:
+        self._release_api_key(api_key_index, nonce)
+
+
+class NonceManager(_BaseNonceManager, abc.ABC):
+    def __init__(
+        self,
+        account_index: int,
+        api_client: api_client.ApiClient,
+        start_api_key: int,
+        end_api_key: Optional[int] = None,
+        api_key_scheduler: Optional["ApiKeyScheduler"] = None,
+        nonce_journal: Optional["NonceJournal"] = None,
+    ):
+        super().__init__(account_index, api_client, start_api_key, end_api_key, api_key_scheduler, nonce_journal)
+        api_keys = range(self.start_api_key, self.end_api_key + 1)
+        # journaled nonces are only validated once the API rejects them, see NonceJournal
+        self.nonce = nonce_journal.load(api_client.configuration.host, account_index, api_keys) if nonce_journal else {}
+        for api_key_index in api_keys:
+            if api_key_index not in self.nonce:
+                self.nonce[api_key_index] = get_nonce_from_api(api_client, account_index, api_key_index) - 1
 
     def hard_refresh_nonce(self, api_key: int):
         self.nonce[api_key] = get_nonce_from_api(self.api_client, self.account_index, api_key) - 1
 
+    def _next_api_key(self, api_key_index: Optional[int] = None) -> int:
+        if api_key_index is not None:
+            return api_key_index
+        if self.api_key_scheduler is not None:
+            # blocks the calling thread until the key is ready, SignerClient.next_nonce_async awaits it instead
+            return self.api_key_scheduler.acquire_blocking()
+        with self._lock:
+            self.current_api_key = increment_circular(self.current_api_key, self.start_api_key, self.end_api_key)
+            return self.current_api_key
+
     @abc.abstractmethod
-    def next_nonce(self) -> Tuple[int, int]:
-        pass
+    def next_nonce(self, api_key_index: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Returns the API key and nonce of the next transaction. `api_key_index` is a key acquired from
+        `api_key_scheduler` by the caller, by default the key is picked (and waited for) here.
+        """
 
-    def acknowledge_failure(self, api_key_index: int) -> None:
-        pass
+
+def _check_scheduler_range(api_key_scheduler: Optional["ApiKeyScheduler"], start_api_key: int, end_api_key: int) -> None:
+    if api_key_scheduler is None:
+        return
+    if (api_key_scheduler.start_api_key, api_key_scheduler.end_api_key) != (start_api_key, end_api_key):
+        raise ValidationError(
+            f"api key scheduler range {api_key_scheduler.start_api_key}-{api_key_scheduler.end_api_key} "
+            f"doesn't match {start_api_key=} {end_api_key=}"
+        )
+
+
+def _pop_scheduled(scheduled: set, api_key_index: int, nonce: Optional[int]) -> bool:
+    if nonce is None:
+        nonce = max((n for k, n in scheduled if k == api_key_index), default=None)
+    if (api_key_index, nonce) not in scheduled:
+        return False
+    scheduled.remove((api_key_index, nonce))
+    return True
 
 
 def increment_circular(idx: int, start_idx: int, end_idx: int) -> int:
@@ -60,23 +142,232 @@ def increment_circular(idx: int, start_idx: int, end_idx: int) -> int:
     return idx
 
 
-class OptimisticNonceManager(NonceManager):
+class ApiKeyScheduler:
+    """
+    Picks the API key which can be used the soonest, instead of round-robin. A key is ready `min_interval` seconds
+    after it was last handed out, or, with `use_predicted_execution_time`, once its last transaction is predicted
+    to be executed (`predicted_execution_time_ms` of RespSendTx). Ties go to the key with the fewest transactions
+    in flight, then to the least recently used one.
+    """
+
+    def __init__(
+        self,
+        start_api_key: int,
+        end_api_key: Optional[int] = None,
+        min_interval: float = 0.35,
+        use_predicted_execution_time: bool = True,
+    ):
+        if end_api_key is None:
+            end_api_key = start_api_key
+        if start_api_key > end_api_key:
+            raise ValidationError(f"invalid range {start_api_key=} {end_api_key=}")
+        self.start_api_key = start_api_key
+        self.end_api_key = end_api_key
+        self.min_interval = min_interval
+        self.use_predicted_execution_time = use_predicted_execution_time
+        api_keys = range(start_api_key, end_api_key + 1)
+        self.ready_at = {api_key_index: 0.0 for api_key_index in api_keys}  # time.monotonic() based
+        self.last_used = {api_key_index: 0.0 for api_key_index in api_keys}
+        self.in_flight = {api_key_index: 0 for api_key_index in api_keys}
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> Tuple[int, float]:
+        with self._lock:
+            now = time.monotonic()
+            api_key_index = min(
+                self.ready_at, key=lambda k: (max(self.ready_at[k], now), self.in_flight[k], self.last_used[k])
+            )
+            use_at = max(self.ready_at[api_key_index], now)
+            self.last_used[api_key_index] = use_at
+            self.ready_at[api_key_index] = use_at + self.min_interval
+            self.in_flight[api_key_index] += 1
+            return api_key_index, use_at - now
+
+    async def acquire(self) -> int:
+        """Returns the API key which is ready the soonest, once it is ready."""
+        api_key_index, delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return api_key_index
+
+    def acquire_blocking(self) -> int:
+        """Returns the API key which is ready the soonest, once it is ready, blocking the calling thread meanwhile."""
+        api_key_index, delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return api_key_index
+
+    def acquire_nowait(self) -> int:
+        """Returns the API key which is ready the soonest, without waiting for it."""
+        return self._reserve()[0]
+
+    def release(self, api_key_index: int, predicted_execution_time_ms: Optional[int] = None) -> None:
+        with self._lock:
+            if api_key_index not in self.in_flight:
+                return
+            self.in_flight[api_key_index] = max(self.in_flight[api_key_index] - 1, 0)
+            if not self.use_predicted_execution_time or not predicted_execution_time_ms:
+                return
+            delay = predicted_execution_time_ms / 1000
+            if predicted_execution_time_ms > 1e12:  # a unix timestamp rather than a duration
+                delay -= time.time()
+            ready_at = time.monotonic() + max(delay, 0)
+            if self.in_flight[api_key_index] == 0:
+                # a tighter bound than min_interval when nothing else is pending on the key
+                self.ready_at[api_key_index] = ready_at
+            else:
+                self.ready_at[api_key_index] = max(self.ready_at[api_key_index], ready_at)
+
+
+class NonceJournal:
+    """
+    SQLite file with the last nonce handed out for each API key, which the optimistic nonce managers write through.
+    A nonce manager started with a journal resumes from it instead of querying the API for each key. Journaled
+    nonces are not validated upfront: if one is stale, the transaction is rejected with an invalid nonce and the
+    nonce of that key is refreshed from the API, as usual.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS nonces ("
+            "host TEXT NOT NULL, account_index INTEGER NOT NULL, api_key_index INTEGER NOT NULL, nonce INTEGER NOT NULL, "
+            "PRIMARY KEY (host, account_index, api_key_index))"
+        )
+
+    def load(self, host: str, account_index: int, api_keys: Iterable[int]) -> Dict[int, int]:
+        api_keys = set(api_keys)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT api_key_index, nonce FROM nonces WHERE host = ? AND account_index = ?", (host, account_index)
+            ).fetchall()
+        return {api_key_index: nonce for api_key_index, nonce in rows if api_key_index in api_keys}
+
+    def record(self, host: str, account_index: int, api_key_index: int, nonce: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO nonces (host, account_index, api_key_index, nonce) VALUES (?, ?, ?, ?)",
+                (host, account_index, api_key_index, nonce),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class NonceTracker:
+    """
+    Nonces of one API key. Tracks the nonces in flight, so that transactions completing out of order never make it
+    hand out a nonce twice, and reuses the nonces of failed transactions (lowest first) so they don't leave gaps.
+    """
+
+    def __init__(self, next_nonce: int):
+        self.next_nonce = next_nonce  # lowest nonce never handed out
+        self.in_flight = set()
+        self.released = []  # heap of nonces below next_nonce, which failed and can be reused
+        self._lock = threading.Lock()
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self.released:
+                nonce = heapq.heappop(self.released)
+            else:
+                nonce = self.next_nonce
+                self.next_nonce += 1
+            self.in_flight.add(nonce)
+            return nonce
+
+    def confirm(self, nonce: int) -> None:
+        """The transaction using `nonce` was accepted, or may have been."""
+        with self._lock:
+            self.in_flight.discard(nonce)
+
+    def release(self, nonce: Optional[int] = None) -> None:
+        """The transaction using `nonce` failed without consuming it. Defaults to the highest nonce in flight."""
+        with self._lock:
+            if nonce is None:
+                if not self.in_flight:
+                    return
+                nonce = max(self.in_flight)
+            if nonce not in self.in_flight:
+                return
+            self.in_flight.remove(nonce)
+            if nonce == self.next_nonce - 1:
+                self.next_nonce -= 1
+                # released nonces right below are now at the top as well
+                released = set(self.released)
+                while self.next_nonce - 1 in released:
+                    released.remove(self.next_nonce - 1)
+                    self.next_nonce -= 1
+                self.released = list(released)
+                heapq.heapify(self.released)
+            else:
+                heapq.heappush(self.released, nonce)
+
+    def resync(self, next_nonce: int) -> None:
+        """
+        Aligns with `next_nonce` as returned by the API: the nonces in flight are kept, and every nonce from
+        `next_nonce` which is neither in flight nor handed out again would be a gap, so it is released.
+        """
+        with self._lock:
+            top = max(self.in_flight, default=next_nonce - 1) + 1
+            self.next_nonce = max(next_nonce, top)
+            self.released = [nonce for nonce in range(next_nonce, self.next_nonce) if nonce not in self.in_flight]
+            heapq.heapify(self.released)
+
+
+class _OptimisticNonces:
+    """NonceTracker per API key (`trackers`) of OptimisticNonceManager and AsyncOptimisticNonceManager."""
+
+    def _journal(self, api_key_index: int) -> None:
+        if self.nonce_journal is not None:
+            self.nonce_journal.record(
+                self.api_client.configuration.host,
+                self.account_index,
+                api_key_index,
+                self.trackers[api_key_index].next_nonce - 1,
+            )
+
+    def acknowledge_success(
+        self, api_key_index: int, nonce: int, predicted_execution_time_ms: Optional[int] = None
+    ) -> None:
+        super().acknowledge_success(api_key_index, nonce, predicted_execution_time_ms)
+        self.trackers[api_key_index].confirm(nonce)
+
+    def acknowledge_failure(self, api_key_index: int, nonce: Optional[int] = None) -> None:
+        super().acknowledge_failure(api_key_index, nonce)
+        self.trackers[api_key_index].release(nonce)
+        self._journal(api_key_index)
+
+
+class OptimisticNonceManager(_OptimisticNonces, NonceManager):
     def __init__(
         self,
         account_index: int,
         api_client: api_client.ApiClient,
         start_api_key: int,
         end_api_key: Optional[int] = None,
+        api_key_scheduler: Optional["ApiKeyScheduler"] = None,
+        nonce_journal: Optional["NonceJournal"] = None,
     ) -> None:
-        super().__init__(account_index, api_client, start_api_key, end_api_key)
+        super().__init__(account_index, api_client, start_api_key, end_api_key, api_key_scheduler, nonce_journal)
+        self.trackers = {api_key_index: NonceTracker(nonce + 1) for api_key_index, nonce in self.nonce.items()}
 
-    def next_nonce(self) -> Tuple[int, int]:
-        self.current_api_key = increment_circular(self.current_api_key, self.start_api_key, self.end_api_key)
-        self.nonce[self.current_api_key] += 1
-        return (self.current_api_key, self.nonce[self.current_api_key])
+    def next_nonce(self, api_key_index: Optional[int] = None) -> Tuple[int, int]:
+        api_key_index = self._next_api_key(api_key_index)
+        nonce = self.trackers[api_key_index].allocate()
+        self._handed_out(api_key_index, nonce)
+        self._journal(api_key_index)
+        return (api_key_index, nonce)
 
-    def acknowledge_failure(self, api_key_index: int) -> None:
-        self.nonce[api_key_index] -= 1
+    def hard_refresh_nonce(self, api_key: int):
+        super().hard_refresh_nonce(api_key)
+        self.trackers[api_key].resync(self.nonce[api_key] + 1)
+        self._journal(api_key)
 
 
 class ApiNonceManager(NonceManager):
@@ -86,26 +377,137 @@ class ApiNonceManager(NonceManager):
         api_client: api_client.ApiClient,
         start_api_key: int,
         end_api_key: Optional[int] = None,
+        api_key_scheduler: Optional["ApiKeyScheduler"] = None,
+        nonce_journal: Optional["NonceJournal"] = None,
     ) -> None:
-        super().__init__(account_index, api_client, start_api_key, end_api_key)
+        super().__init__(account_index, api_client, start_api_key, end_api_key, api_key_scheduler, nonce_journal)
 
-    def next_nonce(self) -> Tuple[int, int]:
+    def next_nonce(self, api_key_index: Optional[int] = None) -> Tuple[int, int]:
         """
         It is recommended to wait at least 350ms before using the same api key.
         Please be mindful of your transaction frequency when using this nonce manager.
-        predicted_execution_time_ms from the response could give you a tighter bound.
+        predicted_execution_time_ms from the response could give you a tighter bound, see ApiKeyScheduler.
         """
-        self.current_api_key = increment_circular(self.current_api_key, self.start_api_key, self.end_api_key)
-        self.nonce[self.current_api_key] = get_nonce_from_api(self.api_client, self.account_index, self.current_api_key)
-        return (self.current_api_key, self.nonce[self.current_api_key])
+        api_key_index = self._next_api_key(api_key_index)
+        self.nonce[api_key_index] = get_nonce_from_api(self.api_client, self.account_index, api_key_index)
+        self._handed_out(api_key_index, self.nonce[api_key_index])
+        return (api_key_index, self.nonce[api_key_index])
 
     def refresh_nonce(self, api_key_index: int) -> int:
         self.nonce[api_key_index] = get_nonce_from_api(self.api_client, self.start_api_key, self.end_api_key)
 
 
+async def get_nonce_from_api_async(tx_api: transaction_api.TransactionApi, account_index: int, api_key_index: int) -> int:
+    return (await tx_api.next_nonce(account_index=account_index, api_key_index=api_key_index)).nonce
+
+
+class AsyncNonceManager(_BaseNonceManager, abc.ABC):
+    """
+    Async counterpart of NonceManager, which never blocks the event loop. The nonces of all API keys are fetched
+    concurrently, either by awaiting `initialize()` or lazily on the first `next_nonce()`.
+    """
+
+    def __init__(
+        self,
+        account_index: int,
+        api_client: api_client.ApiClient,
+        start_api_key: int,
+        end_api_key: Optional[int] = None,
+        api_key_scheduler: Optional["ApiKeyScheduler"] = None,
+        nonce_journal: Optional["NonceJournal"] = None,
+    ):
+        super().__init__(account_index, api_client, start_api_key, end_api_key, api_key_scheduler, nonce_journal)
+        self.tx_api = transaction_api.TransactionApi(api_client)
+        self.nonce = {}
+        self._initialization: Optional[asyncio.Task] = None
+
+    async def initialize(self) -> None:
+        if self._initialization is None:
+            self._initialization = asyncio.ensure_future(self._fetch_all_nonces())
+        try:
+            await asyncio.shield(self._initialization)
+        except Exception:
+            self._initialization = None  # retried by the next call
+            raise
+
+    async def _fetch_all_nonces(self) -> None:
+        api_keys = range(self.start_api_key, self.end_api_key + 1)
+        nonce = {}
+        if self.nonce_journal is not None:
+            nonce = self.nonce_journal.load(self.api_client.configuration.host, self.account_index, api_keys)
+        missing = [api_key_index for api_key_index in api_keys if api_key_index not in nonce]
+        nonces = await asyncio.gather(
+            *(get_nonce_from_api_async(self.tx_api, self.account_index, api_key_index) for api_key_index in missing)
+        )
+        nonce.update((api_key_index, api_nonce - 1) for api_key_index, api_nonce in zip(missing, nonces))
+        self.nonce = nonce
+
+    async def hard_refresh_nonce(self, api_key: int):
+        self.nonce[api_key] = await get_nonce_from_api_async(self.tx_api, self.account_index, api_key) - 1
+
+    async def _next_api_key(self) -> int:
+        if self.api_key_scheduler is not None:
+            return await self.api_key_scheduler.acquire()
+        self.current_api_key = increment_circular(self.current_api_key, self.start_api_key, self.end_api_key)
+        return self.current_api_key
+
+    @abc.abstractmethod
+    async def next_nonce(self) -> Tuple[int, int]:
+        pass
+
+
+class AsyncOptimisticNonceManager(_OptimisticNonces, AsyncNonceManager):
+    def __init__(
+        self,
+        account_index: int,
+        api_client: api_client.ApiClient,
+        start_api_key: int,
+        end_api_key: Optional[int] = None,
+        api_key_scheduler: Optional["ApiKeyScheduler"] = None,
+        nonce_journal: Optional["NonceJournal"] = None,
+    ) -> None:
+        super().__init__(account_index, api_client, start_api_key, end_api_key, api_key_scheduler, nonce_journal)
+        self.trackers = {}
+
+    async def _fetch_all_nonces(self) -> None:
+        await super()._fetch_all_nonces()
+        self.trackers = {api_key_index: NonceTracker(nonce + 1) for api_key_index, nonce in self.nonce.items()}
+
+    async def next_nonce(self) -> Tuple[int, int]:
+        if not self.trackers:
+            await self.initialize()
+        api_key_index = await self._next_api_key()
+        nonce = self.trackers[api_key_index].allocate()
+        self._handed_out(api_key_index, nonce)
+        self._journal(api_key_index)
+        return (api_key_index, nonce)
+
+    async def hard_refresh_nonce(self, api_key: int):
+        await super().hard_refresh_nonce(api_key)
+        self.trackers[api_key].resync(self.nonce[api_key] + 1)
+        self._journal(api_key)
+
+
+class AsyncApiNonceManager(AsyncNonceManager):
+    async def initialize(self) -> None:
+        pass  # nonces are fetched for every transaction
+
+    async def next_nonce(self) -> Tuple[int, int]:
+        """
+        It is recommended to wait at least 350ms before using the same api key.
+        Please be mindful of your transaction frequency when using this nonce manager, or pace it with ApiKeyScheduler.
+        """
+        api_key_index = await self._next_api_key()
+        self.nonce[api_key_index] = await get_nonce_from_api_async(self.tx_api, self.account_index, api_key_index)
+        self._handed_out(api_key_index, self.nonce[api_key_index])
+        return (api_key_index, self.nonce[api_key_index])
+
+
 class NonceManagerType(enum.Enum):
     OPTIMISTIC = 1
     API = 2
+    ASYNC_OPTIMISTIC = 3
+    ASYNC_API = 4
 
 
 def nonce_manager_factory(
@@ -114,13 +516,17 @@ def nonce_manager_factory(
     api_client: api_client.ApiClient,
     start_api_key: int,
     end_api_key: Optional[int] = None,
-) -> NonceManager:
+    api_key_scheduler: Optional[ApiKeyScheduler] = None,
+    nonce_journal: Optional[NonceJournal] = None,
+) -> Union[NonceManager, AsyncNonceManager]:
     if nonce_manager_type == NonceManagerType.OPTIMISTIC:
         return OptimisticNonceManager(
             account_index=account_index,
             api_client=api_client,
             start_api_key=start_api_key,
             end_api_key=end_api_key,
+            api_key_scheduler=api_key_scheduler,
+            nonce_journal=nonce_journal,
         )
     elif nonce_manager_type == NonceManagerType.API:
         return ApiNonceManager(
@@ -128,5 +534,25 @@ def nonce_manager_factory(
             api_client=api_client,
             start_api_key=start_api_key,
             end_api_key=end_api_key,
+            api_key_scheduler=api_key_scheduler,
+            nonce_journal=nonce_journal,
+        )
+    elif nonce_manager_type == NonceManagerType.ASYNC_OPTIMISTIC:
+        return AsyncOptimisticNonceManager(
+            account_index=account_index,
+            api_client=api_client,
+            start_api_key=start_api_key,
+            end_api_key=end_api_key,
+            api_key_scheduler=api_key_scheduler,
+            nonce_journal=nonce_journal,
+        )
+    elif nonce_manager_type == NonceManagerType.ASYNC_API:
+        return AsyncApiNonceManager(
+            account_index=account_index,
+            api_client=api_client,
+            start_api_key=start_api_key,
+            end_api_key=end_api_key,
+            api_key_scheduler=api_key_scheduler,
+            nonce_journal=nonce_journal,
         )
     raise ValidationError("invalid nonce manager type")
@@ -0,0 +1,172 @@
+import time
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def price_to_units(price: str, decimals: int) -> int:
+    """Converts a decimal price string (e.g. "3024.66") into integer units with `decimals` fractional digits."""
+    whole, _, frac = price.partition(".")
+    if len(frac) > decimals:
+        raise ValueError(f"price {price} has more than {decimals} decimals")
+    return int(whole + frac.ljust(decimals, "0"))
+
+
+def _decimals_of(price: str) -> int:
+    _, _, frac = price.partition(".")
+    return len(frac)
+
+
+class OrderBookSide:
+    """
+    One side of an order book, keyed by integer price units.
+
+    Levels live in a dict for O(1) lookups, while a sorted key list (maintained with bisect) keeps the
+    side ordered. Keys are stored so that the best level is always at the end of the list, which keeps
+    inserts and removals near the top of the book cheap.
+    """
+
+    def __init__(self, is_bid: bool):
+        self.is_bid = is_bid
+        self.levels: Dict[int, Tuple[str, str]] = {}  # price units -> (price, size) as received
+        self._keys: List[int] = []
+
+    def _sort_key(self, units: int) -> int:
+        # bids ascend towards the best (highest) price, asks are negated so the lowest price sorts last
+        return units if self.is_bid else -units
+
+    def set(self, units: int, price: str, size: str) -> None:
+        if float(size) == 0:
+            self.remove(units)
+            return
+        if units not in self.levels:
+            insort(self._keys, self._sort_key(units))
+        self.levels[units] = (price, size)
+
+    def remove(self, units: int) -> None:
+        if self.levels.pop(units, None) is None:
+            return
+        key = self._sort_key(units)
+        idx = bisect_left(self._keys, key)
+        del self._keys[idx]
+
+    def clear(self) -> None:
+        self.levels.clear()
+        self._keys.clear()
+
+    def best(self) -> Optional[Tuple[str, str]]:
+        if not self._keys:
+            return None
+        return self.levels[self._sort_key(self._keys[-1])]
+
+    def top(self, n: int) -> List[Tuple[str, str]]:
+        keys = self._keys[-n:] if n > 0 else []
+        return [self.levels[self._sort_key(key)] for key in reversed(keys)]
+
+    def size_at(self, units: int) -> Optional[str]:
+        level = self.levels.get(units)
+        return level[1] if level is not None else None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _rescale(self, factor: int) -> None:
+        self.levels = {units * factor: level for units, level in self.levels.items()}
+        self._keys = [key * factor for key in self._keys]
+
+
+class OrderBook:
+    """
+    Incrementally maintained order book for a single market.
+
+    Prices are kept as fixed-point integers; the number of decimals is learned from the prices received and
+    widened automatically if the exchange ever sends a more precise price. `apply_snapshot` replaces the book,
+    `apply_delta` applies an `update/order_book` message, where a level with size 0 removes the price.
+    `updated_at` is the `time.monotonic()` of the last snapshot or delta applied.
+    """
+
+    def __init__(self, market_id=None, price_decimals: int = 0):
+        self.market_id = market_id
+        self.price_decimals = price_decimals
+        self.bids = OrderBookSide(is_bid=True)
+        self.asks = OrderBookSide(is_bid=False)
+        self.offset = None
+        self.updated_at = None
+
+    def to_units(self, price: str) -> int:
+        decimals = _decimals_of(price)
+        if decimals > self.price_decimals:
+            factor = 10 ** (decimals - self.price_decimals)
+            self.bids._rescale(factor)
+            self.asks._rescale(factor)
+            self.price_decimals = decimals
+        return price_to_units(price, self.price_decimals)
+
+    def _apply_levels(self, side: OrderBookSide, levels: Iterable[dict]) -> None:
+        for level in levels:
+            price = level["price"]
+            side.set(self.to_units(price), price, level["size"])
+
+    def apply_snapshot(self, order_book: dict) -> None:
+        self.bids.clear()
+        self.asks.clear()
+        self._apply_levels(self.asks, order_book.get("asks", []))
+        self._apply_levels(self.bids, order_book.get("bids", []))
+        self.offset = order_book.get("offset")
+        self.updated_at = time.monotonic()
+
+    def apply_delta(self, order_book: dict) -> None:
+        self._apply_levels(self.asks, order_book.get("asks", []))
+        self._apply_levels(self.bids, order_book.get("bids", []))
+        if "offset" in order_book:
+            self.offset = order_book["offset"]
+        self.updated_at = time.monotonic()
+
+    def age(self) -> Optional[float]:
+        """Seconds since the book was last updated, None if it never was."""
+        return None if self.updated_at is None else time.monotonic() - self.updated_at
+
+    def best_bid(self) -> Optional[Tuple[str, str]]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[Tuple[str, str]]:
+        return self.asks.best()
+
+    def top_bids(self, n: int) -> List[Tuple[str, str]]:
+        return self.bids.top(n)
+
+    def top_asks(self, n: int) -> List[Tuple[str, str]]:
+        return self.asks.top(n)
+
+    def depth_at(self, price: str, is_ask: bool) -> Optional[str]:
+        """Returns the resting size at `price` on the given side, or None if there is no such level."""
+        whole, _, frac = price.partition(".")
+        frac = frac.rstrip("0")
+        if len(frac) > self.price_decimals:
+            return None
+        units = int(whole + frac.ljust(self.price_decimals, "0"))
+        return (self.asks if is_ask else self.bids).size_at(units)
+
+    @staticmethod
+    def _levels_as_dicts(side: OrderBookSide, depth: Optional[int] = None) -> List[dict]:
+        top = side.top(len(side) if depth is None else depth)
+        return [{"price": price, "size": size} for price, size in top]
+
+    def to_dict(self, depth: Optional[int] = None) -> dict:
+        return {
+            "asks": self._levels_as_dicts(self.asks, depth),
+            "bids": self._levels_as_dicts(self.bids, depth),
+            "offset": self.offset,
+        }
+
+    def __getitem__(self, key):
+        # keeps `order_book["asks"]` / `order_book["bids"]` working for callbacks written against the raw dicts
+        if key == "asks":
+            return self._levels_as_dicts(self.asks)
+        if key == "bids":
+            return self._levels_as_dicts(self.bids)
+        if key == "offset":
+            return self.offset
+        raise KeyError(key)
+
+    def __repr__(self) -> str:
+        return f"OrderBook(market_id={self.market_id}, best_bid={self.best_bid()}, best_ask={self.best_ask()})"
@@ -0,0 +1,235 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+from lighter.api.block_api import BlockApi
+from lighter.api.order_api import OrderApi
+from lighter.api.transaction_api import TransactionApi
+
+PAGE_LIMIT = 100
+
+
+async def paginate(
+    fetch: Callable[[Any], Awaitable[Any]],
+    items: Callable[[Any], List[Any]],
+    next_cursor: Callable[[Any, List[Any]], Any],
+    cursor: Any = None,
+    stop: Optional[Callable[[Any], bool]] = None,
+    max_items: Optional[int] = None,
+    prefetch: bool = True,
+) -> AsyncIterator[Any]:
+    """
+    Yields the items of a paged endpoint one by one. `fetch(cursor)` requests a page, `items(page)` returns its items
+    and `next_cursor(page, items)` the cursor of the next page, or None after the last one.
+
+    While the items of a page are consumed, the next page is already requested (unless `prefetch` is False), so at
+    most two pages are held in memory at a time. Iteration ends before the first item for which `stop(item)` is
+    true, e.g. `stop=lambda trade: trade.timestamp < since`, or after `max_items` items.
+    """
+    pending = asyncio.ensure_future(fetch(cursor))
+    yielded = 0
+    try:
+        while pending is not None:
+            page = await pending
+            pending = None
+            page_items = items(page)
+            previous, cursor = cursor, next_cursor(page, page_items)
+            if cursor is not None and cursor == previous:
+                cursor = None  # the endpoint doesn't advance, don't request the same page forever
+            if cursor is not None and prefetch:
+                pending = asyncio.ensure_future(fetch(cursor))
+
+            for item in page_items:
+                if stop is not None and stop(item):
+                    return
+                yield item
+                yielded += 1
+                if max_items is not None and yielded >= max_items:
+                    return
+            if cursor is not None and not prefetch:
+                pending = asyncio.ensure_future(fetch(cursor))
+    finally:
+        if pending is not None and not pending.cancel() and not pending.cancelled():
+            pending.exception()  # already done, retrieve a failed prefetch so it isn't logged as unhandled
+
+
+def _cursor_paging(items_field: str, cursor_field: str):
+    """Paging by an opaque cursor string returned with every page."""
+
+    def items(page) -> List[Any]:
+        return getattr(page, items_field)
+
+    def next_cursor(page, page_items) -> Optional[str]:
+        return (getattr(page, cursor_field) or None) if page_items else None
+
+    return items, next_cursor
+
+
+def _index_paging(items_field: str, index_field: str, limit: int):
+    """
+    Paging by the index of the last item seen. Whether the endpoint includes the item at `index` or not, it is only
+    yielded once: a page starting with the last item of the previous page has that item dropped.
+    """
+    last_index = None
+    full_page = False
+
+    def items(page) -> List[Any]:
+        nonlocal full_page
+        page_items = getattr(page, items_field)
+        full_page = len(page_items) >= limit
+        if page_items and last_index is not None and getattr(page_items[0], index_field) == last_index:
+            page_items = page_items[1:]
+        return page_items
+
+    def next_cursor(page, page_items) -> Optional[int]:
+        nonlocal last_index
+        if not full_page or not page_items:
+            return None
+        last_index = getattr(page_items[-1], index_field)
+        return last_index
+
+    return items, next_cursor
+
+
+def iter_trades(
+    order_api: OrderApi,
+    sort_by: str = "timestamp",
+    limit: int = PAGE_LIMIT,
+    cursor: Optional[str] = None,
+    stop: Optional[Callable[[Any], bool]] = None,
+    max_items: Optional[int] = None,
+    prefetch: bool = True,
+    **params,
+) -> AsyncIterator[Any]:
+    """Yields the trades of `OrderApi.trades`, `params` (e.g. market_id, account_index, sort_dir) filter them."""
+    items, next_cursor = _cursor_paging("trades", "next_cursor")
+
+    def fetch(cursor):
+        return order_api.trades(sort_by=sort_by, limit=limit, cursor=cursor, **params)
+
+    return paginate(fetch, items, next_cursor, cursor, stop, max_items, prefetch)
+
+
+def iter_inactive_orders(
+    order_api: OrderApi,
+    account_index: int,
+    limit: int = PAGE_LIMIT,
+    cursor: Optional[str] = None,
+    stop: Optional[Callable[[Any], bool]] = None,
+    max_items: Optional[int] = None,
+    prefetch: bool = True,
+    **params,
+) -> AsyncIterator[Any]:
+    """Yields the orders of `OrderApi.account_inactive_orders`."""
+    items, next_cursor = _cursor_paging("orders", "next_cursor")
+
+    def fetch(cursor):
+        return order_api.account_inactive_orders(account_index=account_index, limit=limit, cursor=cursor, **params)
+
+    return paginate(fetch, items, next_cursor, cursor, stop, max_items, prefetch)
+
+
+def iter_account_txs(
+    tx_api: TransactionApi,
+    by: str,
+    value: str,
+    limit: int = PAGE_LIMIT,
+    index: Optional[int] = None,
+    stop: Optional[Callable[[Any], bool]] = None,
+    max_items: Optional[int] = None,
+    prefetch: bool = True,
+    **params,
+) -> AsyncIterator[Any]:
+    """Yields the transactions of `TransactionApi.account_txs`, paged by their sequence index."""
+    items, next_cursor = _index_paging("txs", "sequence_index", limit)
+
+    def fetch(index):
+        return tx_api.account_txs(limit=limit, by=by, value=value, index=index, **params)
+
+    return paginate(fetch, items, next_cursor, index, stop, max_items, prefetch)
+
+
+def iter_txs(
+    tx_api: TransactionApi,
+    limit: int = PAGE_LIMIT,
+    index: Optional[int] = None,
+    stop: Optional[Callable[[Any], bool]] = None,
+    max_items: Optional[int] = None,
+    prefetch: bool = True,
+) -> AsyncIterator[Any]:
+    """Yields the transactions of `TransactionApi.txs`, paged by their sequence index."""
+    items, next_cursor = _index_paging("txs", "sequence_index", limit)
+
+    def fetch(index):
+        return tx_api.txs(limit=limit, index=index)
+
+    return paginate(fetch, items, next_cursor, index, stop, max_items, prefetch)
+
+
+def iter_blocks(
+    block_api: BlockApi,
+    limit: int = PAGE_LIMIT,
+    index: Optional[int] = None,
+    sort: Optional[str] = None,
+    stop: Optional[Callable[[Any], bool]] = None,
+    max_items: Optional[int] = None,
+    prefetch: bool = True,
+) -> AsyncIterator[Any]:
+    """Yields the blocks of `BlockApi.blocks`, paged by their height."""
+    items, next_cursor = _index_paging("blocks", "height", limit)
+
+    def fetch(index):
+        return block_api.blocks(limit=limit, index=index, sort=sort)
+
+    return paginate(fetch, items, next_cursor, index, stop, max_items, prefetch)
+
+
+def iter_deposit_history(
+    tx_api: TransactionApi,
+    account_index: int,
+    l1_address: str,
+    cursor: Optional[str] = None,
+    stop: Optional[Callable[[Any], bool]] = None,
+    max_items: Optional[int] = None,
+    prefetch: bool = True,
+    **params,
+) -> AsyncIterator[Any]:
+    items, next_cursor = _cursor_paging("deposits", "cursor")
+
+    def fetch(cursor):
+        return tx_api.deposit_history(account_index=account_index, l1_address=l1_address, cursor=cursor, **params)
+
+    return paginate(fetch, items, next_cursor, cursor, stop, max_items, prefetch)
+
+
+def iter_withdraw_history(
+    tx_api: TransactionApi,
+    account_index: int,
+    cursor: Optional[str] = None,
+    stop: Optional[Callable[[Any], bool]] = None,
+    max_items: Optional[int] = None,
+    prefetch: bool = True,
+    **params,
+) -> AsyncIterator[Any]:
+    items, next_cursor = _cursor_paging("withdraws", "cursor")
+
+    def fetch(cursor):
+        return tx_api.withdraw_history(account_index=account_index, cursor=cursor, **params)
+
+    return paginate(fetch, items, next_cursor, cursor, stop, max_items, prefetch)
+
+
+def iter_transfer_history(
+    tx_api: TransactionApi,
+    account_index: int,
+    cursor: Optional[str] = None,
+    stop: Optional[Callable[[Any], bool]] = None,
+    max_items: Optional[int] = None,
+    prefetch: bool = True,
+    **params,
+) -> AsyncIterator[Any]:
+    items, next_cursor = _cursor_paging("transfers", "cursor")
+
+    def fetch(cursor):
+        return tx_api.transfer_history(account_index=account_index, cursor=cursor, **params)
+
+    return paginate(fetch, items, next_cursor, cursor, stop, max_items, prefetch)
@@ -0,0 +1,83 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from lighter.rest import RESTResponse
+
+# seconds each slow-changing endpoint is cached for, by path
+DEFAULT_TTLS: Dict[str, float] = {
+    "/api/v1/orderBooks": 60.0,
+    "/api/v1/orderBookDetails": 5.0,
+    "/api/v1/funding-rates": 10.0,
+    "/api/v1/announcement": 60.0,
+    "/api/v1/fastbridge/info": 60.0,
+    "/api/v1/transferFeeInfo": 60.0,
+    "/api/v1/withdrawalDelay": 60.0,
+    "/info": 60.0,
+}
+
+
+class ResponseCache:
+    """
+    Successful GET responses of the endpoints in `ttls` (path -> seconds), kept for their TTL, at most `max_entries`
+    of them (least recently used are evicted first). With `stale_while_revalidate`, an expired response is still
+    served for that many seconds while `ApiClient` refreshes it in the background.
+
+    Cached responses hold their deserialized results, which every caller shares: treat them as read-only.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = 1024,
+        stale_while_revalidate: float = 0.0,
+    ):
+        if max_entries < 1 or stale_while_revalidate < 0:
+            raise ValueError(f"invalid response cache {max_entries=} {stale_while_revalidate=}")
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self.stale_while_revalidate = stale_while_revalidate
+        # request key -> (response, expires at, served stale until)
+        self.entries: "OrderedDict[tuple, Tuple[RESTResponse, float, float]]" = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def ttl_for(self, url: str) -> Optional[float]:
+        return self.ttls.get(urlsplit(url).path)
+
+    def get(self, key: tuple) -> Tuple[Optional[RESTResponse], bool]:
+        """Returns (response, whether it is fresh), or (None, False) if there is none to serve."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            response, expires_at, stale_until = entry
+            now = time.monotonic()
+            if now < expires_at:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return response, True
+            if now < stale_until:
+                self.stale_hits += 1
+                self.entries.move_to_end(key)
+                return response, False
+            del self.entries[key]
+        self.misses += 1
+        return None, False
+
+    def put(self, key: tuple, response: RESTResponse, ttl: float) -> None:
+        if not 200 <= response.status <= 299:
+            return
+        expires_at = time.monotonic() + ttl
+        self.entries[key] = (response, expires_at, expires_at + self.stale_while_revalidate)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drops the cached responses of the endpoint at `path` (any query), or all of them."""
+        if path is None:
+            self.entries.clear()
+            return
+        for key in [key for key in self.entries if urlsplit(key[0]).path == path]:
+            del self.entries[key]
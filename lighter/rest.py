@@ -13,7 +13,6 @@
 
 
 import io
-import json
 import re
 import ssl
 from typing import Optional, Union
@@ -21,6 +20,7 @@ from typing import Optional, Union
 import aiohttp
 import aiohttp_retry
 
+from lighter import codec
 from lighter.exceptions import ApiException, ApiValueError
 
 RESTResponseType = aiohttp.ClientResponse
@@ -34,6 +34,7 @@ class RESTResponse(io.IOBase):
         self.status = resp.status
         self.reason = resp.reason
         self.data = None
+        self.deserialized = None  # results shared by single-flight callers, see ApiClient.call_api
 
     async def read(self):
         if self.data is None:
@@ -165,7 +166,7 @@ class RESTClientObject:
         if method in ['POST', 'PUT', 'PATCH', 'OPTIONS', 'DELETE']:
             if re.search('json', headers['Content-Type'], re.IGNORECASE):
                 if body is not None:
-                    body = json.dumps(body)
+                    body = codec.dumps(body)
                 args["data"] = body
             elif headers['Content-Type'] == 'application/x-www-form-urlencoded':
                 args["data"] = aiohttp.FormData(post_params)
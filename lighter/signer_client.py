@@ -1,25 +1,27 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
 import ctypes
-from functools import wraps
+from functools import partial, wraps
 import inspect
 import json
 import platform
 import logging
 import os
+import threading
 import time
-from typing import Dict, Optional, Tuple
+from typing import Callable, Dict, Optional, Tuple
 
-from eth_account import Account
-from eth_account.messages import encode_defunct
 from pydantic import StrictInt
 import lighter
 from lighter.configuration import Configuration
 from lighter.errors import ValidationError
 from lighter.models import TxHash
+from lighter.market_registry import MarketRegistry
 from lighter import nonce_manager
 from lighter.models.resp_send_tx import RespSendTx
 from lighter.transactions import CreateOrder, CancelOrder, Withdraw
 
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
 
 CODE_OK = 200
 
@@ -32,7 +34,59 @@ class StrOrErr(ctypes.Structure):
     _fields_ = [("str", ctypes.c_char_p), ("err", ctypes.c_char_p)]
 
 
-def _initialize_signer():
+# argtypes / restype of every function exported by the signer library, bound once when the library is loaded
+_SIGNER_FUNCTIONS = {
+    "GenerateAPIKey": ([ctypes.c_char_p], ApiKeyResponse),
+    "CreateClient": ([ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int, ctypes.c_int, ctypes.c_longlong], ctypes.c_char_p),
+    "CheckClient": ([ctypes.c_int, ctypes.c_longlong], ctypes.c_char_p),
+    "SwitchAPIKey": ([ctypes.c_int], ctypes.c_char_p),
+    "SignChangePubKey": ([ctypes.c_char_p, ctypes.c_longlong], StrOrErr),
+    "SignCreateOrder": (
+        [
+            ctypes.c_int,
+            ctypes.c_longlong,
+            ctypes.c_longlong,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_longlong,
+            ctypes.c_longlong,
+        ],
+        StrOrErr,
+    ),
+    "SignCancelOrder": ([ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong], StrOrErr),
+    "SignWithdraw": ([ctypes.c_longlong, ctypes.c_longlong], StrOrErr),
+    "SignCreateSubAccount": ([ctypes.c_longlong], StrOrErr),
+    "SignCancelAllOrders": ([ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong], StrOrErr),
+    "SignModifyOrder": (
+        [ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong, ctypes.c_longlong, ctypes.c_longlong, ctypes.c_longlong],
+        StrOrErr,
+    ),
+    "SignTransfer": (
+        [ctypes.c_longlong, ctypes.c_longlong, ctypes.c_longlong, ctypes.c_char_p, ctypes.c_longlong],
+        StrOrErr,
+    ),
+    "SignCreatePublicPool": ([ctypes.c_longlong, ctypes.c_longlong, ctypes.c_longlong, ctypes.c_longlong], StrOrErr),
+    "SignUpdatePublicPool": (
+        [ctypes.c_longlong, ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong, ctypes.c_longlong],
+        StrOrErr,
+    ),
+    "SignMintShares": ([ctypes.c_longlong, ctypes.c_longlong, ctypes.c_longlong], StrOrErr),
+    "SignBurnShares": ([ctypes.c_longlong, ctypes.c_longlong, ctypes.c_longlong], StrOrErr),
+    "SignUpdateLeverage": ([ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_longlong], StrOrErr),
+    "CreateAuthToken": ([ctypes.c_longlong], StrOrErr),
+}
+
+_signer = None
+# SwitchAPIKey selects the key used by the following signing calls for the whole library,
+# so switching and signing must happen atomically across all threads of the process
+_signer_lock = threading.RLock()
+
+
+def _load_signer_library():
     is_linux = platform.system() == "Linux"
     is_mac = platform.system() == "Darwin"
     is_x64 = platform.machine().lower() in ("amd64", "x86_64")
@@ -42,10 +96,10 @@ def _initialize_signer():
     path_to_signer_folders = os.path.join(current_file_directory, "signers")
 
     if is_arm and is_mac:
-        logging.debug("Detected ARM architecture on macOS.")
+        logger.debug("Detected ARM architecture on macOS.")
         return ctypes.CDLL(os.path.join(path_to_signer_folders, "signer-arm64.dylib"))
     elif is_linux and is_x64:
-        logging.debug("Detected x64/amd architecture on Linux.")
+        logger.debug("Detected x64/amd architecture on Linux.")
         return ctypes.CDLL(os.path.join(path_to_signer_folders, "signer-amd64.so"))
     else:
         raise Exception(
@@ -53,12 +107,21 @@ def _initialize_signer():
         )
 
 
+def _initialize_signer():
+    """Returns the signer library, loading it and binding the signatures of its functions once per process."""
+    global _signer
+    if _signer is None:
+        signer = _load_signer_library()
+        for name, (argtypes, restype) in _SIGNER_FUNCTIONS.items():
+            function = getattr(signer, name)
+            function.argtypes = argtypes
+            function.restype = restype
+        _signer = signer
+    return _signer
+
+
 def create_api_key(seed=""):
     signer = _initialize_signer()
-    signer.GenerateAPIKey.argtypes = [
-        ctypes.c_char_p,
-    ]
-    signer.GenerateAPIKey.restype = ApiKeyResponse
     result = signer.GenerateAPIKey(ctypes.c_char_p(seed.encode("utf-8")))
 
     private_key_str = result.privateKey.decode("utf-8") if result.privateKey else None
@@ -73,38 +136,83 @@ def trim_exc(exception_body: str):
 
 
 def process_api_key_and_nonce(func):
+    # the binding plan is computed once per wrapped method rather than binding the signature on every call
+    sig = inspect.signature(func)
+    parameters = list(sig.parameters.values())[1:]  # without self
+    names = [parameter.name for parameter in parameters]
+    known_names = frozenset(names)
+    required = [(position, parameter.name) for position, parameter in enumerate(parameters) if parameter.default is parameter.empty]
+    nonce_position, nonce_default = names.index("nonce"), sig.parameters["nonce"].default
+    api_key_index_position, api_key_index_default = names.index("api_key_index"), sig.parameters["api_key_index"].default
+
     @wraps(func)
     async def wrapper(self, *args, **kwargs):
-        # Get the signature
-        sig = inspect.signature(func)
-
-        # Bind args and kwargs to the function's signature
-        bound_args = sig.bind(self, *args, **kwargs)
-        bound_args.apply_defaults()
-        # Extract api_key_index and nonce from kwargs or use defaults
-        api_key_index = bound_args.arguments.get("api_key_index", -1)
-        nonce = bound_args.arguments.get("nonce", -1)
-        if api_key_index == -1 and nonce == -1:
-            api_key_index, nonce = self.nonce_manager.next_nonce()
-        err = self.switch_api_key(api_key_index)
-        if err != None:
-            raise Exception(f"error switching api key: {err}")
-
-        # Call the original function with modified kwargs
+        if (
+            len(args) > len(names)
+            or not known_names.issuperset(kwargs)
+            or not kwargs.keys().isdisjoint(names[: len(args)])
+            or any(position >= len(args) and name not in kwargs for position, name in required)
+        ):
+            sig.bind(self, *args, **kwargs)  # raises the TypeError of the invalid call
+
+        nonce = args[nonce_position] if nonce_position < len(args) else kwargs.get("nonce", nonce_default)
+        if api_key_index_position < len(args):
+            api_key_index = args[api_key_index_position]
+        else:
+            api_key_index = kwargs.get("api_key_index", api_key_index_default)
+
+        # explicit nonces are never acknowledged to the nonce manager, which only tracks the nonces it handed out
+        allocated = api_key_index == -1 and nonce == -1
+        if api_key_index == -1:
+            if allocated:
+                api_key_index, nonce = await self.next_nonce_async()
+                if self.tx_trace is not None:
+                    self._trace("nonce_allocated", api_key_index=api_key_index, nonce=nonce)
+            elif self.api_key_index == self.end_api_key_index:
+                # an explicit nonce is signed with the client's api key, like in get_api_key_nonce
+                api_key_index = self.api_key_index
+            else:
+                raise Exception("ambiguous api key")
+            if nonce_position < len(args) or api_key_index_position < len(args):
+                args = list(args)
+            for position, name, value in ((nonce_position, "nonce", nonce), (api_key_index_position, "api_key_index", api_key_index)):
+                if position < len(args):
+                    args[position] = value
+                else:
+                    kwargs[name] = value
+
         ret: TxHash
         try:
-            partial_arguments = {k: v for k, v in bound_args.arguments.items() if k not in ("self", "nonce", "api_key_index")}
-            created_tx, ret, err = await func(self, **partial_arguments, nonce=nonce, api_key_index=api_key_index)
-            if ret.code != CODE_OK:
-                self.nonce_manager.acknowledge_failure(api_key_index)
+            created_tx, ret, err = await func(self, *args, **kwargs)
         except lighter.exceptions.BadRequestException as e:
-            if "invalid nonce" in str(e):
-                self.nonce_manager.hard_refresh_nonce(api_key_index)
-                return None, None, trim_exc(str(e))
+            if allocated:
+                self.nonce_manager.acknowledge_failure(api_key_index, nonce)
+            if "invalid nonce" in str(e) and self._manages_api_key(api_key_index):
+                await self.hard_refresh_nonce_async(api_key_index)
+                if self.tx_trace is not None:
+                    self._trace("nonce_refreshed", api_key_index=api_key_index, nonce=nonce)
+            return None, None, trim_exc(str(e))
+        except lighter.exceptions.ApiException as e:
+            if allocated:
+                if e.status is not None and 400 <= e.status < 500:
+                    # rejected (e.g. rate limited) without consuming the nonce
+                    self.nonce_manager.acknowledge_failure(api_key_index, nonce)
+                else:
+                    # a 5xx may come after the tx was accepted, so its nonce is kept as used
+                    self.nonce_manager.acknowledge_success(api_key_index, nonce)
+            raise
+        except BaseException:
+            # the tx may have reached the server, if it didn't the resulting invalid nonce re-syncs the nonce manager
+            if allocated:
+                self.nonce_manager.acknowledge_success(api_key_index, nonce)
+            raise
+
+        if allocated:
+            # ret is None when signing failed
+            if ret is None or ret.code != CODE_OK:
+                self.nonce_manager.acknowledge_failure(api_key_index, nonce)
             else:
-                self.nonce_manager.acknowledge_failure(api_key_index)
-                return None, None, trim_exc(str(e))
-
+                self.nonce_manager.acknowledge_success(api_key_index, nonce, getattr(ret, "predicted_execution_time_ms", None))
         return created_tx, ret, err
 
     return wrapper
@@ -161,10 +269,32 @@ class SignerClient:
         max_api_key_index=-1,
         private_keys: Optional[Dict[int, str]] = None,
         nonce_management_type=nonce_manager.NonceManagerType.OPTIMISTIC,
+        signing_executor: Optional[Executor] = None,
+        signing_processes: int = 0,
+        api_key_scheduler: Optional[nonce_manager.ApiKeyScheduler] = None,
+        nonce_journal: Optional[nonce_manager.NonceJournal] = None,
+        tx_batch_window: Optional[float] = None,
+        tx_batch_max_size: int = 50,
+        send_tx_over_ws: bool = False,
+        tx_trace: Optional[Callable[..., None]] = None,
     ):
         """
         First private key needs to be passed separately for backwards compatibility.
         This may get deprecated in a future version.
+
+        Signing is done in `signing_executor`, so it doesn't block the event loop. By default a single
+        dedicated thread is used, as the signer library serializes signatures anyway.
+        With `signing_processes` > 0, the API keys are split across that many worker processes (see `SigningPool`),
+        so transactions for different API keys are signed in parallel.
+        `api_key_scheduler` paces the API keys picked by the nonce manager, instead of using them round-robin.
+        With a `nonce_journal`, the optimistic nonce managers resume from the nonces saved by a previous run.
+        With `tx_batch_window` (in seconds), transactions sent concurrently are coalesced into `send_tx_batch`
+        requests of up to `tx_batch_max_size` transactions (see `TxBatcher`).
+        With `send_tx_over_ws`, transactions are sent over a persistent websocket (see `WsTxClient`), falling back
+        to REST when the websocket is unavailable. A transaction written to the websocket is never sent again: if
+        its response doesn't come, `TxOutcomeUnknownError` is raised and its nonce is kept as used.
+        `tx_trace(event, **fields)` is called on the tx lifecycle events: "nonce_allocated", "tx_signed", "tx_sent",
+        "tx_response", "tx_error" and "nonce_refreshed". Nothing is formatted or traced without it.
         """
         chain_id = 304 if "mainnet" in url else 300
 
@@ -185,18 +315,43 @@ class SignerClient:
         self.api_key_dict = self.build_api_key_dict(private_key, private_keys)
         self.account_index = account_index
         self.signer = _initialize_signer()
+        self.tx_trace = tx_trace
+        self.order_book_cache = None
+        self.order_book_max_age = None
+        self._owns_signing_executor = signing_executor is None
+        self.signing_executor = signing_executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="lighter-signer")
         self.api_client = lighter.ApiClient(configuration=Configuration(host=url))
         self.tx_api = lighter.TransactionApi(self.api_client)
         self.order_api = lighter.OrderApi(self.api_client)
+        self.market_registry = MarketRegistry(self.order_api)
+        self.tx_batcher = None
+        if tx_batch_window is not None:
+            from lighter.tx_batcher import TxBatcher
+
+            self.tx_batcher = TxBatcher(self.tx_api, window=tx_batch_window, max_batch_size=tx_batch_max_size)
+        self.ws_tx_client = None
+        if send_tx_over_ws:
+            from lighter.ws_tx_client import WsTxClient
+
+            self.ws_tx_client = WsTxClient(url)
         self.nonce_manager = nonce_manager.nonce_manager_factory(
             nonce_manager_type=nonce_management_type,
             account_index=account_index,
             api_client=self.api_client,
             start_api_key=self.api_key_index,
             end_api_key=self.end_api_key_index,
+            api_key_scheduler=api_key_scheduler,
+            nonce_journal=nonce_journal,
         )
         for api_key in range(self.api_key_index, self.end_api_key_index + 1):
             self.create_client(api_key)
+        self.signing_pool = None
+        if signing_processes > 0:
+            from lighter.signing_pool import SigningPool
+
+            self.signing_pool = SigningPool(
+                url, self.api_key_dict, account_index, workers=signing_processes, chain_id=chain_id
+            )
 
     def validate_api_private_keys(self, initial_private_key: str, private_keys: Dict[int, str]):
         if len(private_keys) == self.end_api_key_index - self.api_key_index + 1:
@@ -215,15 +370,7 @@ class SignerClient:
         return private_keys
 
     def create_client(self, api_key_index=None):
-        self.signer.CreateClient.argtypes = [
-            ctypes.c_char_p,
-            ctypes.c_char_p,
-            ctypes.c_int,
-            ctypes.c_int,
-            ctypes.c_longlong,
-        ]
         api_key_index = api_key_index or self.api_key_index
-        self.signer.CreateClient.restype = ctypes.c_char_p
         err = self.signer.CreateClient(
             self.url.encode("utf-8"),
             self.api_key_dict[api_key_index].encode("utf-8"),
@@ -240,12 +387,6 @@ class SignerClient:
 
     # check_client verifies that the given API key associated with (api_key_index, account_index) matches the one on Lighter
     def check_client(self):
-        self.signer.CheckClient.argtypes = [
-            ctypes.c_int,
-            ctypes.c_longlong,
-        ]
-        self.signer.CheckClient.restype = ctypes.c_char_p
-
         for api_key in range(self.api_key_index, self.end_api_key_index + 1):
             result = self.signer.CheckClient(api_key, self.account_index)
             if result:
@@ -253,30 +394,52 @@ class SignerClient:
         return result.decode("utf-8") if result else None
 
     def switch_api_key(self, api_key: int):
-        self.signer.SwitchAPIKey.argtypes = [ctypes.c_int]
-        self.signer.CheckClient.restype = ctypes.c_char_p
         result = self.signer.SwitchAPIKey(api_key)
         return result.decode("utf-8") if result else None
 
+    def sign_with_api_key(self, api_key_index: int, sign, *args):
+        """Calls `sign(*args)` with `api_key_index` selected in the signer library, -1 keeps the current key."""
+        with _signer_lock:
+            if api_key_index != -1:
+                err = self.switch_api_key(api_key_index)
+                if err is not None:
+                    raise Exception(f"error switching api key: {err}")
+            return sign(*args)
+
+    async def _sign_async(self, api_key_index: int, sign, *args):
+        if self.tx_trace is None:
+            return await self._sign_in_executor(api_key_index, sign, *args)
+        start = time.perf_counter()
+        tx_info, error = await self._sign_in_executor(api_key_index, sign, *args)
+        self._trace(
+            "tx_signed", sign=sign.__name__, api_key_index=api_key_index, error=error, latency=time.perf_counter() - start
+        )
+        return tx_info, error
+
+    async def _sign_in_executor(self, api_key_index: int, sign, *args):
+        if self.signing_pool is not None and api_key_index in self.signing_pool:
+            return await self.signing_pool.sign(api_key_index, sign.__name__, *args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.signing_executor, partial(self.sign_with_api_key, api_key_index, sign, *args)
+        )
+
+    def _trace(self, event: str, **fields) -> None:
+        try:
+            self.tx_trace(event, **fields)
+        except Exception:
+            logger.exception("tx_trace failed on %s", event)
+
     def create_api_key(self, seed=""):
-        self.signer.GenerateAPIKey.argtypes = [
-            ctypes.c_char_p,
-        ]
-        self.signer.GenerateAPIKey.restype = ApiKeyResponse
         result = self.signer.GenerateAPIKey(ctypes.c_char_p(seed.encode("utf-8")))
 
-        private_key_str = result.str.decode("utf-8") if result.privateKey else None
-        public_key_str = result.str.decode("utf-8") if result.publicKey else None
+        private_key_str = result.privateKey.decode("utf-8") if result.privateKey else None
+        public_key_str = result.publicKey.decode("utf-8") if result.publicKey else None
         error = result.err.decode("utf-8") if result.err else None
 
         return private_key_str, public_key_str, error
 
     def sign_change_api_key(self, eth_private_key, new_pubkey: str, nonce: int):
-        self.signer.SignChangePubKey.argtypes = [
-            ctypes.c_char_p,
-            ctypes.c_longlong,
-        ]
-        self.signer.SignChangePubKey.restype = StrOrErr
         result = self.signer.SignChangePubKey(ctypes.c_char_p(new_pubkey.encode("utf-8")), nonce)
 
         tx_info_str = result.str.decode("utf-8") if result.str else None
@@ -289,16 +452,62 @@ class SignerClient:
         msg_to_sign = tx_info["MessageToSign"]
         del tx_info["MessageToSign"]
 
-        # sign the message
+        # sign the message, eth_account is imported here as it noticeably slows down importing the SDK
+        from eth_account import Account
+        from eth_account.messages import encode_defunct
+
         acct = Account.from_key(eth_private_key)
         message = encode_defunct(text=msg_to_sign)
         signature = acct.sign_message(message)
         tx_info["L1Sig"] = signature.signature.to_0x_hex()
         return json.dumps(tx_info), None
 
+    def attach_order_book_cache(self, order_book_cache, max_age: Optional[float] = 2.0):
+        """
+        Makes the slippage aware market order helpers read the order book from `order_book_cache` (e.g. a running
+        WsClient subscribed to the market) instead of the REST API. Books not updated for more than `max_age`
+        seconds are considered stale, and are fetched from the REST API as before.
+        """
+        self.order_book_cache = order_book_cache
+        self.order_book_max_age = max_age
+
+    def _cached_order_book(self, market_index):
+        if self.order_book_cache is None:
+            return None
+        return self.order_book_cache.get_order_book(market_index, max_age=self.order_book_max_age)
+
+    async def next_nonce_async(self) -> Tuple[int, int]:
+        if isinstance(self.nonce_manager, nonce_manager.AsyncNonceManager):
+            return await self.nonce_manager.next_nonce()
+        scheduler = self.nonce_manager.api_key_scheduler
+        if scheduler is None:
+            return self.nonce_manager.next_nonce()
+        # the scheduled API key is waited for on the event loop, the sync nonce manager only allocates its nonce
+        api_key_index = await scheduler.acquire()
+        try:
+            if isinstance(self.nonce_manager, nonce_manager.ApiNonceManager):
+                # fetches the nonce with a blocking request, which is done in a thread not to block the event loop
+                return await asyncio.get_running_loop().run_in_executor(None, self.nonce_manager.next_nonce, api_key_index)
+            return self.nonce_manager.next_nonce(api_key_index)
+        except BaseException:
+            scheduler.release(api_key_index)
+            raise
+
+    def _manages_api_key(self, api_key_index: int) -> bool:
+        return self.nonce_manager.start_api_key <= api_key_index <= self.nonce_manager.end_api_key
+
+    async def hard_refresh_nonce_async(self, api_key_index: int) -> None:
+        if isinstance(self.nonce_manager, nonce_manager.AsyncNonceManager):
+            await self.nonce_manager.hard_refresh_nonce(api_key_index)
+        else:
+            # the sync nonce managers use a blocking request, which is done in a thread not to block the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self.nonce_manager.hard_refresh_nonce, api_key_index)
+
     def get_api_key_nonce(self, api_key_index: int, nonce: int) -> Tuple[int, int]:
         if api_key_index != -1 and nonce != -1:
             return api_key_index, nonce
+        if isinstance(self.nonce_manager, nonce_manager.AsyncNonceManager):
+            raise ValidationError("the async nonce managers hand out nonces with get_api_key_nonce_async")
         if nonce != -1:
             if self.api_key_index == self.end_api_key_index:
                 return self.nonce_manager.next_nonce()
@@ -306,6 +515,14 @@ class SignerClient:
                 raise Exception("ambiguous api key")
         return self.nonce_manager.next_nonce()
 
+    async def get_api_key_nonce_async(self, api_key_index: int, nonce: int) -> Tuple[int, int]:
+        """Same as `get_api_key_nonce`, for every nonce manager type, without blocking the event loop."""
+        if api_key_index != -1 and nonce != -1:
+            return api_key_index, nonce
+        if nonce != -1 and self.api_key_index != self.end_api_key_index:
+            raise Exception("ambiguous api key")
+        return await self.next_nonce_async()
+
     def sign_create_order(
         self,
         market_index,
@@ -320,21 +537,6 @@ class SignerClient:
         order_expiry=DEFAULT_28_DAY_ORDER_EXPIRY,
         nonce=-1,
     ):
-        self.signer.SignCreateOrder.argtypes = [
-            ctypes.c_int,
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-            ctypes.c_int,
-            ctypes.c_int,
-            ctypes.c_int,
-            ctypes.c_int,
-            ctypes.c_int,
-            ctypes.c_int,
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-        ]
-        self.signer.SignCreateOrder.restype = StrOrErr
-
         result = self.signer.SignCreateOrder(
             market_index,
             client_order_index,
@@ -355,13 +557,6 @@ class SignerClient:
         return tx_info, error
 
     def sign_cancel_order(self, market_index, order_index, nonce=-1):
-        self.signer.SignCancelOrder.argtypes = [
-            ctypes.c_int,
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-        ]
-        self.signer.SignCancelOrder.restype = StrOrErr
-
         result = self.signer.SignCancelOrder(market_index, order_index, nonce)
 
         tx_info = result.str.decode("utf-8") if result.str else None
@@ -370,9 +565,6 @@ class SignerClient:
         return tx_info, error
 
     def sign_withdraw(self, usdc_amount, nonce=-1):
-        self.signer.SignWithdraw.argtypes = [ctypes.c_longlong, ctypes.c_longlong]
-        self.signer.SignWithdraw.restype = StrOrErr
-
         result = self.signer.SignWithdraw(usdc_amount, nonce)
 
         tx_info = result.str.decode("utf-8") if result.str else None
@@ -381,9 +573,6 @@ class SignerClient:
         return tx_info, error
 
     def sign_create_sub_account(self, nonce=-1):
-        self.signer.SignCreateSubAccount.argtypes = [ctypes.c_longlong]
-        self.signer.SignCreateSubAccount.restype = StrOrErr
-
         result = self.signer.SignCreateSubAccount(nonce)
 
         tx_info = result.str.decode("utf-8") if result.str else None
@@ -392,13 +581,6 @@ class SignerClient:
         return tx_info, error
 
     def sign_cancel_all_orders(self, time_in_force, time, nonce=-1):
-        self.signer.SignCancelAllOrders.argtypes = [
-            ctypes.c_int,
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-        ]
-        self.signer.SignCancelAllOrders.restype = StrOrErr
-
         result = self.signer.SignCancelAllOrders(time_in_force, time, nonce)
 
         tx_info = result.str.decode("utf-8") if result.str else None
@@ -407,16 +589,6 @@ class SignerClient:
         return tx_info, error
 
     def sign_modify_order(self, market_index, order_index, base_amount, price, trigger_price, nonce=-1):
-        self.signer.SignModifyOrder.argtypes = [
-            ctypes.c_int,
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-        ]
-        self.signer.SignModifyOrder.restype = StrOrErr
-
         result = self.signer.SignModifyOrder(market_index, order_index, base_amount, price, trigger_price, nonce)
 
         tx_info = result.str.decode("utf-8") if result.str else None
@@ -425,14 +597,6 @@ class SignerClient:
         return tx_info, error
 
     def sign_transfer(self, eth_private_key, to_account_index, usdc_amount, fee, memo, nonce=-1):
-        self.signer.SignTransfer.argtypes = [
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-            ctypes.c_char_p,
-            ctypes.c_longlong,
-        ]
-        self.signer.SignTransfer.restype = StrOrErr
         result = self.signer.SignTransfer(to_account_index, usdc_amount, fee, ctypes.c_char_p(memo.encode("utf-8")), nonce)
 
         tx_info_str = result.str.decode("utf-8") if result.str else None
@@ -446,7 +610,10 @@ class SignerClient:
         msg_to_sign = tx_info["MessageToSign"]
         del tx_info["MessageToSign"]
 
-        # sign the message
+        # sign the message, eth_account is imported here as it noticeably slows down importing the SDK
+        from eth_account import Account
+        from eth_account.messages import encode_defunct
+
         acct = Account.from_key(eth_private_key)
         message = encode_defunct(text=msg_to_sign)
         signature = acct.sign_message(message)
@@ -454,14 +621,6 @@ class SignerClient:
         return json.dumps(tx_info), None
 
     def sign_create_public_pool(self, operator_fee, initial_total_shares, min_operator_share_rate, nonce=-1):
-        self.signer.SignCreatePublicPool.argtypes = [
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-        ]
-        self.signer.SignCreatePublicPool.restype = StrOrErr
-
         result = self.signer.SignCreatePublicPool(operator_fee, initial_total_shares, min_operator_share_rate, nonce)
 
         tx_info = result.str.decode("utf-8") if result.str else None
@@ -470,15 +629,6 @@ class SignerClient:
         return tx_info, error
 
     def sign_update_public_pool(self, public_pool_index, status, operator_fee, min_operator_share_rate, nonce=-1):
-        self.signer.SignUpdatePublicPool.argtypes = [
-            ctypes.c_longlong,
-            ctypes.c_int,
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-        ]
-        self.signer.SignUpdatePublicPool.restype = StrOrErr
-
         result = self.signer.SignUpdatePublicPool(
             public_pool_index, status, operator_fee, min_operator_share_rate, nonce
         )
@@ -489,13 +639,6 @@ class SignerClient:
         return tx_info, error
 
     def sign_mint_shares(self, public_pool_index, share_amount, nonce=-1):
-        self.signer.SignMintShares.argtypes = [
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-        ]
-        self.signer.SignMintShares.restype = StrOrErr
-
         result = self.signer.SignMintShares(public_pool_index, share_amount, nonce)
 
         tx_info = result.str.decode("utf-8") if result.str else None
@@ -504,13 +647,6 @@ class SignerClient:
         return tx_info, error
 
     def sign_burn_shares(self, public_pool_index, share_amount, nonce=-1):
-        self.signer.SignBurnShares.argtypes = [
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-            ctypes.c_longlong,
-        ]
-        self.signer.SignBurnShares.restype = StrOrErr
-
         result = self.signer.SignBurnShares(public_pool_index, share_amount, nonce)
 
         tx_info = result.str.decode("utf-8") if result.str else None
@@ -519,13 +655,6 @@ class SignerClient:
         return tx_info, error
 
     def sign_update_leverage(self, market_index, fraction, margin_mode, nonce=-1):
-        self.signer.SignUpdateLeverage.argtypes = [
-            ctypes.c_int,
-            ctypes.c_int,
-            ctypes.c_int,
-            ctypes.c_longlong,
-        ]
-        self.signer.SignUpdateLeverage.restype = StrOrErr
         result = self.signer.SignUpdateLeverage(market_index, fraction, margin_mode, nonce)
 
         tx_info = result.str.decode("utf-8") if result.str else None
@@ -535,23 +664,107 @@ class SignerClient:
     def create_auth_token_with_expiry(self, deadline: int = DEFAULT_10_MIN_AUTH_EXPIRY):
         if deadline == SignerClient.DEFAULT_10_MIN_AUTH_EXPIRY:
             deadline = int(time.time() + 10 * SignerClient.MINUTE)
-        self.signer.CreateAuthToken.argtypes = [ctypes.c_longlong]
-        self.signer.CreateAuthToken.restype = StrOrErr
         result = self.signer.CreateAuthToken(deadline)
 
         auth = result.str.decode("utf-8") if result.str else None
         error = result.err.decode("utf-8") if result.err else None
         return auth, error
 
+    async def sign_change_api_key_async(self, eth_private_key, new_pubkey: str, nonce: int, api_key_index=-1):
+        return await self._sign_async(api_key_index, self.sign_change_api_key, eth_private_key, new_pubkey, nonce)
+
+    async def sign_create_order_async(
+        self,
+        market_index,
+        client_order_index,
+        base_amount,
+        price,
+        is_ask,
+        order_type,
+        time_in_force,
+        reduce_only,
+        trigger_price,
+        order_expiry=DEFAULT_28_DAY_ORDER_EXPIRY,
+        nonce=-1,
+        api_key_index=-1,
+    ):
+        return await self._sign_async(
+            api_key_index,
+            self.sign_create_order,
+            market_index,
+            client_order_index,
+            base_amount,
+            price,
+            is_ask,
+            order_type,
+            time_in_force,
+            reduce_only,
+            trigger_price,
+            order_expiry,
+            nonce,
+        )
+
+    async def sign_cancel_order_async(self, market_index, order_index, nonce=-1, api_key_index=-1):
+        return await self._sign_async(api_key_index, self.sign_cancel_order, market_index, order_index, nonce)
+
+    async def sign_withdraw_async(self, usdc_amount, nonce=-1, api_key_index=-1):
+        return await self._sign_async(api_key_index, self.sign_withdraw, usdc_amount, nonce)
+
+    async def sign_create_sub_account_async(self, nonce=-1, api_key_index=-1):
+        return await self._sign_async(api_key_index, self.sign_create_sub_account, nonce)
+
+    async def sign_cancel_all_orders_async(self, time_in_force, time, nonce=-1, api_key_index=-1):
+        return await self._sign_async(api_key_index, self.sign_cancel_all_orders, time_in_force, time, nonce)
+
+    async def sign_modify_order_async(
+        self, market_index, order_index, base_amount, price, trigger_price, nonce=-1, api_key_index=-1
+    ):
+        return await self._sign_async(
+            api_key_index, self.sign_modify_order, market_index, order_index, base_amount, price, trigger_price, nonce
+        )
+
+    async def sign_transfer_async(
+        self, eth_private_key, to_account_index, usdc_amount, fee, memo, nonce=-1, api_key_index=-1
+    ):
+        return await self._sign_async(
+            api_key_index, self.sign_transfer, eth_private_key, to_account_index, usdc_amount, fee, memo, nonce
+        )
+
+    async def sign_create_public_pool_async(
+        self, operator_fee, initial_total_shares, min_operator_share_rate, nonce=-1, api_key_index=-1
+    ):
+        return await self._sign_async(
+            api_key_index, self.sign_create_public_pool, operator_fee, initial_total_shares, min_operator_share_rate, nonce
+        )
+
+    async def sign_update_public_pool_async(
+        self, public_pool_index, status, operator_fee, min_operator_share_rate, nonce=-1, api_key_index=-1
+    ):
+        return await self._sign_async(
+            api_key_index, self.sign_update_public_pool, public_pool_index, status, operator_fee, min_operator_share_rate, nonce
+        )
+
+    async def sign_mint_shares_async(self, public_pool_index, share_amount, nonce=-1, api_key_index=-1):
+        return await self._sign_async(api_key_index, self.sign_mint_shares, public_pool_index, share_amount, nonce)
+
+    async def sign_burn_shares_async(self, public_pool_index, share_amount, nonce=-1, api_key_index=-1):
+        return await self._sign_async(api_key_index, self.sign_burn_shares, public_pool_index, share_amount, nonce)
+
+    async def sign_update_leverage_async(self, market_index, fraction, margin_mode, nonce=-1, api_key_index=-1):
+        return await self._sign_async(api_key_index, self.sign_update_leverage, market_index, fraction, margin_mode, nonce)
+
+    async def create_auth_token_with_expiry_async(self, deadline: int = DEFAULT_10_MIN_AUTH_EXPIRY, api_key_index=-1):
+        return await self._sign_async(api_key_index, self.create_auth_token_with_expiry, deadline)
+
     async def change_api_key(self, eth_private_key: str, new_pubkey: str, nonce=-1):
-        tx_info, error = self.sign_change_api_key(eth_private_key, new_pubkey, nonce)
+        tx_info, error = await self._sign_async(-1, self.sign_change_api_key, eth_private_key, new_pubkey, nonce)
         if error is not None:
             return None, error
 
-        logging.debug(f"Change Pub Key Tx Info: {tx_info}")
+        logger.debug("Change Pub Key Tx Info: %s", tx_info)
 
         api_response = await self.send_tx(tx_type=self.TX_TYPE_CHANGE_PUB_KEY, tx_info=tx_info)
-        logging.debug(f"Change Pub Key Send Tx Response: {api_response}")
+        logger.debug("Change Pub Key Send Tx Response: %s", api_response)
         return api_response, None
 
     @process_api_key_and_nonce
@@ -570,7 +783,9 @@ class SignerClient:
         nonce=-1,
         api_key_index=-1,
     ) -> (CreateOrder, TxHash, str):
-        tx_info, error = self.sign_create_order(
+        tx_info, error = await self._sign_async(
+            api_key_index,
+            self.sign_create_order,
             market_index,
             client_order_index,
             base_amount,
@@ -585,10 +800,10 @@ class SignerClient:
         )
         if error is not None:
             return None, None, error
-        logging.debug(f"Create Order Tx Info: {tx_info}")
+        logger.debug("Create Order Tx Info: %s", tx_info)
 
         api_response = await self.send_tx(tx_type=self.TX_TYPE_CREATE_ORDER, tx_info=tx_info)
-        logging.debug(f"Create Order Send Tx Response: {api_response}")
+        logger.debug("Create Order Send Tx Response: %s", api_response)
         return CreateOrder.from_json(tx_info), api_response, None
 
     async def create_market_order(
@@ -630,9 +845,16 @@ class SignerClient:
         ideal_price=None
     ) -> (CreateOrder, TxHash, str):
         if ideal_price is None:
-            order_book_orders = await self.order_api.order_book_orders(market_index, 1)
-            logging.debug("Create market order limited slippage is doing an API call to get the current ideal price. You can also provide it yourself to avoid this.")
-            ideal_price = int((order_book_orders.bids[0].price if is_ask else order_book_orders.asks[0].price).replace(".", ""))
+            order_book = self._cached_order_book(market_index)
+            best = None
+            if order_book is not None:
+                best = order_book.best_bid() if is_ask else order_book.best_ask()
+            if best is None:
+                order_book_orders = await self.order_api.order_book_orders(market_index, 1)
+                logger.debug("Create market order limited slippage is doing an API call to get the current ideal price. You can also provide it yourself or attach an order book cache to avoid this.")
+                best = (order_book_orders.bids[0].price if is_ask else order_book_orders.asks[0].price,)
+            market = await self.market_registry.get_market(market_index)
+            ideal_price = market.price_to_units(best[0])
 
         acceptable_execution_price = round(ideal_price * (1 + max_slippage * (-1 if is_ask else 1)))
         return await self.create_order(
@@ -662,16 +884,27 @@ class SignerClient:
         api_key_index=-1,
         ideal_price=None
     ) -> (CreateOrder, TxHash, str):
-        order_book_orders = await self.order_api.order_book_orders(market_index, 100)
+        # (price, size) of the levels the order would match against
+        levels = None
+        order_book = self._cached_order_book(market_index)
+        if order_book is not None:
+            levels = order_book.top_bids(100) if is_ask else order_book.top_asks(100)
+        if not levels:
+            order_book_orders = await self.order_api.order_book_orders(market_index, 100)
+            levels = [
+                (order.price, order.remaining_base_amount)
+                for order in (order_book_orders.bids if is_ask else order_book_orders.asks)
+            ]
+        market = await self.market_registry.get_market(market_index)
         if ideal_price is None:
-            ideal_price = int((order_book_orders.bids[0].price if is_ask else order_book_orders.asks[0].price).replace(".", ""))
+            ideal_price = market.price_to_units(levels[0][0])
 
         matched_usd_amount, matched_size = 0, 0
-        for order_book_order in (order_book_orders.bids if is_ask else order_book_orders.asks):
+        for price, size in levels:
             if matched_size == base_amount:
                 break
-            curr_order_price = int(order_book_order.price.replace(".", ""))
-            curr_order_size = int(order_book_order.remaining_base_amount.replace(".", ""))
+            curr_order_price = market.price_to_units(price)
+            curr_order_size = market.size_to_units(size)
             to_be_used_order_size = min(base_amount - matched_size, curr_order_size)
             matched_usd_amount += curr_order_price * to_be_used_order_size
             matched_size += to_be_used_order_size
@@ -700,13 +933,13 @@ class SignerClient:
 
     @process_api_key_and_nonce
     async def cancel_order(self, market_index, order_index, nonce=-1, api_key_index=-1) -> (CancelOrder, TxHash, str):
-        tx_info, error = self.sign_cancel_order(market_index, order_index, nonce)
+        tx_info, error = await self._sign_async(api_key_index, self.sign_cancel_order, market_index, order_index, nonce)
         if error is not None:
             return None, None, error
-        logging.debug(f"Cancel Order Tx Info: {tx_info}")
+        logger.debug("Cancel Order Tx Info: %s", tx_info)
 
         api_response = await self.send_tx(tx_type=self.TX_TYPE_CANCEL_ORDER, tx_info=tx_info)
-        logging.debug(f"Cancel Order Send Tx Response: {api_response}")
+        logger.debug("Cancel Order Send Tx Response: %s", api_response)
         return CancelOrder.from_json(tx_info), api_response, None
 
     async def create_tp_order(self, market_index, client_order_index, base_amount, trigger_price, price, is_ask, reduce_only=False, nonce=-1, api_key_index=-1) -> (CreateOrder, TxHash, str):
@@ -777,135 +1010,175 @@ class SignerClient:
     async def withdraw(self, usdc_amount, nonce=-1, api_key_index=-1) -> (Withdraw, TxHash):
         usdc_amount = int(usdc_amount * self.USDC_TICKER_SCALE)
 
-        tx_info, error = self.sign_withdraw(usdc_amount, nonce)
+        tx_info, error = await self._sign_async(api_key_index, self.sign_withdraw, usdc_amount, nonce)
         if error is not None:
             return None, None, error
-        logging.debug(f"Withdraw Tx Info: {tx_info}")
+        logger.debug("Withdraw Tx Info: %s", tx_info)
 
         api_response = await self.send_tx(tx_type=self.TX_TYPE_WITHDRAW, tx_info=tx_info)
-        logging.debug(f"Withdraw Send Tx Response: {api_response}")
+        logger.debug("Withdraw Send Tx Response: %s", api_response)
         return Withdraw.from_json(tx_info), api_response, None
 
     async def create_sub_account(self, nonce=-1):
-        tx_info, error = self.sign_create_sub_account(nonce)
+        tx_info, error = await self._sign_async(-1, self.sign_create_sub_account, nonce)
         if error is not None:
             return None, None, error
-        logging.debug(f"Create Sub Account Tx Info: {tx_info}")
+        logger.debug("Create Sub Account Tx Info: %s", tx_info)
 
         api_response = await self.send_tx(tx_type=self.TX_TYPE_CREATE_SUB_ACCOUNT, tx_info=tx_info)
-        logging.debug(f"Create Sub Account Send Tx Response: {api_response}")
+        logger.debug("Create Sub Account Send Tx Response: %s", api_response)
         return tx_info, api_response, None
 
     @process_api_key_and_nonce
     async def cancel_all_orders(self, time_in_force, time, nonce=-1, api_key_index=-1):
-        tx_info, error = self.sign_cancel_all_orders(time_in_force, time, nonce)
+        tx_info, error = await self._sign_async(api_key_index, self.sign_cancel_all_orders, time_in_force, time, nonce)
         if error is not None:
             return None, None, error
-        logging.debug(f"Cancel All Orders Tx Info: {tx_info}")
+        logger.debug("Cancel All Orders Tx Info: %s", tx_info)
 
         api_response = await self.send_tx(tx_type=self.TX_TYPE_CANCEL_ALL_ORDERS, tx_info=tx_info)
-        logging.debug(f"Cancel All Orders Send Tx Response: {api_response}")
+        logger.debug("Cancel All Orders Send Tx Response: %s", api_response)
         return tx_info, api_response, None
 
     @process_api_key_and_nonce
     async def modify_order(
         self, market_index, order_index, base_amount, price, trigger_price, nonce=-1, api_key_index=-1
     ):
-        tx_info, error = self.sign_modify_order(market_index, order_index, base_amount, price, trigger_price, nonce)
+        tx_info, error = await self._sign_async(
+            api_key_index, self.sign_modify_order, market_index, order_index, base_amount, price, trigger_price, nonce
+        )
         if error is not None:
             return None, None, error
-        logging.debug(f"Modify Order Tx Info: {tx_info}")
+        logger.debug("Modify Order Tx Info: %s", tx_info)
 
         api_response = await self.send_tx(tx_type=self.TX_TYPE_MODIFY_ORDER, tx_info=tx_info)
-        logging.debug(f"Modify Order Send Tx Response: {api_response}")
+        logger.debug("Modify Order Send Tx Response: %s", api_response)
         return tx_info, api_response, None
 
     @process_api_key_and_nonce
     async def transfer(self, eth_private_key: str, to_account_index, usdc_amount, fee, memo, nonce=-1, api_key_index=-1):
         usdc_amount = int(usdc_amount * self.USDC_TICKER_SCALE)
 
-        tx_info, error = self.sign_transfer(eth_private_key, to_account_index, usdc_amount, fee, memo, nonce)
+        tx_info, error = await self._sign_async(
+            api_key_index, self.sign_transfer, eth_private_key, to_account_index, usdc_amount, fee, memo, nonce
+        )
         if error is not None:
             return None, None, error
-        logging.debug(f"Transfer Tx Info: {tx_info}")
+        logger.debug("Transfer Tx Info: %s", tx_info)
 
         api_response = await self.send_tx(tx_type=self.TX_TYPE_TRANSFER, tx_info=tx_info)
-        logging.debug(f"Transfer Send Tx Response: {api_response}")
+        logger.debug("Transfer Send Tx Response: %s", api_response)
         return tx_info, api_response, None
 
     @process_api_key_and_nonce
     async def create_public_pool(
         self, operator_fee, initial_total_shares, min_operator_share_rate, nonce=-1, api_key_index=-1
     ):
-        tx_info, error = self.sign_create_public_pool(
-            operator_fee, initial_total_shares, min_operator_share_rate, nonce
+        tx_info, error = await self._sign_async(
+            api_key_index, self.sign_create_public_pool, operator_fee, initial_total_shares, min_operator_share_rate, nonce
         )
         if error is not None:
             return None, None, error
-        logging.debug(f"Create Public Pool Tx Info: {tx_info}")
+        logger.debug("Create Public Pool Tx Info: %s", tx_info)
 
         api_response = await self.send_tx(tx_type=self.TX_TYPE_CREATE_PUBLIC_POOL, tx_info=tx_info)
-        logging.debug(f"Create Public Pool Send Tx Response: {api_response}")
+        logger.debug("Create Public Pool Send Tx Response: %s", api_response)
         return tx_info, api_response, None
 
     @process_api_key_and_nonce
     async def update_public_pool(
         self, public_pool_index, status, operator_fee, min_operator_share_rate, nonce=-1, api_key_index=-1
     ):
-        tx_info, error = self.sign_update_public_pool(
-            public_pool_index, status, operator_fee, min_operator_share_rate, nonce
+        tx_info, error = await self._sign_async(
+            api_key_index, self.sign_update_public_pool, public_pool_index, status, operator_fee, min_operator_share_rate, nonce
         )
         if error is not None:
             return None, None, error
-        logging.debug(f"Update Public Pool Tx Info: {tx_info}")
+        logger.debug("Update Public Pool Tx Info: %s", tx_info)
 
         api_response = await self.send_tx(tx_type=self.TX_TYPE_UPDATE_PUBLIC_POOL, tx_info=tx_info)
-        logging.debug(f"Update Public Pool Send Tx Response: {api_response}")
+        logger.debug("Update Public Pool Send Tx Response: %s", api_response)
         return tx_info, api_response, None
 
     @process_api_key_and_nonce
     async def mint_shares(self, public_pool_index, share_amount, nonce=-1, api_key_index=-1):
-        tx_info, error = self.sign_mint_shares(public_pool_index, share_amount, nonce)
+        tx_info, error = await self._sign_async(api_key_index, self.sign_mint_shares, public_pool_index, share_amount, nonce)
         if error is not None:
             return None, None, error
-        logging.debug(f"Mint Shares Tx Info: {tx_info}")
+        logger.debug("Mint Shares Tx Info: %s", tx_info)
 
         api_response = await self.send_tx(tx_type=self.TX_TYPE_MINT_SHARES, tx_info=tx_info)
-        logging.debug(f"Mint Shares Send Tx Response: {api_response}")
+        logger.debug("Mint Shares Send Tx Response: %s", api_response)
         return tx_info, api_response, None
 
     @process_api_key_and_nonce
     async def burn_shares(self, public_pool_index, share_amount, nonce=-1, api_key_index=-1):
-        tx_info, error = self.sign_burn_shares(public_pool_index, share_amount, nonce)
+        tx_info, error = await self._sign_async(api_key_index, self.sign_burn_shares, public_pool_index, share_amount, nonce)
         if error is not None:
             return None, None, error
-        logging.debug(f"Burn Shares Tx Info: {tx_info}")
+        logger.debug("Burn Shares Tx Info: %s", tx_info)
 
         api_response = await self.send_tx(tx_type=self.TX_TYPE_BURN_SHARES, tx_info=tx_info)
-        logging.debug(f"Burn Shares Send Tx Response: {api_response}")
+        logger.debug("Burn Shares Send Tx Response: %s", api_response)
         return tx_info, api_response, None
     
     @process_api_key_and_nonce
     async def update_leverage(self, market_index, margin_mode, leverage, nonce=-1, api_key_index=-1):
         imf = int(10_000 / leverage)
-        tx_info, error = self.sign_update_leverage(market_index, imf, margin_mode, nonce)
+        tx_info, error = await self._sign_async(api_key_index, self.sign_update_leverage, market_index, imf, margin_mode, nonce)
 
         if error is not None:
             return None, None, error
-        logging.debug(f"Update Leverage Tx Info: {tx_info}")
+        logger.debug("Update Leverage Tx Info: %s", tx_info)
 
         api_response = await self.send_tx(tx_type=self.TX_TYPE_UPDATE_LEVERAGE, tx_info=tx_info)
-        logging.debug(f"Update Leverage Tx Response: {api_response}")
+        logger.debug("Update Leverage Tx Response: %s", api_response)
         return tx_info, api_response, None
 
 
     async def send_tx(self, tx_type: StrictInt, tx_info: str) -> RespSendTx:
         if tx_info[0] != "{":
             raise Exception(tx_info)
+        if self.tx_trace is None:
+            return await self._send_tx(tx_type, tx_info)
+
+        start = time.perf_counter()
+        self._trace("tx_sent", tx_type=tx_type, tx_info=tx_info)
+        try:
+            response = await self._send_tx(tx_type, tx_info)
+        except Exception as e:
+            self._trace("tx_error", tx_type=tx_type, error=e, latency=time.perf_counter() - start)
+            raise
+        self._trace(
+            "tx_response",
+            tx_type=tx_type,
+            code=response.code,
+            tx_hash=response.tx_hash,
+            latency=time.perf_counter() - start,
+        )
+        return response
+
+    async def _send_tx(self, tx_type: int, tx_info: str) -> RespSendTx:
+        if self.ws_tx_client is not None:
+            try:
+                return await self.ws_tx_client.send_tx(tx_type, tx_info)
+            except ConnectionError as e:
+                # raised only before the tx was written, TxOutcomeUnknownError after
+                logger.warning("Sending tx over ws failed, falling back to REST: %r", e)
+        if self.tx_batcher is not None:
+            return await self.tx_batcher.send_tx(tx_type, tx_info)
         return await self.tx_api.send_tx(tx_type=tx_type, tx_info=tx_info)
 
     async def close(self):
+        if self.tx_batcher is not None:
+            await self.tx_batcher.close()
+        if self.ws_tx_client is not None:
+            await self.ws_tx_client.close()
         await self.api_client.close()
+        if self._owns_signing_executor:
+            self.signing_executor.shutdown(wait=False)
+        if self.signing_pool is not None:
+            self.signing_pool.close(wait=False)
 
     @staticmethod
     def are_keys_equal(key1, key2) -> bool:
@@ -0,0 +1,92 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from typing import Dict, Optional
+
+from lighter import signer_client
+from lighter.errors import ValidationError
+
+# signer client of the current worker process
+_worker_client = None
+
+
+def _init_worker(url: str, chain_id: int, account_index: int, private_keys: Dict[int, str]):
+    global _worker_client
+    # only the signing part of SignerClient is used in the workers, so its api / nonce clients are not created
+    client = signer_client.SignerClient.__new__(signer_client.SignerClient)
+    client.signer = signer_client._initialize_signer()
+    client.url = url
+    client.chain_id = chain_id
+    client.account_index = account_index
+    client.api_key_dict = private_keys
+    client.api_key_index = min(private_keys)
+    for api_key_index in private_keys:
+        client.create_client(api_key_index)
+    _worker_client = client
+
+
+def _sign(api_key_index: int, method: str, args: tuple):
+    return _worker_client.sign_with_api_key(api_key_index, getattr(_worker_client, method), *args)
+
+
+def partition_api_keys(api_keys, workers: int) -> Dict[int, int]:
+    """Assigns the API keys round-robin to the workers, returning api_key_index -> worker."""
+    return {api_key_index: i % workers for i, api_key_index in enumerate(sorted(api_keys))}
+
+
+class SigningPool:
+    """
+    Signs transactions in worker processes, each with its own copy of the signer library and a subset of the API keys.
+    The signer library signs with one API key at a time per process, so this scales signing with the number of keys.
+
+    Requests are routed by `api_key_index` and return the same `(tx_info, error)` as the `SignerClient.sign_*` methods.
+    Signatures for one API key are done in order by a single worker.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        private_keys: Dict[int, str],
+        account_index: int,
+        workers: Optional[int] = None,
+        chain_id: Optional[int] = None,
+        mp_context=None,
+    ):
+        if not private_keys:
+            raise ValidationError("no private keys")
+        if chain_id is None:
+            chain_id = 304 if "mainnet" in url else 300
+        workers = min(workers or multiprocessing.cpu_count(), len(private_keys))
+        # forking a process which has loaded the signer library (a Go runtime) is unsafe
+        mp_context = mp_context or multiprocessing.get_context("spawn")
+
+        self.routes = partition_api_keys(private_keys.keys(), workers)
+        self.executors = []
+        for worker in range(workers):
+            worker_keys = {
+                api_key_index: private_key[2:] if private_key.startswith("0x") else private_key
+                for api_key_index, private_key in private_keys.items()
+                if self.routes[api_key_index] == worker
+            }
+            self.executors.append(
+                ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=mp_context,
+                    initializer=_init_worker,
+                    initargs=(url, chain_id, account_index, worker_keys),
+                )
+            )
+
+    def __contains__(self, api_key_index: int) -> bool:
+        return api_key_index in self.routes
+
+    async def sign(self, api_key_index: int, method: str, *args):
+        """Calls `SignerClient.<method>(*args)` in the worker owning `api_key_index`, e.g. `sign(3, "sign_cancel_order", 0, 12, nonce)`."""
+        if api_key_index not in self.routes:
+            raise ValidationError(f"api key {api_key_index} is not handled by the signing pool")
+        executor = self.executors[self.routes[api_key_index]]
+        return await asyncio.get_running_loop().run_in_executor(executor, _sign, api_key_index, method, args)
+
+    def close(self, wait: bool = True):
+        for executor in self.executors:
+            executor.shutdown(wait=wait)
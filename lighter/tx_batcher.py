@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from lighter import codec
+from lighter.api.transaction_api import TransactionApi
+from lighter.models.resp_send_tx import RespSendTx
+from lighter.models.resp_send_tx_batch import RespSendTxBatch
+
+logger = logging.getLogger(__name__)
+
+
+class TxBatcher:
+    """
+    Coalesces the signed transactions of concurrent callers into `send_tx_batch` requests. Transactions are collected
+    for `window` seconds after the first one, or until `max_batch_size` of them are pending, then sent as one batch.
+    Each caller gets a `RespSendTx` with its own hash; if the batch request fails, all its callers get the exception.
+    Transactions are sent in the order `send_tx` is called, so nonces of one API key stay ordered within a batch.
+    """
+
+    def __init__(self, tx_api: TransactionApi, window: float = 0.002, max_batch_size: int = 50):
+        if window < 0 or max_batch_size < 1:
+            raise ValueError(f"invalid batching {window=} {max_batch_size=}")
+        self.tx_api = tx_api
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.pending: List[Tuple[int, str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._sending = set()
+        self.batches_sent = 0
+        self.txs_sent = 0
+
+    async def send_tx(self, tx_type: int, tx_info: str) -> RespSendTx:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((tx_type, tx_info, future))
+        if len(self.pending) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        """Sends the pending transactions right away."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self.pending:
+            batch, self.pending = self.pending[: self.max_batch_size], self.pending[self.max_batch_size :]
+            task = asyncio.ensure_future(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def close(self) -> None:
+        """Sends the pending transactions and waits for all batches in flight."""
+        self.flush()
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+
+    async def _send(self, batch: List[Tuple[int, str, asyncio.Future]]) -> None:
+        try:
+            if len(batch) == 1:
+                tx_type, tx_info, _ = batch[0]
+                responses = [await self.tx_api.send_tx(tx_type=tx_type, tx_info=tx_info)]
+            else:
+                response = await self.tx_api.send_tx_batch(
+                    tx_types=codec.dumps([tx_type for tx_type, _, _ in batch]),
+                    tx_infos=codec.dumps([tx_info for _, tx_info, _ in batch]),
+                )
+                responses = self._split_response(response, len(batch))
+        except BaseException as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        self.batches_sent += 1
+        self.txs_sent += len(batch)
+        logger.debug("sent a batch of %d txs", len(batch))
+        for (_, _, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+
+    @staticmethod
+    def _split_response(response: RespSendTxBatch, size: int) -> List[RespSendTx]:
+        tx_hashes = response.tx_hash or []
+        return [
+            RespSendTx(
+                code=response.code,
+                message=response.message,
+                # a rejected batch may not return the hashes
+                tx_hash=tx_hashes[i] if i < len(tx_hashes) else "",
+                predicted_execution_time_ms=response.predicted_execution_time_ms,
+            )
+            for i in range(size)
+        ]
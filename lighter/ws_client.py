@@ -1,7 +1,101 @@
-import json
+import asyncio
+import collections
+import enum
+import inspect
+import logging
+import random
+import time
+from websockets.exceptions import WebSocketException
 from websockets.sync.client import connect
 from websockets.client import connect as connect_async
+from lighter import codec
 from lighter.configuration import Configuration
+from lighter.order_book import OrderBook
+
+logger = logging.getLogger(__name__)
+
+
+class DispatchOverflowPolicy(enum.Enum):
+    CONFLATE = 1  # replace the newest queued message of the channel
+    DROP_OLDEST = 2
+    BLOCK = 3  # stop reading from the socket until the consumer catches up
+
+
+class ChannelDispatcher:
+    """
+    Bounded queue and consumer task delivering the updates of a single channel to its callback.
+    The callback may be a plain function or a coroutine function.
+    """
+
+    def __init__(self, callback, maxsize: int, overflow_policy: DispatchOverflowPolicy):
+        self.callback = callback
+        self.maxsize = maxsize
+        self.overflow_policy = overflow_policy
+        self.delivered = 0
+        self.dropped = 0
+        self.conflated = 0
+        self._items = collections.deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._task = None
+        self._closed = False
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    def is_full(self) -> bool:
+        return len(self._items) >= self.maxsize
+
+    def put_nowait(self, args) -> None:
+        """Queues a callback invocation. With the BLOCK policy the queue may overshoot until `wait_for_capacity`."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._consume())
+        if self.is_full():
+            if self.overflow_policy == DispatchOverflowPolicy.CONFLATE:
+                self._items[-1] = args
+                self.conflated += 1
+                return
+            if self.overflow_policy == DispatchOverflowPolicy.DROP_OLDEST:
+                self._items.popleft()
+                self.dropped += 1
+        self._items.append(args)
+        self._not_empty.set()
+        if self.is_full():
+            self._not_full.clear()
+
+    async def wait_for_capacity(self) -> None:
+        while self.is_full() and not self._closed:
+            await self._not_full.wait()
+
+    async def _consume(self):
+        while True:
+            while not self._items:
+                self._not_empty.clear()
+                await self._not_empty.wait()
+            args = self._items.popleft()
+            if not self.is_full():
+                self._not_full.set()
+            try:
+                result = self.callback(*args)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("ws callback failed")
+            self.delivered += 1
+
+    def stats(self) -> dict:
+        return {"depth": self.depth, "delivered": self.delivered, "dropped": self.dropped, "conflated": self.conflated}
+
+    def close(self) -> None:
+        """Stops the delivery, dropping the queued updates and releasing a reader waiting in `wait_for_capacity`."""
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._items.clear()
+        self._not_full.set()
 
 
 class WsClient:
@@ -13,31 +107,68 @@ class WsClient:
         account_ids=[],
         on_order_book_update=print,
         on_account_update=print,
+        reconnect=False,
+        reconnect_initial_delay=0.1,
+        reconnect_max_delay=30.0,
+        dispatch_queue_size=None,
+        dispatch_overflow_policy=DispatchOverflowPolicy.CONFLATE,
+        order_book_objects=False,
     ):
+        """
+        `on_order_book_update(market_id, order_book)` receives the order book as a dict with "asks", "bids"
+        (levels sorted best first) and "offset". With `order_book_objects=True` it receives the live
+        `lighter.order_book.OrderBook` instead, which saves copying the whole book on every update; the object
+        keeps changing after the callback returns. Either way `order_book_states` and `get_order_book` hold
+        `OrderBook` objects.
+
+        With `reconnect=True`, `run`/`run_async` supervise the connection instead of raising when it drops:
+        they reconnect with jittered exponential backoff, resubscribe every channel and drop order book deltas
+        until a fresh snapshot has been received for that book.
+
+        Channels can be added or removed on a running client with `subscribe` / `unsubscribe`, so the
+        client may also be created without any initial subscriptions.
+
+        Setting `dispatch_queue_size` (only supported by `run_async`) moves the callbacks off the receive loop:
+        each channel gets a bounded queue drained by its own task, and `dispatch_overflow_policy` decides what
+        happens when a slow callback lets the queue fill up. See `dispatch_stats` for queue depths and counters.
+        """
         if host is None:
             host = Configuration.get_default().host.replace("https://", "")
 
         self.base_url = f"wss://{host}{path}"
 
         self.subscriptions = {
-            "order_books": order_book_ids,
-            "accounts": account_ids,
+            "order_books": list(order_book_ids),
+            "accounts": list(account_ids),
         }
 
-        if len(order_book_ids) == 0 and len(account_ids) == 0:
-            raise Exception("No subscriptions provided.")
-
         self.order_book_states = {}
         self.account_states = {}
 
         self.on_order_book_update = on_order_book_update
         self.on_account_update = on_account_update
+        self.order_book_objects = order_book_objects
 
         self.ws = None
+        self._connected = False
+
+        self.reconnect = reconnect
+        self.reconnect_initial_delay = reconnect_initial_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.reconnect_count = 0
+        self.last_resync_seconds = None  # time from disconnect until every order book got a fresh snapshot
+        self._reconnect_attempt = 0
+        self._disconnected_at = None
+        self._resyncing_order_books = set()
+
+        self.dispatch_queue_size = dispatch_queue_size
+        self.dispatch_overflow_policy = dispatch_overflow_policy
+        self.dispatchers = {}
+        self._backpressure = None
 
     def on_message(self, ws, message):
-        if isinstance(message, str):
-            message = json.loads(message)
+        if isinstance(message, (str, bytes)):
+            message = codec.loads(message)
 
         message_type = message.get("type")
 
@@ -51,11 +182,13 @@ class WsClient:
             self.handle_subscribed_account(message)
         elif message_type == "update/account_all":
             self.handle_update_account(message)
+        elif message_type is not None and message_type.startswith("unsubscribed"):
+            pass
         else:
             self.handle_unhandled_message(message)
 
     async def on_message_async(self, ws, message):
-        message = json.loads(message)
+        message = codec.loads(message)
         message_type = message.get("type")
 
         if message_type == "connected":
@@ -63,78 +196,203 @@ class WsClient:
         else:
             self.on_message(ws, message)
 
+        if self._backpressure is not None:
+            dispatcher, self._backpressure = self._backpressure, None
+            await dispatcher.wait_for_capacity()
+
     def handle_connected(self, ws):
-        for market_id in self.subscriptions["order_books"]:
-            ws.send(
-                json.dumps({"type": "subscribe", "channel": f"order_book/{market_id}"})
-            )
-        for account_id in self.subscriptions["accounts"]:
-            ws.send(
-                json.dumps(
-                    {"type": "subscribe", "channel": f"account_all/{account_id}"}
-                )
-            )
+        self._reconnect_attempt = 0
+        sent = []
+        messages = self._subscription_messages(sent)
+        while messages:
+            for message in messages:
+                ws.send(message)
+            messages = self._subscription_messages(sent)
+        self._connected = True
+        self._check_resynced()
 
     async def handle_connected_async(self, ws):
-        for market_id in self.subscriptions["order_books"]:
-            await ws.send(
-                json.dumps({"type": "subscribe", "channel": f"order_book/{market_id}"})
-            )
-        for account_id in self.subscriptions["accounts"]:
-            await ws.send(
-                json.dumps(
-                    {"type": "subscribe", "channel": f"account_all/{account_id}"}
-                )
-            )
+        self._reconnect_attempt = 0
+        sent = []
+        messages = self._subscription_messages(sent)
+        while messages:
+            for message in messages:
+                await ws.send(message)
+            messages = self._subscription_messages(sent)
+        # no await since the last check, so `subscribe` / `unsubscribe` now send their own messages
+        self._connected = True
+        self._check_resynced()
+
+    def _subscription_channels(self):
+        return [f"order_book/{market_id}" for market_id in self.subscriptions["order_books"]] + [
+            f"account_all/{account_id}" for account_id in self.subscriptions["accounts"]
+        ]
+
+    def _subscription_messages(self, sent):
+        """
+        Returns the messages bringing the channels subscribed on the new connection (`sent`, updated in place)
+        in line with the subscriptions, which `subscribe` / `unsubscribe` may change while they are being sent.
+        """
+        channels = self._subscription_channels()
+        messages = []
+        for channel in channels:
+            if channel not in sent:
+                sent.append(channel)
+                messages.append(codec.dumps({"type": "subscribe", "channel": channel}))
+        for channel in [channel for channel in sent if channel not in channels]:
+            sent.remove(channel)
+            messages.append(codec.dumps({"type": "unsubscribe", "channel": channel}))
+        return messages
 
     def handle_subscribed_order_book(self, message):
         market_id = message["channel"].split(":")[1]
-        self.order_book_states[market_id] = message["order_book"]
-        if self.on_order_book_update:
-            self.on_order_book_update(market_id, self.order_book_states[market_id])
+        order_book = self.order_book_states.get(market_id)
+        if order_book is None:
+            order_book = OrderBook(market_id)
+            self.order_book_states[market_id] = order_book
+        order_book.apply_snapshot(message["order_book"])
+        self._mark_resynced(market_id)
+        self._notify_order_book(message["channel"], market_id, order_book)
 
     def handle_update_order_book(self, message):
         market_id = message["channel"].split(":")[1]
+        if market_id in self._resyncing_order_books or market_id not in self.order_book_states:
+            # the book is stale until the snapshot of the new subscription arrives,
+            # or the market was unsubscribed while deltas were still in flight
+            return
         self.update_order_book_state(market_id, message["order_book"])
-        if self.on_order_book_update:
-            self.on_order_book_update(market_id, self.order_book_states[market_id])
+        self._notify_order_book(message["channel"], market_id, self.order_book_states[market_id])
 
     def update_order_book_state(self, market_id, order_book):
-        self.update_orders(
-            order_book["asks"], self.order_book_states[market_id]["asks"]
-        )
-        self.update_orders(
-            order_book["bids"], self.order_book_states[market_id]["bids"]
-        )
+        self.order_book_states[market_id].apply_delta(order_book)
 
     def update_orders(self, new_orders, existing_orders):
+        """
+        Applies the `new_orders` levels to the `existing_orders` list of level dicts in place, a size of 0
+        removing the level. No longer used by the client, which keeps its books in `OrderBook` objects.
+        """
         for new_order in new_orders:
-            is_new_order = True
             for existing_order in existing_orders:
                 if new_order["price"] == existing_order["price"]:
-                    is_new_order = False
                     existing_order["size"] = new_order["size"]
-                    if float(new_order["size"]) == 0:
-                        existing_orders.remove(existing_order)
                     break
-            if is_new_order:
+            else:
                 existing_orders.append(new_order)
+        existing_orders[:] = [order for order in existing_orders if float(order["size"]) > 0]
 
-        existing_orders = [
-            order for order in existing_orders if float(order["size"]) > 0
-        ]
+    def _notify_order_book(self, channel, market_id, order_book):
+        if not self.on_order_book_update:
+            return
+        self._notify(
+            channel, self.on_order_book_update, market_id, order_book if self.order_book_objects else order_book.to_dict()
+        )
+
+    def _notify(self, channel, callback, *args):
+        if not callback:
+            return
+        if self.dispatch_queue_size is None:
+            callback(*args)
+            return
+        dispatcher = self.dispatchers.get(channel)
+        if dispatcher is None:
+            dispatcher = ChannelDispatcher(callback, self.dispatch_queue_size, self.dispatch_overflow_policy)
+            self.dispatchers[channel] = dispatcher
+        dispatcher.put_nowait(args)
+        if dispatcher.overflow_policy == DispatchOverflowPolicy.BLOCK and dispatcher.is_full():
+            self._backpressure = dispatcher
+
+    def get_order_book(self, market_id, max_age=None):
+        """
+        Returns the live order book of `market_id`, or None if it can't be trusted: the client is disconnected,
+        the book is waiting for a fresh snapshot, or it wasn't updated for more than `max_age` seconds.
+        """
+        market_id = str(market_id)
+        order_book = self.order_book_states.get(market_id)
+        if order_book is None or not self._connected or market_id in self._resyncing_order_books:
+            return None
+        if max_age is not None and (order_book.age() is None or order_book.age() > max_age):
+            return None
+        return order_book
+
+    def dispatch_stats(self):
+        """Returns queue depth and delivered / dropped / conflated counters per channel."""
+        return {channel: dispatcher.stats() for channel, dispatcher in self.dispatchers.items()}
+
+    def _close_dispatcher(self, channel):
+        dispatcher = self.dispatchers.pop(channel, None)
+        if dispatcher is not None:
+            dispatcher.close()
+
+    def _mark_resynced(self, market_id):
+        if market_id not in self._resyncing_order_books:
+            return
+        self._resyncing_order_books.discard(market_id)
+        self._check_resynced()
+
+    def _check_resynced(self):
+        # without order books to resync (e.g. only accounts are subscribed) that is as soon as the client reconnects
+        if self._connected and not self._resyncing_order_books and self._disconnected_at is not None:
+            self.last_resync_seconds = time.monotonic() - self._disconnected_at
+            self._disconnected_at = None
 
     def handle_subscribed_account(self, message):
         account_id = message["channel"].split(":")[1]
         self.account_states[account_id] = message
-        if self.on_account_update:
-            self.on_account_update(account_id, self.account_states[account_id])
+        self._notify(message["channel"], self.on_account_update, account_id, message)
 
     def handle_update_account(self, message):
         account_id = message["channel"].split(":")[1]
         self.account_states[account_id] = message
-        if self.on_account_update:
-            self.on_account_update(account_id, self.account_states[account_id])
+        self._notify(message["channel"], self.on_account_update, account_id, message)
+
+    async def subscribe(self, order_book_ids=(), account_ids=()):
+        """
+        Subscribes to additional order books / accounts. When the client is connected the subscribe messages
+        are sent immediately, otherwise they are sent as soon as the connection is established.
+        """
+        channels = []
+        for market_id in order_book_ids:
+            if self._find_subscription("order_books", market_id) is None:
+                self.subscriptions["order_books"].append(market_id)
+                channels.append(f"order_book/{market_id}")
+        for account_id in account_ids:
+            if self._find_subscription("accounts", account_id) is None:
+                self.subscriptions["accounts"].append(account_id)
+                channels.append(f"account_all/{account_id}")
+        await self._send_channel_messages("subscribe", channels)
+
+    async def unsubscribe(self, order_book_ids=(), account_ids=()):
+        """Unsubscribes from order books / accounts and drops their local state."""
+        channels = []
+        for market_id in order_book_ids:
+            subscribed = self._find_subscription("order_books", market_id)
+            if subscribed is not None:
+                self.subscriptions["order_books"].remove(subscribed)
+                self.order_book_states.pop(str(market_id), None)
+                self._mark_resynced(str(market_id))
+                self._close_dispatcher(f"order_book:{market_id}")
+                channels.append(f"order_book/{market_id}")
+        for account_id in account_ids:
+            subscribed = self._find_subscription("accounts", account_id)
+            if subscribed is not None:
+                self.subscriptions["accounts"].remove(subscribed)
+                self.account_states.pop(str(account_id), None)
+                self._close_dispatcher(f"account_all:{account_id}")
+                channels.append(f"account_all/{account_id}")
+        await self._send_channel_messages("unsubscribe", channels)
+
+    def _find_subscription(self, kind, channel_id):
+        """Returns the subscribed id equal to `channel_id`, ids being compared as strings (e.g. 1 and "1")."""
+        channel_id = str(channel_id)
+        return next((subscribed for subscribed in self.subscriptions[kind] if str(subscribed) == channel_id), None)
+
+    async def _send_channel_messages(self, message_type, channels):
+        if not self._connected:
+            return
+        for channel in channels:
+            result = self.ws.send(codec.dumps({"type": message_type, "channel": channel}))
+            if inspect.isawaitable(result):
+                await result  # the connection of `run_async`, the one of `run` sends synchronously
 
     def handle_unhandled_message(self, message):
         raise Exception(f"Unhandled message: {message}")
@@ -145,16 +403,52 @@ class WsClient:
     def on_close(self, ws, close_status_code, close_msg):
         raise Exception(f"Closed: {close_status_code} {close_msg}")
 
+    def _handle_disconnect(self):
+        """Marks every order book as stale and returns how long to wait before reconnecting."""
+        if self._disconnected_at is None:
+            self._disconnected_at = time.monotonic()
+        self._resyncing_order_books.update(self.order_book_states.keys())
+        self.reconnect_count += 1
+        delay = min(self.reconnect_max_delay, self.reconnect_initial_delay * (2 ** self._reconnect_attempt))
+        self._reconnect_attempt += 1
+        return random.uniform(delay / 2, delay)
+
     def run(self):
-        ws = connect(self.base_url)
-        self.ws = ws
+        if self.dispatch_queue_size is not None:
+            raise Exception("dispatch queues require run_async")
+        while True:
+            try:
+                ws = connect(self.base_url)
+                self.ws = ws
 
-        for message in ws:
-            self.on_message(ws, message)
+                for message in ws:
+                    self.on_message(ws, message)
+                if not self.reconnect:
+                    return
+            except (WebSocketException, OSError):
+                if not self.reconnect:
+                    raise
+            finally:
+                self._connected = False
+            time.sleep(self._handle_disconnect())
 
     async def run_async(self):
-        ws = await connect_async(self.base_url)
-        self.ws = ws
+        try:
+            while True:
+                try:
+                    ws = await connect_async(self.base_url)
+                    self.ws = ws
 
-        async for message in ws:
-            await self.on_message_async(ws, message)
+                    async for message in ws:
+                        await self.on_message_async(ws, message)
+                    if not self.reconnect:
+                        return
+                except (WebSocketException, OSError, asyncio.TimeoutError):
+                    if not self.reconnect:
+                        raise
+                finally:
+                    self._connected = False
+                await asyncio.sleep(self._handle_disconnect())
+        finally:
+            for channel in list(self.dispatchers):
+                self._close_dispatcher(channel)
@@ -0,0 +1,132 @@
+import asyncio
+import itertools
+import logging
+import os
+from typing import Dict, Optional
+
+from websockets.client import connect as connect_async
+from websockets.exceptions import WebSocketException
+
+from lighter import codec
+from lighter.errors import TxOutcomeUnknownError
+from lighter.exceptions import BadRequestException
+from lighter.models.resp_send_tx import RespSendTx
+
+logger = logging.getLogger(__name__)
+
+
+class WsTxClient:
+    """
+    Sends transactions as `jsonapi/sendtx` messages over one persistent `/stream` connection, which is opened on the
+    first transaction and reopened after it drops. Each transaction carries a request id which its response is
+    matched to, and at most `max_in_flight` transactions wait for a response at a time.
+
+    Failures before the transaction was written to the socket (no connection) raise `ConnectionError`, the
+    transaction can be sent another way. Failures after it was written (dropped connection, no response within
+    `timeout`) raise `TxOutcomeUnknownError`: the server may have accepted it, so it must not be sent again.
+    """
+
+    def __init__(self, url: str, path: str = "/stream", max_in_flight: int = 64, timeout: float = 5.0):
+        self.base_url = url.replace("https://", "wss://").replace("http://", "ws://") + path
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.ws = None
+        self.pending: Dict[str, asyncio.Future] = {}
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._connecting: Optional[asyncio.Lock] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._id_prefix = f"py{os.getpid()}-{id(self):x}-"
+        self._ids = itertools.count()
+
+    async def connect(self) -> None:
+        """Opens the connection unless it is open already, raises `ConnectionError` if that fails or times out."""
+        if self._connecting is None:
+            self._connecting = asyncio.Lock()
+        async with self._connecting:
+            if self.ws is not None:
+                return
+            try:
+                ws = await connect_async(self.base_url)
+            except (WebSocketException, OSError, asyncio.TimeoutError) as e:
+                raise ConnectionError(f"couldn't connect to {self.base_url}") from e
+            try:
+                # the server greets every connection with a "connected" message before anything else
+                await asyncio.wait_for(ws.recv(), self.timeout)
+            except (WebSocketException, OSError, asyncio.TimeoutError) as e:
+                await ws.close()
+                raise ConnectionError(f"no greeting from {self.base_url}") from e
+            except BaseException:
+                await ws.close()
+                raise
+            self.ws = ws
+            self._reader = asyncio.ensure_future(self._read(ws))
+
+    async def _read(self, ws) -> None:
+        try:
+            async for message in ws:
+                message = codec.loads(message)
+                data = message.get("data")
+                request_id = message.get("id") or (data.get("id") if isinstance(data, dict) else None)
+                future = self.pending.pop(request_id, None)
+                if future is None:
+                    logger.debug("unmatched ws tx message %s", message)
+                elif not future.done():
+                    future.set_result(message)
+        except (WebSocketException, OSError, ValueError) as e:
+            logger.warning("ws tx connection failed: %s", e)
+        finally:
+            if self.ws is ws:
+                self.ws = None
+            pending, self.pending = self.pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(TxOutcomeUnknownError("ws tx connection closed before the response"))
+
+    async def send_tx(self, tx_type: int, tx_info: str) -> RespSendTx:
+        if self._in_flight is None:
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        async with self._in_flight:
+            if self.ws is None:
+                await self.connect()
+            ws = self.ws
+            if ws is None:
+                raise ConnectionError("ws tx connection closed")
+
+            request_id = f"{self._id_prefix}{next(self._ids)}"
+            message = codec.dumps(
+                {"type": "jsonapi/sendtx", "data": {"id": request_id, "tx_type": tx_type, "tx_info": codec.loads(tx_info)}}
+            )
+            future = asyncio.get_running_loop().create_future()
+            self.pending[request_id] = future
+            try:
+                # from here on the frame may have been written, so the transaction may have been received
+                await ws.send(message)
+                response = await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError as e:
+                raise TxOutcomeUnknownError(f"no response to ws tx {request_id} within {self.timeout}s") from e
+            except (WebSocketException, OSError) as e:
+                raise TxOutcomeUnknownError(f"ws tx connection failed while sending {request_id}") from e
+            finally:
+                self.pending.pop(request_id, None)
+        return self._to_response(response)
+
+    @staticmethod
+    def _to_response(message: dict) -> RespSendTx:
+        error = message.get("error")
+        if error is not None:
+            # same exception as a rejected REST request, e.g. for the invalid nonce handling of SignerClient
+            body = error if isinstance(error, str) else codec.dumps(error)
+            raise BadRequestException(status=400, reason="Bad Request", body=body)
+        data = message.get("data") if isinstance(message.get("data"), dict) else message
+        return RespSendTx(
+            code=data.get("code", 200),
+            message=data.get("message"),
+            tx_hash=data.get("tx_hash") or "",
+            predicted_execution_time_ms=data.get("predicted_execution_time_ms") or 0,
+        )
+
+    async def close(self) -> None:
+        if self.ws is not None:
+            await self.ws.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
@@ -44,6 +44,7 @@ setup(
     url="",
     keywords=["OpenAPI", "OpenAPI-Generator", ""],
     install_requires=REQUIRES,
+    extras_require={"fast-json": ["orjson >= 3.9"]},
     packages=find_packages(exclude=["test", "tests"]),
     include_package_data=True,
     long_description_content_type="text/markdown",
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import unittest
+from types import SimpleNamespace
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import lighter
+from lighter import ApiClient
+
+ORDER_BOOKS = {
+    "code": 200,
+    "order_books": [
+        {
+            "symbol": "ETH",
+            "market_id": 0,
+            "status": "active",
+            "taker_fee": "0.0000",
+            "maker_fee": "0.0000",
+            "liquidation_fee": "1.0000",
+            "min_base_amount": "0.0050",
+            "min_quote_amount": "10.000000",
+            "supported_size_decimals": 4,
+            "supported_price_decimals": 2,
+            "supported_quote_decimals": 6,
+            "new_field": {"a": 1},
+        }
+    ],
+    "unknown": [1, 2],
+}
+
+
+class TestResponseModes(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.api_clients = []
+
+    async def asyncTearDown(self):
+        for api_client in self.api_clients:
+            await api_client.close()
+
+    def api_client(self, response_mode=ApiClient.RESPONSE_MODE_MODEL):
+        api_client = ApiClient(response_mode=response_mode)
+        self.api_clients.append(api_client)
+        return api_client
+
+    def deserialize(self, api_client):
+        return api_client.deserialize(json.dumps(ORDER_BOOKS), "OrderBooks", "application/json")
+
+    async def test_construct_matches_validated_models(self):
+        validated = self.deserialize(self.api_client())
+        constructed = self.deserialize(self.api_client(ApiClient.RESPONSE_MODE_CONSTRUCT))
+        self.assertIs(type(constructed), type(validated))
+        self.assertIs(type(constructed.order_books[0]), type(validated.order_books[0]))
+        self.assertEqual(constructed.to_dict(), validated.to_dict())
+        self.assertEqual(constructed.additional_properties, {"unknown": [1, 2]})
+        self.assertEqual(constructed.order_books[0].additional_properties, {"new_field": {"a": 1}})
+        # the additional_properties default isn't shared between instances
+        self.assertEqual(self.deserialize(self.api_client(ApiClient.RESPONSE_MODE_CONSTRUCT)).to_dict(), ORDER_BOOKS)
+
+    async def test_using_response_mode_is_scoped_to_the_client(self):
+        api_client, other = self.api_client(), self.api_client()
+        with api_client.using_response_mode(ApiClient.RESPONSE_MODE_DICT):
+            self.assertEqual(self.deserialize(api_client), ORDER_BOOKS)
+            self.assertIsInstance(self.deserialize(other), lighter.OrderBooks)
+            with api_client.using_response_mode(ApiClient.RESPONSE_MODE_CONSTRUCT):
+                self.assertEqual(api_client.get_response_mode(), ApiClient.RESPONSE_MODE_CONSTRUCT)
+            self.assertEqual(api_client.get_response_mode(), ApiClient.RESPONSE_MODE_DICT)
+        self.assertEqual(api_client.get_response_mode(), ApiClient.RESPONSE_MODE_MODEL)
+        with self.assertRaises(lighter.ApiValueError):
+            with api_client.using_response_mode("xml"):
+                pass
+
+    async def test_using_response_mode_is_scoped_to_the_task(self):
+        api_client = self.api_client()
+        modes = {}
+
+        async def record(name, response_mode=None):
+            if response_mode is None:
+                await asyncio.sleep(0.01)
+                modes[name] = api_client.get_response_mode()
+                return
+            with api_client.using_response_mode(response_mode):
+                await asyncio.sleep(0.01)
+                modes[name] = api_client.get_response_mode()
+
+        await asyncio.gather(record("dict", ApiClient.RESPONSE_MODE_DICT), record("default"))
+        self.assertEqual(modes, {"dict": ApiClient.RESPONSE_MODE_DICT, "default": ApiClient.RESPONSE_MODE_MODEL})
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = 0
+
+        async def order_books(request):
+            self.requests += 1
+            await asyncio.sleep(0.05)
+            return web.json_response({"code": 200, "order_books": []})
+
+        app = web.Application()
+        app.router.add_get("/api/v1/orderBooks", order_books)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        host = str(self.server.make_url("")).rstrip("/")
+        self.api_client = lighter.ApiClient(lighter.Configuration(host=host), single_flight=True)
+        self.order_api = lighter.OrderApi(self.api_client)
+
+    async def asyncTearDown(self):
+        await self.api_client.close()
+        await self.server.close()
+
+    async def test_concurrent_gets_share_one_request(self):
+        results = await asyncio.gather(*(self.order_api.order_books() for _ in range(5)))
+        self.assertEqual(self.requests, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual((self.api_client.single_flight_hits, self.api_client.single_flight_merges), (4, 1))
+
+        await self.order_api.order_books()
+        self.assertEqual(self.requests, 2)
+
+    async def test_cancelled_caller_doesnt_fail_the_others(self):
+        first = asyncio.ensure_future(self.order_api.order_books())
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(self.order_api.order_books())
+        await asyncio.sleep(0.01)
+        first.cancel()
+        self.assertEqual((await second).code, 200)
+        self.assertEqual(self.requests, 1)
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = 0
+
+        async def order_books(request):
+            self.requests += 1
+            return web.json_response({"code": 200, "message": str(self.requests), "order_books": []})
+
+        app = web.Application()
+        app.router.add_get("/api/v1/orderBooks", order_books)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        host = str(self.server.make_url("")).rstrip("/")
+        self.cache = lighter.ResponseCache({"/api/v1/orderBooks": 0.05}, stale_while_revalidate=1.0)
+        self.api_client = lighter.ApiClient(lighter.Configuration(host=host), response_cache=self.cache)
+        self.order_api = lighter.OrderApi(self.api_client)
+
+    async def asyncTearDown(self):
+        await self.api_client.close()
+        await self.server.close()
+
+    async def test_serves_from_memory_until_expired(self):
+        first = await self.order_api.order_books()
+        self.assertIs(await self.order_api.order_books(), first)
+        self.assertEqual(self.requests, 1)
+
+        await self.order_api.order_books(market_id=1)
+        self.assertEqual(self.requests, 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    async def test_stale_while_revalidate(self):
+        await self.order_api.order_books()
+        await asyncio.sleep(0.06)
+        stale = await self.order_api.order_books()
+        self.assertEqual(stale.message, "1")
+        await asyncio.sleep(0.02)  # the background refresh completes
+        self.assertEqual((await self.order_api.order_books()).message, "2")
+        self.assertEqual(self.cache.stale_hits, 1)
+
+    async def test_invalidate(self):
+        await self.order_api.order_books()
+        self.cache.invalidate("/api/v1/orderBooks")
+        self.assertEqual((await self.order_api.order_books()).message, "2")
+
+    def test_lru_bound(self):
+        cache = lighter.ResponseCache(max_entries=2)
+        response = SimpleNamespace(status=200)
+        for key in ("a", "b", "c"):
+            cache.put((key, ()), response, 60)
+        self.assertEqual([key for key, _ in cache.entries], ["b", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
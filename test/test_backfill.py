@@ -0,0 +1,78 @@
+import asyncio
+import json
+import unittest
+from types import SimpleNamespace
+
+from lighter.backfill import Backfill, BackfillStore, RateLimiter, trades_source
+
+
+class Trade(SimpleNamespace):
+    def to_json(self):
+        return json.dumps(self.__dict__)
+
+
+class FakeOrderApi:
+    """Trades with timestamps 0, 0, 1, 1, 2, 2, ..., paged by a cursor holding the offset of the next trade."""
+
+    def __init__(self, count, fail_on_request=None):
+        self.trades_by_time = [Trade(trade_id=i, timestamp=i // 2) for i in range(count)]
+        self.requests = 0
+        self.fail_on_request = fail_on_request
+
+    async def trades(self, sort_by, sort_dir, limit, var_from=None, cursor=None, **params):
+        self.requests += 1
+        if self.requests == self.fail_on_request:
+            raise ConnectionError("connection reset")
+        await asyncio.sleep(0)
+        offset = int(cursor) if cursor else next(
+            (i for i, trade in enumerate(self.trades_by_time) if trade.timestamp >= var_from), len(self.trades_by_time)
+        )
+        page = self.trades_by_time[offset : offset + limit]
+        next_cursor = str(offset + limit) if offset + limit < len(self.trades_by_time) else None
+        return SimpleNamespace(trades=page, next_cursor=next_cursor)
+
+
+class TestBackfill(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.store = BackfillStore(":memory:")
+
+    def tearDown(self):
+        self.store.close()
+
+    def stored_ids(self, source):
+        return [json.loads(data)["trade_id"] for data in self.store.items(source.name)]
+
+    async def test_shards_cover_the_range_once(self):
+        source = trades_source(FakeOrderApi(200), limit=7, market_id=0)
+        backfill = Backfill(source, self.store, start=10, end=90, shards=6, concurrency=3, batch_size=5)
+        self.assertEqual(await backfill.run(), 160)
+        self.assertEqual(self.stored_ids(source), list(range(20, 180)))
+
+    async def test_resumes_after_crash(self):
+        order_api = FakeOrderApi(200, fail_on_request=6)
+        source = trades_source(order_api, limit=10)
+        backfill = Backfill(source, self.store, start=0, end=100, shards=2, concurrency=2, batch_size=10)
+        with self.assertRaises(ConnectionError):
+            await backfill.run()
+        written_before_crash = self.store.count(source.name)
+        self.assertGreater(written_before_crash, 0)
+
+        requests_before_resume = order_api.requests
+        backfill = Backfill(source, self.store, start=0, end=100, shards=2, concurrency=2, batch_size=10)
+        self.assertEqual(await backfill.run(), 200 - written_before_crash)
+        self.assertEqual(self.stored_ids(source), list(range(200)))
+        self.assertLess(order_api.requests - requests_before_resume, 22)
+        self.assertEqual(await backfill.run(), 0)
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_spaces_requests(self):
+        limiter = RateLimiter(rate=200, burst=2)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(limiter.acquire() for _ in range(6)))
+        self.assertGreaterEqual(loop.time() - start, 4 / 200 - 0.002)
+
+
+if __name__ == "__main__":
+    unittest.main()
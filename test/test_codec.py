@@ -0,0 +1,62 @@
+import json
+import math
+import unittest
+
+from lighter import codec
+
+MESSAGE = {
+    "type": "update/order_book",
+    "channel": "order_book:0",
+    "order_book": {"asks": [{"price": "3024.66", "size": "0.0100"}], "bids": [], "offset": 41},
+    "nested": [1, -2, 3.5, True, False, None, "é"],
+}
+
+
+class TestCodec(unittest.TestCase):
+    def tearDown(self):
+        codec.set_codec()
+
+    def test_round_trip(self):
+        for name in codec.available_codecs():
+            with self.subTest(name):
+                c = codec.set_codec(name)
+                self.assertEqual(c.name, name)
+                self.assertEqual(codec.loads(codec.dumps(MESSAGE)), MESSAGE)
+                self.assertEqual(codec.loads(codec.dumps(MESSAGE).encode("utf-8")), MESSAGE)
+
+    def test_wide_integers_and_int_keys(self):
+        for name in codec.available_codecs():
+            with self.subTest(name):
+                codec.set_codec(name)
+                obj = {"big": 2**70, "small": -(2**64)}
+                self.assertEqual(json.loads(codec.dumps(obj)), obj)
+                self.assertEqual(json.loads(codec.dumps({1: "a"})), {"1": "a"})
+
+    def test_non_finite_floats_decode_like_json(self):
+        for name in codec.available_codecs():
+            with self.subTest(name):
+                codec.set_codec(name)
+                nan, inf, neg_inf, huge = codec.loads("[NaN, Infinity, -Infinity, 1e400]")
+                self.assertTrue(math.isnan(nan))
+                self.assertEqual((inf, neg_inf, huge), (math.inf, -math.inf, math.inf))
+
+    def test_malformed_data_raises_value_error(self):
+        for name in codec.available_codecs():
+            with self.subTest(name):
+                codec.set_codec(name)
+                with self.assertRaises(ValueError):
+                    codec.loads('{"a": ')
+
+    def test_set_codec(self):
+        fastest = next(name for name in ("orjson", "msgspec", "json") if name in codec.available_codecs())
+        self.assertEqual(codec.set_codec().name, fastest)
+        custom = codec.JsonCodec()
+        self.assertIs(codec.set_codec(custom), custom)
+        self.assertIs(codec.get_codec(), custom)
+        self.assertEqual(codec.dumps, custom.dumps)
+        with self.assertRaises(ValueError):
+            codec.set_codec("simdjson")
+
+
+if __name__ == "__main__":
+    unittest.main()
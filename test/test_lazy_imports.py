@@ -0,0 +1,57 @@
+import subprocess
+import sys
+import unittest
+
+# walks, in a fresh interpreter, the attributes reachable after a plain `import lighter` before imports were lazy:
+# the exported names and the submodules of lighter, lighter.api and lighter.models
+WALK_PUBLIC_ATTRIBUTES = """
+import importlib
+import pkgutil
+import types
+
+import lighter
+
+MODULES = [
+    "api", "api_client", "api_response", "configuration", "errors", "exceptions", "models", "nonce_manager", "rest",
+    "signer_client", "transactions", "ws_client",
+]
+for name in MODULES:
+    assert isinstance(getattr(lighter, name), types.ModuleType), name
+
+for package in (lighter, lighter.api, lighter.models):
+    for name in package._lazy_imports:
+        getattr(package, name)
+    for module in pkgutil.iter_modules(package.__path__):
+        assert getattr(package, module.name).__name__ == f"{package.__name__}.{module.name}", module.name
+
+# the names `lighter` exported before, bound to the same objects: every model and API, and the clients
+for package in (lighter.api, lighter.models):
+    for name in package._lazy_imports:
+        assert getattr(lighter, name) is getattr(package, name), name
+BASELINE_NAMES = {
+    "ApiResponse": "api_response", "ApiClient": "api_client", "Configuration": "configuration",
+    "OpenApiException": "exceptions", "ApiTypeError": "exceptions", "ApiValueError": "exceptions",
+    "ApiKeyError": "exceptions", "ApiAttributeError": "exceptions", "ApiException": "exceptions",
+    "WsClient": "ws_client", "SignerClient": "signer_client", "create_api_key": "signer_client",
+}
+for name, module in BASELINE_NAMES.items():
+    assert getattr(lighter, name) is getattr(importlib.import_module(f"lighter.{module}"), name), name
+
+for package, name in ((lighter, "missing"), (lighter.api, "missing"), (lighter.models, "missing")):
+    try:
+        getattr(package, name)
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError(f"{package.__name__}.{name}")
+"""
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_public_attributes_stay_reachable(self):
+        result = subprocess.run([sys.executable, "-c", WALK_PUBLIC_ATTRIBUTES], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import asyncio
+import gc
+import unittest
+from array import array
+from decimal import Decimal
+
+from lighter.market_registry import MarketSpec, MarketRegistry
+from lighter.models.order_book import OrderBook
+from lighter.models.order_books import OrderBooks
+
+
+def order_book(market_id, symbol, price_decimals, size_decimals):
+    return OrderBook(
+        symbol=symbol,
+        market_id=market_id,
+        status="active",
+        taker_fee="0.0000",
+        maker_fee="0.0000",
+        liquidation_fee="1.0000",
+        min_base_amount="0.0050",
+        min_quote_amount="10.000000",
+        supported_size_decimals=size_decimals,
+        supported_price_decimals=price_decimals,
+        supported_quote_decimals=6,
+    )
+
+
+class FakeOrderApi:
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+        self.order_books_listed = [order_book(0, "ETH", 2, 4), order_book(1, "BTC", 1, 5)]
+
+    async def order_books(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return OrderBooks(code=200, order_books=list(self.order_books_listed))
+
+
+class TestMarketSpec(unittest.TestCase):
+    def setUp(self):
+        self.market = MarketSpec(0, "ETH", price_decimals=2, size_decimals=4)
+
+    def test_price_conversions(self):
+        self.assertEqual(self.market.price_to_units("3024.66"), 302466)
+        self.assertEqual(self.market.price_to_units("3024.6"), 302460)
+        self.assertEqual(self.market.price_to_units("3024.600"), 302460)
+        self.assertEqual(self.market.price_to_units(3024), 302400)
+        self.assertEqual(self.market.price_to_units(3024.66), 302466)
+        self.assertEqual(self.market.price_to_units(Decimal("3024.66")), 302466)
+        self.assertEqual(self.market.units_to_price(302460), "3024.60")
+        self.assertEqual(self.market.units_to_size(5), "0.0005")
+
+    def test_too_precise_values_raise(self):
+        with self.assertRaises(ValueError):
+            self.market.price_to_units("3024.661")
+        with self.assertRaises(ValueError):
+            self.market.size_to_units(Decimal("0.00001"))
+
+    def test_batch_conversion_into_buffer(self):
+        out = array("q", bytes(8 * 3))
+        self.assertIs(self.market.sizes_to_units(["1", "0.5", 0.0001], out=out), out)
+        self.assertEqual(list(out), [10000, 5000, 1])
+        self.assertEqual(self.market.prices_to_units(["1.5", "2"]), [150, 200])
+
+
+class TestMarketRegistry(unittest.IsolatedAsyncioTestCase):
+    async def test_loads_once_and_looks_up_by_symbol(self):
+        order_api = FakeOrderApi()
+        registry = MarketRegistry(order_api)
+        markets = await asyncio.gather(registry.get_market("BTC"), registry.get_market(0))
+        self.assertEqual([market.symbol for market in markets], ["BTC", "ETH"])
+        self.assertEqual(order_api.calls, 1)
+        self.assertEqual(registry.market_id("ETH"), 0)
+        self.assertEqual(registry.symbol(1), "BTC")
+        with self.assertRaises(KeyError):
+            registry.market("SOL")
+
+    async def test_unknown_market_waits_for_the_load_in_flight(self):
+        order_api = FakeOrderApi()
+        registry = MarketRegistry(order_api, ttl=0)
+        await registry.load()
+        order_api.order_books_listed.append(order_book(2, "SOL", 3, 3))
+        refresh = asyncio.ensure_future(registry.load())
+        await asyncio.sleep(0)
+        self.assertEqual((await registry.get_market("SOL")).market_id, 2)
+        await refresh
+        self.assertEqual(order_api.calls, 2)
+
+    async def test_unknown_market_reloads_after_cooldown(self):
+        order_api = FakeOrderApi()
+        registry = MarketRegistry(order_api, unknown_market_cooldown=60)
+        await registry.load()
+        for _ in range(3):
+            with self.assertRaises(KeyError):
+                await registry.get_market("SOL")
+        self.assertEqual(order_api.calls, 1)
+
+        order_api.order_books_listed.append(order_book(2, "SOL", 3, 3))
+        registry.loaded_at -= 60
+        self.assertEqual((await registry.get_market("SOL")).market_id, 2)
+        self.assertEqual(order_api.calls, 2)
+
+    async def test_failed_background_refresh_is_retrieved(self):
+        loop_errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: loop_errors.append(context))
+        order_api = FakeOrderApi()
+        registry = MarketRegistry(order_api, ttl=0)
+        await registry.load()
+        order_api.error = ConnectionError("connection reset")
+        self.assertEqual((await registry.get_market("ETH")).market_id, 0)
+        self.assertIsNotNone(registry._loading)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        self.assertIsNone(registry._loading)
+        self.assertEqual(order_api.calls, 2)
+        gc.collect()
+        self.assertEqual(loop_errors, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,289 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+from lighter.errors import ValidationError
+from lighter.nonce_manager import (
+    ApiKeyScheduler,
+    AsyncApiNonceManager,
+    AsyncOptimisticNonceManager,
+    NonceJournal,
+    NonceManagerType,
+    NonceTracker,
+    OptimisticNonceManager,
+    nonce_manager_factory,
+)
+
+HOST = "https://host"
+
+
+def journaled_nonce_manager(start_api_key, end_api_key, api_key_scheduler=None, nonce_type=NonceManagerType.OPTIMISTIC):
+    """Nonce manager resuming from a journal, so it never queries the API for the initial nonces."""
+    journal = NonceJournal(":memory:")
+    for api_key_index in range(start_api_key, end_api_key + 1):
+        journal.record(HOST, 7, api_key_index, 9)
+    api_client = SimpleNamespace(configuration=SimpleNamespace(host=HOST))
+    return nonce_manager_factory(nonce_type, 7, api_client, start_api_key, end_api_key, api_key_scheduler, journal)
+
+
+class TestNonceTracker(unittest.TestCase):
+    def test_allocate_is_sequential(self):
+        tracker = NonceTracker(5)
+        self.assertEqual([tracker.allocate() for _ in range(3)], [5, 6, 7])
+        self.assertEqual(tracker.in_flight, {5, 6, 7})
+
+    def test_out_of_order_failure_is_reused_without_duplicates(self):
+        tracker = NonceTracker(0)
+        nonces = [tracker.allocate() for _ in range(4)]
+        tracker.release(1)
+        tracker.confirm(0)
+        tracker.confirm(3)
+        # 2 is still in flight, so only the gap at 1 is handed out before new nonces
+        self.assertEqual(tracker.allocate(), 1)
+        self.assertEqual(tracker.allocate(), 4)
+        self.assertEqual(len(set(nonces + [1, 4])), 5)
+
+    def test_release_at_top_rewinds(self):
+        tracker = NonceTracker(10)
+        for _ in range(3):
+            tracker.allocate()
+        tracker.release(11)
+        tracker.release(12)
+        self.assertEqual(tracker.next_nonce, 11)
+        self.assertEqual(tracker.released, [])
+        self.assertEqual(tracker.allocate(), 11)
+
+    def test_release_defaults_to_highest_in_flight(self):
+        tracker = NonceTracker(0)
+        tracker.allocate()
+        tracker.allocate()
+        tracker.release()
+        self.assertEqual(tracker.allocate(), 1)
+
+    def test_release_unknown_nonce_is_ignored(self):
+        tracker = NonceTracker(3)
+        tracker.release(100)
+        tracker.release(2)
+        self.assertEqual(tracker.allocate(), 3)
+
+    def test_resync_keeps_in_flight_and_releases_gaps(self):
+        tracker = NonceTracker(0)
+        for _ in range(6):
+            tracker.allocate()
+        for nonce in (0, 1, 3):
+            tracker.confirm(nonce)
+        tracker.release(2)
+        # the server only got up to 1: 2 and 3 were not consumed, 4 and 5 are still pending
+        tracker.resync(2)
+        self.assertEqual(tracker.allocate(), 2)
+        self.assertEqual(tracker.allocate(), 3)
+        self.assertEqual(tracker.allocate(), 6)
+
+    def test_resync_ahead_of_local_state(self):
+        tracker = NonceTracker(0)
+        tracker.allocate()
+        tracker.confirm(0)
+        tracker.resync(20)
+        self.assertEqual(tracker.allocate(), 20)
+
+
+class TestApiKeyScheduler(unittest.TestCase):
+    def test_rotates_through_ready_keys(self):
+        scheduler = ApiKeyScheduler(2, 4, min_interval=10)
+        self.assertEqual([scheduler.acquire_nowait() for _ in range(3)], [2, 3, 4])
+        self.assertEqual(scheduler.in_flight, {2: 1, 3: 1, 4: 1})
+
+    def test_picks_key_ready_soonest(self):
+        scheduler = ApiKeyScheduler(0, 2, min_interval=10)
+        for _ in range(3):
+            scheduler.acquire_nowait()
+        scheduler.ready_at[1] -= 5
+        self.assertEqual(scheduler.acquire_nowait(), 1)
+
+    def test_fewest_in_flight_breaks_ties(self):
+        scheduler = ApiKeyScheduler(0, 1, min_interval=0)
+        scheduler.in_flight[0] = 3
+        self.assertEqual(scheduler.acquire_nowait(), 1)
+
+    def test_predicted_execution_time_tightens_bound(self):
+        scheduler = ApiKeyScheduler(0, 1, min_interval=10)
+        scheduler.acquire_nowait()
+        scheduler.acquire_nowait()
+        scheduler.release(1, int(time.time() * 1000))
+        self.assertEqual(scheduler.acquire_nowait(), 1)
+        self.assertEqual(scheduler.in_flight, {0: 1, 1: 1})
+
+    def test_predicted_execution_time_ignored_when_disabled(self):
+        scheduler = ApiKeyScheduler(0, 1, min_interval=10, use_predicted_execution_time=False)
+        scheduler.acquire_nowait()
+        scheduler.acquire_nowait()
+        scheduler.release(1, int(time.time() * 1000))
+        self.assertEqual(scheduler.acquire_nowait(), 0)
+
+
+class TestScheduledNonceManager(unittest.TestCase):
+    def test_sync_manager_waits_for_the_key(self):
+        manager = journaled_nonce_manager(0, 0, ApiKeyScheduler(0, 0, min_interval=0.05))
+        start = time.monotonic()
+        self.assertEqual([manager.next_nonce() for _ in range(3)], [(0, 10), (0, 11), (0, 12)])
+        self.assertGreaterEqual(time.monotonic() - start, 0.1 - 0.002)
+
+    def test_key_acquired_by_the_caller_isnt_waited_for(self):
+        scheduler = ApiKeyScheduler(0, 0, min_interval=10)
+        manager = journaled_nonce_manager(0, 0, scheduler)
+        start = time.monotonic()
+        self.assertEqual([manager.next_nonce(scheduler.acquire_nowait()) for _ in range(2)], [(0, 10), (0, 11)])
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(scheduler.in_flight, {0: 2})
+        manager.acknowledge_success(0, 10)
+        manager.acknowledge_failure(0, 11)
+        self.assertEqual(scheduler.in_flight, {0: 0})
+
+    def test_only_handed_out_keys_are_released(self):
+        scheduler = ApiKeyScheduler(0, 1, min_interval=0)
+        manager = journaled_nonce_manager(0, 1, scheduler)
+        api_key_index, nonce = manager.next_nonce()
+        # a tx signed with an explicit nonce / api key, or acknowledged twice, doesn't release the key
+        manager.acknowledge_success(api_key_index, nonce + 5)
+        manager.acknowledge_failure(1 - api_key_index)
+        self.assertEqual(scheduler.in_flight, {api_key_index: 1, 1 - api_key_index: 0})
+        manager.acknowledge_success(api_key_index, nonce)
+        manager.acknowledge_success(api_key_index, nonce)
+        self.assertEqual(scheduler.in_flight, {0: 0, 1: 0})
+
+    def test_failure_without_nonce_releases_the_key(self):
+        scheduler = ApiKeyScheduler(0, 0, min_interval=0)
+        manager = journaled_nonce_manager(0, 0, scheduler)
+        manager.next_nonce()
+        manager.next_nonce()
+        manager.acknowledge_failure(0)
+        self.assertEqual(scheduler.in_flight, {0: 1})
+        self.assertEqual(manager.next_nonce(), (0, 11))
+
+    def test_scheduler_range_must_match(self):
+        for nonce_type in NonceManagerType:
+            with self.assertRaises(ValidationError):
+                journaled_nonce_manager(0, 1, ApiKeyScheduler(0, 2), nonce_type)
+        self.assertIsInstance(journaled_nonce_manager(2, 3, ApiKeyScheduler(2, 3)), OptimisticNonceManager)
+
+
+class FakeTransactionApi:
+    """`next_nonce` of the API, the next nonce of each key being `nonces[api_key_index]`."""
+
+    def __init__(self, nonces, fail=0):
+        self.nonces = dict(nonces)
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail = fail  # number of requests failing first
+
+    async def next_nonce(self, account_index, api_key_index):
+        self.requests.append(api_key_index)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            if self.fail:
+                self.fail -= 1
+                raise ConnectionError("connection reset")
+            return SimpleNamespace(nonce=self.nonces[api_key_index])
+        finally:
+            self.in_flight -= 1
+
+
+def async_nonce_manager(manager_class, nonces, api_key_scheduler=None, nonce_journal=None, fail=0):
+    api_client = SimpleNamespace(configuration=SimpleNamespace(host=HOST))
+    manager = manager_class(7, api_client, min(nonces), max(nonces), api_key_scheduler, nonce_journal)
+    manager.tx_api = FakeTransactionApi(nonces, fail)
+    return manager
+
+
+class TestAsyncOptimisticNonceManager(unittest.IsolatedAsyncioTestCase):
+    async def test_nonces_are_fetched_once_concurrently(self):
+        manager = async_nonce_manager(AsyncOptimisticNonceManager, {2: 10, 3: 20, 4: 30})
+        nonces = await asyncio.gather(*(manager.next_nonce() for _ in range(6)))
+        self.assertEqual(sorted(manager.tx_api.requests), [2, 3, 4])
+        self.assertEqual(manager.tx_api.max_in_flight, 3)
+        self.assertEqual(nonces, [(2, 10), (3, 20), (4, 30), (2, 11), (3, 21), (4, 31)])
+
+    async def test_failed_initialization_is_retried(self):
+        manager = async_nonce_manager(AsyncOptimisticNonceManager, {0: 5}, fail=1)
+        with self.assertRaises(ConnectionError):
+            await manager.next_nonce()
+        self.assertEqual(await manager.next_nonce(), (0, 5))
+
+    async def test_resumes_from_journal(self):
+        journal = NonceJournal(":memory:")
+        journal.record(HOST, 7, 0, 41)
+        manager = async_nonce_manager(AsyncOptimisticNonceManager, {0: 5, 1: 8}, nonce_journal=journal)
+        self.assertEqual([await manager.next_nonce() for _ in range(3)], [(0, 42), (1, 8), (0, 43)])
+        self.assertEqual(manager.tx_api.requests, [1])
+        self.assertEqual(journal.load(HOST, 7, [0, 1]), {0: 43, 1: 8})
+
+    async def test_failure_is_reused_and_refresh_resyncs(self):
+        manager = async_nonce_manager(AsyncOptimisticNonceManager, {0: 5})
+        first, second = await manager.next_nonce(), await manager.next_nonce()
+        manager.acknowledge_failure(*first)
+        manager.acknowledge_success(*second)
+        self.assertEqual(await manager.next_nonce(), (0, 5))
+
+        manager.tx_api.nonces[0] = 9
+        await manager.hard_refresh_nonce(0)
+        # 5 is still in flight, the nonces between 7 and 9 were consumed elsewhere
+        self.assertEqual([await manager.next_nonce() for _ in range(2)], [(0, 9), (0, 10)])
+
+    async def test_scheduler_paces_api_keys(self):
+        scheduler = ApiKeyScheduler(0, 1, min_interval=0.05)
+        manager = async_nonce_manager(AsyncOptimisticNonceManager, {0: 5, 1: 8}, api_key_scheduler=scheduler)
+        await manager.initialize()
+        start = asyncio.get_running_loop().time()
+        nonces = [await manager.next_nonce() for _ in range(3)]
+        self.assertGreaterEqual(asyncio.get_running_loop().time() - start, 0.05 - 0.002)
+        self.assertEqual(nonces, [(0, 5), (1, 8), (0, 6)])
+        manager.acknowledge_success(0, 5)
+        manager.acknowledge_success(0, 99)
+        self.assertEqual(scheduler.in_flight, {0: 1, 1: 1})
+
+
+class TestAsyncApiNonceManager(unittest.IsolatedAsyncioTestCase):
+    async def test_nonce_is_fetched_for_every_tx(self):
+        manager = async_nonce_manager(AsyncApiNonceManager, {0: 5, 1: 8})
+        await manager.initialize()
+        self.assertEqual(manager.tx_api.requests, [])
+        self.assertEqual([await manager.next_nonce() for _ in range(3)], [(0, 5), (1, 8), (0, 5)])
+        self.assertEqual(manager.tx_api.requests, [0, 1, 0])
+
+    async def test_hard_refresh(self):
+        manager = async_nonce_manager(AsyncApiNonceManager, {0: 5})
+        await manager.hard_refresh_nonce(0)
+        self.assertEqual(manager.nonce, {0: 4})
+
+
+class TestNonceJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "nonces.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_record_and_load_across_instances(self):
+        journal = NonceJournal(self.path)
+        journal.record("https://host", 7, 2, 41)
+        journal.record("https://host", 7, 2, 42)
+        journal.record("https://host", 7, 3, 10)
+        journal.record("https://other", 7, 2, 99)
+        journal.close()
+
+        journal = NonceJournal(self.path)
+        self.assertEqual(journal.load("https://host", 7, range(2, 4)), {2: 42, 3: 10})
+        self.assertEqual(journal.load("https://host", 7, [3, 4]), {3: 10})
+        self.assertEqual(journal.load("https://host", 8, range(2, 4)), {})
+        journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import json
+import unittest
+
+from lighter.order_book import OrderBook
+from lighter.ws_client import WsClient
+
+
+class TestOrderBook(unittest.TestCase):
+    """OrderBook unit tests"""
+
+    def setUp(self):
+        self.book = OrderBook("0")
+        self.book.apply_snapshot({
+            "asks": [{"price": "101.5", "size": "2"}, {"price": "101.0", "size": "1"}, {"price": "103.0", "size": "4"}],
+            "bids": [{"price": "99.0", "size": "3"}, {"price": "100.0", "size": "5"}],
+            "offset": 1,
+        })
+
+    def test_snapshot_is_sorted(self):
+        self.assertEqual(self.book.best_ask(), ("101.0", "1"))
+        self.assertEqual(self.book.best_bid(), ("100.0", "5"))
+        self.assertEqual([p for p, _ in self.book.top_asks(3)], ["101.0", "101.5", "103.0"])
+        self.assertEqual([p for p, _ in self.book.top_bids(5)], ["100.0", "99.0"])
+
+    def test_delta_updates_and_removes_levels(self):
+        self.book.apply_delta({
+            "asks": [{"price": "101.0", "size": "0"}, {"price": "100.5", "size": "7"}],
+            "bids": [{"price": "99.0", "size": "0.0000"}, {"price": "100.0", "size": "6"}],
+            "offset": 2,
+        })
+        self.assertEqual(self.book.best_ask(), ("100.5", "7"))
+        self.assertEqual(self.book.top_bids(5), [("100.0", "6")])
+        self.assertIsNone(self.book.depth_at("101", is_ask=True))
+        self.assertEqual(self.book.offset, 2)
+
+    def test_removing_unknown_level_is_noop(self):
+        self.book.apply_delta({"asks": [{"price": "200.0", "size": "0"}], "bids": []})
+        self.assertEqual(len(self.book.asks), 3)
+
+    def test_depth_at_price(self):
+        self.assertEqual(self.book.depth_at("101.50", is_ask=True), "2")
+        self.assertEqual(self.book.depth_at("100", is_ask=False), "5")
+        self.assertIsNone(self.book.depth_at("100", is_ask=True))
+
+    def test_precision_is_widened(self):
+        self.book.apply_delta({"asks": [{"price": "101.25", "size": "1"}], "bids": []})
+        self.assertEqual([p for p, _ in self.book.top_asks(3)], ["101.0", "101.25", "101.5"])
+        self.assertEqual(self.book.depth_at("101.5", is_ask=True), "2")
+
+    def test_dict_compatibility(self):
+        self.assertEqual(self.book["bids"], [{"price": "100.0", "size": "5"}, {"price": "99.0", "size": "3"}])
+        self.assertEqual(self.book.to_dict(depth=1)["asks"], [{"price": "101.0", "size": "1"}])
+
+    def test_age(self):
+        self.assertIsNone(OrderBook("1").age())
+        self.assertGreaterEqual(self.book.age(), 0)
+        self.book.updated_at -= 10
+        self.assertGreaterEqual(self.book.age(), 10)
+
+
+class TestWsClientOrderBookCache(unittest.TestCase):
+    def setUp(self):
+        self.client = WsClient(host="localhost", order_book_ids=[0])
+        self.client.handle_subscribed_order_book({
+            "channel": "order_book:0",
+            "order_book": {"asks": [{"price": "101.0", "size": "1"}], "bids": [], "offset": 1},
+        })
+
+    def test_live_book(self):
+        self.assertIsNone(self.client.get_order_book(0))  # not connected
+        self.client._connected = True
+        self.assertEqual(self.client.get_order_book(0).best_ask(), ("101.0", "1"))
+        self.assertIsNone(self.client.get_order_book(1))
+
+    def test_stale_book(self):
+        self.client._connected = True
+        self.client.order_book_states["0"].updated_at -= 5
+        self.assertIsNone(self.client.get_order_book(0, max_age=1))
+        self.assertIsNotNone(self.client.get_order_book(0, max_age=10))
+        self.client._resyncing_order_books.add("0")
+        self.assertIsNone(self.client.get_order_book(0, max_age=10))
+
+
+class TestWsClientOrderBookCallback(unittest.TestCase):
+    def updates(self, **kwargs):
+        updates = []
+        client = WsClient(host="localhost", order_book_ids=[0], on_order_book_update=lambda *args: updates.append(args), **kwargs)
+        client.handle_subscribed_order_book({
+            "channel": "order_book:0",
+            "order_book": {"asks": [{"price": "101.0", "size": "1"}], "bids": [{"price": "99.5", "size": "2"}], "offset": 1},
+        })
+        client.handle_update_order_book({
+            "channel": "order_book:0",
+            "order_book": {"asks": [{"price": "100.5", "size": "3"}], "bids": [{"price": "99.5", "size": "0"}], "offset": 2},
+        })
+        return updates
+
+    def test_dicts_by_default(self):
+        (_, snapshot), (market_id, update) = self.updates()
+        self.assertEqual(market_id, "0")
+        self.assertEqual(snapshot["bids"], [{"price": "99.5", "size": "2"}])
+        self.assertEqual(
+            json.loads(json.dumps(update)),
+            {"asks": [{"price": "100.5", "size": "3"}, {"price": "101.0", "size": "1"}], "bids": [], "offset": 2},
+        )
+        self.assertEqual(update.get("offset"), 2)
+
+    def test_order_book_objects(self):
+        (_, snapshot), (_, update) = self.updates(order_book_objects=True)
+        self.assertIsInstance(update, OrderBook)
+        self.assertIs(snapshot, update)
+        self.assertEqual(update.best_ask(), ("100.5", "3"))
+
+    def test_update_orders(self):
+        levels = [{"price": "101.0", "size": "1"}, {"price": "102.0", "size": "2"}]
+        WsClient(host="localhost").update_orders(
+            [{"price": "101.0", "size": "0"}, {"price": "102.0", "size": "5"}, {"price": "103.0", "size": "1"}], levels
+        )
+        self.assertEqual(levels, [{"price": "102.0", "size": "5"}, {"price": "103.0", "size": "1"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from lighter.pagination import iter_trades, iter_txs
+
+
+class FakeOrderApi:
+    def __init__(self, trades, page_size):
+        self.trades_left = trades
+        self.page_size = page_size
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def trades(self, sort_by, limit, cursor=None, **params):
+        self.requests.append(cursor)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.in_flight -= 1
+        start = int(cursor or 0)
+        page = [SimpleNamespace(trade_id=i, timestamp=1000 - i) for i in range(start, min(start + self.page_size, self.trades_left))]
+        next_cursor = str(start + self.page_size) if start + self.page_size < self.trades_left else None
+        return SimpleNamespace(trades=page, next_cursor=next_cursor)
+
+
+class FakeTransactionApi:
+    def __init__(self, total):
+        self.total = total
+        self.requests = []
+
+    async def txs(self, limit, index=None):
+        # includes the tx at `index`, like an endpoint paging by "from index"
+        self.requests.append(index)
+        start = index or 0
+        return SimpleNamespace(txs=[SimpleNamespace(sequence_index=i) for i in range(start, min(start + limit, self.total))])
+
+
+class TestPagination(unittest.IsolatedAsyncioTestCase):
+    async def test_streams_every_page_with_prefetch(self):
+        order_api = FakeOrderApi(trades=25, page_size=10)
+        trades = []
+        async for trade in iter_trades(order_api, limit=10):
+            trades.append(trade.trade_id)
+            await asyncio.sleep(0.002)
+        self.assertEqual(trades, list(range(25)))
+        self.assertEqual(order_api.requests, [None, "10", "20"])
+        self.assertEqual(order_api.max_in_flight, 1)
+
+    async def test_stops_on_bound(self):
+        order_api = FakeOrderApi(trades=1000, page_size=10)
+        trades = [trade.trade_id async for trade in iter_trades(order_api, limit=10, stop=lambda trade: trade.timestamp <= 985)]
+        self.assertEqual(trades, list(range(15)))
+        self.assertLessEqual(len(order_api.requests), 3)
+
+    async def test_index_paging_yields_boundary_once(self):
+        tx_api = FakeTransactionApi(total=23)
+        txs = [tx.sequence_index async for tx in iter_txs(tx_api, limit=10)]
+        self.assertEqual(txs, list(range(23)))
+        self.assertEqual(tx_api.requests, [None, 9, 18])
+
+    async def test_closing_cancels_prefetch(self):
+        order_api = FakeOrderApi(trades=100, page_size=10)
+        trades = iter_trades(order_api, limit=10)
+        await trades.__anext__()
+        await asyncio.sleep(0)  # lets the prefetch of the second page start
+        await trades.aclose()
+        await asyncio.sleep(0)
+        self.assertEqual(order_api.requests, [None, "10"])
+        self.assertEqual(order_api.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,366 @@
+import asyncio
+import json
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from lighter import nonce_manager
+from lighter.errors import ValidationError
+from lighter.exceptions import ApiException, BadRequestException, ServiceException
+from lighter.models.resp_send_tx import RespSendTx
+from lighter.signer_client import SignerClient, process_api_key_and_nonce
+from test.test_nonce_manager import async_nonce_manager
+from test.test_signing_pool import FakeSigner
+
+TX_INFO = json.dumps({"AccountIndex": 1, "OrderBookIndex": 0, "BaseAmount": 1000, "Price": 170000, "Nonce": 0, "Sig": "00"})
+
+
+class LocalNonceManager(nonce_manager.OptimisticNonceManager):
+    def __init__(self, start_api_key=0, end_api_key=1, next_nonce=0):
+        # skips fetching the initial nonces from the API
+        self.start_api_key = start_api_key
+        self.end_api_key = self.current_api_key = end_api_key
+        self.api_key_scheduler = None
+        self.nonce_journal = None
+        self._lock = threading.Lock()
+        self.nonce = {api_key_index: next_nonce - 1 for api_key_index in range(start_api_key, end_api_key + 1)}
+        self.trackers = {api_key_index: nonce_manager.NonceTracker(next_nonce) for api_key_index in self.nonce}
+        self.refreshed = []
+
+    def hard_refresh_nonce(self, api_key: int):
+        self.refreshed.append(api_key)
+        self.refreshed_in = threading.current_thread()
+
+
+class FakeTransactionApi:
+    def __init__(self):
+        self.sent = []
+        self.error = None
+
+    async def send_tx(self, tx_type, tx_info):
+        self.sent.append((tx_type, tx_info))
+        if self.error is not None:
+            raise self.error
+        return RespSendTx(code=200, tx_hash="00", predicted_execution_time_ms=0)
+
+
+class FakeSignerClient(SignerClient):
+    """SignerClient with the native signer and the HTTP API replaced, the rest is the real code path."""
+
+    def __init__(self, tx_trace=None):
+        self.nonce_manager = LocalNonceManager()
+        self.signing_pool = None
+        self.tx_trace = tx_trace
+        self.signing_executor = ThreadPoolExecutor(max_workers=1)
+        self.ws_tx_client = None
+        self.tx_batcher = None
+        self.tx_api = FakeTransactionApi()
+        self.api_key_index, self.end_api_key_index = 0, 1
+        self.signed = []  # (api key selected in the signer, nonce)
+        self.current_signer_key = None
+
+    def switch_api_key(self, api_key: int):
+        self.current_signer_key = api_key
+
+    def sign_create_order(self, *args):
+        self.signed.append((self.current_signer_key, args[-1]))
+        return TX_INFO, None
+
+
+class TestProcessApiKeyAndNonce(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = FakeSignerClient()
+        self.trackers = self.client.nonce_manager.trackers
+
+    async def asyncTearDown(self):
+        self.client.signing_executor.shutdown()
+
+    async def test_allocated_nonce_is_acknowledged(self):
+        _, response, error = await self.client.create_order(0, 1, 1000, 170000, True, 0, 1)
+        self.assertIsNone(error)
+        self.assertEqual(response.code, 200)
+        self.assertEqual(self.client.signed, [(0, 0)])
+        self.assertEqual(self.trackers[0].in_flight, set())
+        self.assertEqual(self.trackers[0].next_nonce, 1)
+
+    async def test_explicit_nonce_only_is_not_acknowledged(self):
+        self.client.api_key_index = self.client.end_api_key_index = 1
+        _, response, error = await self.client.create_order(0, 1, 1000, 170000, True, 0, 1, nonce=7)
+        self.assertIsNone(error)
+        self.assertEqual(response.code, 200)
+        # signed with the client's only api key
+        self.assertEqual(self.client.signed, [(1, 7)])
+        self.assertEqual([tracker.next_nonce for tracker in self.trackers.values()], [0, 0])
+
+    async def test_explicit_nonce_only_with_several_api_keys_is_ambiguous(self):
+        with self.assertRaisesRegex(Exception, "ambiguous api key"):
+            await self.client.create_order(0, 1, 1000, 170000, True, 0, 1, nonce=7)
+        self.assertEqual(self.client.signed, [])
+        self.assertEqual(self.client.tx_api.sent, [])
+
+    async def test_rejected_tx_releases_its_nonce(self):
+        self.client.tx_api.error = ApiException(status=429, reason="Too Many Requests")
+        with self.assertRaises(ApiException):
+            await self.client.create_order(0, 1, 1000, 170000, True, 0, 1)
+        self.assertEqual((self.trackers[0].in_flight, self.trackers[0].next_nonce), (set(), 0))
+
+    async def test_server_error_keeps_its_nonce_used(self):
+        # the tx may have been accepted before the server failed
+        self.client.tx_api.error = ServiceException(status=503, reason="Service Unavailable")
+        with self.assertRaises(ServiceException):
+            await self.client.create_order(0, 1, 1000, 170000, True, 0, 1)
+        self.assertEqual((self.trackers[0].in_flight, self.trackers[0].next_nonce), (set(), 1))
+
+    async def test_explicit_nonce_failure_leaves_the_manager_alone(self):
+        self.client.tx_api.error = BadRequestException(status=400, reason="Bad Request", body="invalid nonce")
+        # the api key isn't one of the nonce manager's
+        _, response, error = await self.client.create_order(0, 1, 1000, 170000, True, 0, 1, nonce=7, api_key_index=5)
+        self.assertIsNone(response)
+        self.assertIn("invalid nonce", error)
+        self.assertEqual(self.client.nonce_manager.refreshed, [])
+
+        await self.client.create_order(0, 1, 1000, 170000, True, 0, 1, nonce=7, api_key_index=1)
+        self.assertEqual(self.client.nonce_manager.refreshed, [1])
+        self.assertEqual(self.trackers[1].next_nonce, 0)
+
+
+class TestTxTrace(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.events = []
+        self.client = FakeSignerClient(tx_trace=lambda event, **fields: self.events.append((event, fields)))
+
+    async def asyncTearDown(self):
+        self.client.signing_executor.shutdown()
+
+    async def test_successful_tx(self):
+        await self.client.create_order(0, 1, 1000, 170000, True, 0, 1)
+        self.assertEqual([event for event, _ in self.events], ["nonce_allocated", "tx_signed", "tx_sent", "tx_response"])
+        fields = dict(self.events)
+        self.assertEqual(fields["nonce_allocated"], {"api_key_index": 0, "nonce": 0})
+        self.assertEqual(
+            {k: fields["tx_signed"][k] for k in ("sign", "api_key_index", "error")},
+            {"sign": "sign_create_order", "api_key_index": 0, "error": None},
+        )
+        self.assertEqual(fields["tx_sent"], {"tx_type": SignerClient.TX_TYPE_CREATE_ORDER, "tx_info": TX_INFO})
+        self.assertEqual((fields["tx_response"]["code"], fields["tx_response"]["tx_hash"]), (200, "00"))
+        self.assertGreaterEqual(fields["tx_response"]["latency"], 0)
+
+    async def test_invalid_nonce(self):
+        self.client.tx_api.error = BadRequestException(status=400, reason="Bad Request", body="invalid nonce")
+        await self.client.create_order(0, 1, 1000, 170000, True, 0, 1)
+        self.assertEqual(
+            [event for event, _ in self.events],
+            ["nonce_allocated", "tx_signed", "tx_sent", "tx_error", "nonce_refreshed"],
+        )
+        fields = dict(self.events)
+        self.assertIs(fields["tx_error"]["error"], self.client.tx_api.error)
+        self.assertEqual(fields["nonce_refreshed"], {"api_key_index": 0, "nonce": 0})
+
+    async def test_failing_hook_doesnt_break_the_send(self):
+        def tx_trace(event, **fields):
+            self.events.append(event)
+            raise RuntimeError("trace backend down")
+
+        self.client.tx_trace = tx_trace
+        with self.assertLogs("lighter.signer_client", "ERROR") as logs:
+            _, response, error = await self.client.create_order(0, 1, 1000, 170000, True, 0, 1)
+        self.assertIsNone(error)
+        self.assertEqual(response.code, 200)
+        self.assertEqual(len(self.client.tx_api.sent), 1)
+        self.assertEqual(self.events, ["nonce_allocated", "tx_signed", "tx_sent", "tx_response"])
+        self.assertEqual(len(logs.records), 4)
+        self.assertEqual(self.client.nonce_manager.trackers[0].next_nonce, 1)
+
+
+class BindingClient(FakeSignerClient):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    @process_api_key_and_nonce
+    async def transact(self, market_index, size=1, nonce=-1, api_key_index=-1, memo=None):
+        self.calls.append((market_index, size, nonce, api_key_index, memo))
+        return None, RespSendTx(code=200, tx_hash="00", predicted_execution_time_ms=0), None
+
+
+class TestBindingPlan(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = BindingClient()
+        self.trackers = self.client.nonce_manager.trackers
+
+    async def asyncTearDown(self):
+        self.client.signing_executor.shutdown()
+
+    def handed_out(self):
+        return [tracker.next_nonce for tracker in self.trackers.values()]
+
+    async def test_missing_nonce_and_api_key_are_allocated(self):
+        await self.client.transact(3)
+        await self.client.transact(3, 2, memo="m")
+        await self.client.transact(market_index=3)
+        self.assertEqual(self.client.calls, [(3, 1, 0, 0, None), (3, 2, 0, 1, "m"), (3, 1, 1, 0, None)])
+        self.assertEqual(self.handed_out(), [2, 1])
+        self.assertEqual([tracker.in_flight for tracker in self.trackers.values()], [set(), set()])
+
+    async def test_positional_defaults_are_replaced(self):
+        await self.client.transact(3, 2, -1, -1, "m")
+        self.assertEqual(self.client.calls, [(3, 2, 0, 0, "m")])
+
+    async def test_explicit_nonce_and_api_key_are_forwarded(self):
+        self.client.api_key_index = self.client.end_api_key_index = 1
+        await self.client.transact(3, 2, 7, 1)
+        await self.client.transact(3, nonce=8, api_key_index=1)
+        await self.client.transact(3, 2, 9)
+        await self.client.transact(3, api_key_index=1)
+        self.assertEqual(
+            self.client.calls, [(3, 2, 7, 1, None), (3, 1, 8, 1, None), (3, 2, 9, 1, None), (3, 1, -1, 1, None)]
+        )
+        self.assertEqual(self.handed_out(), [0, 0])
+
+    async def test_invalid_calls_raise_before_allocating(self):
+        invalid_calls = [
+            ((), {}),
+            ((3,), {"unknown": 1}),
+            ((3, 2, 7, 1, "m", "extra"), {}),
+            ((3,), {"market_index": 3}),
+            ((3, 2, -1), {"nonce": -1}),
+            ((), {"size": 2}),
+        ]
+        for args, kwargs in invalid_calls:
+            with self.subTest(args=args, kwargs=kwargs):
+                with self.assertRaises(TypeError):
+                    await self.client.transact(*args, **kwargs)
+        self.assertEqual(self.client.calls, [])
+        self.assertEqual(self.handed_out(), [0, 0])
+
+
+class TestNonceManagerBridge(unittest.IsolatedAsyncioTestCase):
+    """next_nonce_async / hard_refresh_nonce_async, with both sync and async nonce managers."""
+
+    async def asyncSetUp(self):
+        self.client = FakeSignerClient()
+
+    async def asyncTearDown(self):
+        self.client.signing_executor.shutdown()
+
+    async def test_async_nonce_manager(self):
+        manager = async_nonce_manager(nonce_manager.AsyncOptimisticNonceManager, {0: 5, 1: 8})
+        self.client.nonce_manager = manager
+        self.assertEqual([await self.client.next_nonce_async() for _ in range(3)], [(0, 5), (1, 8), (0, 6)])
+        manager.tx_api.nonces[1] = 20
+        await self.client.hard_refresh_nonce_async(1)
+        self.assertEqual(await self.client.next_nonce_async(), (1, 20))
+
+    async def test_get_api_key_nonce(self):
+        self.assertEqual(self.client.get_api_key_nonce(-1, -1), (0, 0))
+        self.assertEqual(await self.client.get_api_key_nonce_async(-1, -1), (1, 0))
+        self.assertEqual(await self.client.get_api_key_nonce_async(1, 7), (1, 7))
+        with self.assertRaisesRegex(Exception, "ambiguous api key"):
+            await self.client.get_api_key_nonce_async(-1, 7)
+
+        # the async nonce managers can't hand out nonces synchronously
+        self.client.nonce_manager = async_nonce_manager(nonce_manager.AsyncOptimisticNonceManager, {0: 5, 1: 8})
+        with self.assertRaisesRegex(ValidationError, "get_api_key_nonce_async"):
+            self.client.get_api_key_nonce(-1, -1)
+        self.assertEqual(await self.client.get_api_key_nonce_async(-1, -1), (0, 5))
+
+    async def test_invalid_nonce_refreshes_the_async_nonce_manager(self):
+        manager = async_nonce_manager(nonce_manager.AsyncOptimisticNonceManager, {0: 5, 1: 8})
+        self.client.nonce_manager = manager
+        await manager.initialize()
+        self.client.tx_api.error = BadRequestException(status=400, reason="Bad Request", body="invalid nonce")
+        manager.tx_api.nonces[0] = 30
+        _, _, error = await self.client.create_order(0, 1, 1000, 170000, True, 0, 1)
+        self.assertIn("invalid nonce", error)
+        self.assertEqual(self.client.signed, [(0, 5)])
+        self.assertEqual(manager.trackers[0].next_nonce, 30)
+
+    async def test_sync_hard_refresh_runs_in_a_thread(self):
+        await self.client.hard_refresh_nonce_async(1)
+        self.assertEqual(self.client.nonce_manager.refreshed, [1])
+        self.assertIsNot(self.client.nonce_manager.refreshed_in, threading.current_thread())
+
+    async def test_scheduled_sync_nonce_manager_doesnt_block_the_loop(self):
+        manager = self.client.nonce_manager
+        manager.api_key_scheduler = nonce_manager.ApiKeyScheduler(0, 1, min_interval=0.1)
+        manager._scheduled = set()
+        allocated_in = []
+        next_nonce = manager.next_nonce
+        manager.next_nonce = lambda *args: allocated_in.append(threading.current_thread()) or next_nonce(*args)
+        await self.client.next_nonce_async()
+        await self.client.next_nonce_async()
+        # both keys are busy: the next nonce waits for key 0 while the loop keeps running
+        pending = asyncio.ensure_future(self.client.next_nonce_async())
+        ticks = 0
+        while not pending.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        self.assertEqual(await pending, (0, 1))
+        self.assertGreater(ticks, 3)
+        # the key is waited for on the loop, not by sleeping in an executor thread
+        self.assertEqual(allocated_in, [threading.current_thread()] * 3)
+        self.assertEqual(manager._scheduled, {(0, 0), (1, 0), (0, 1)})
+
+
+class FakeSigningPool:
+    def __init__(self, api_keys):
+        self.api_keys = api_keys
+        self.signed = []
+
+    def __contains__(self, api_key_index):
+        return api_key_index in self.api_keys
+
+    async def sign(self, api_key_index, method, *args):
+        self.signed.append((api_key_index, method, args))
+        return "pool", None
+
+
+class TestSignInExecutor(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # the signing part of SignerClient only, on a fake signer library
+        self.client = SignerClient.__new__(SignerClient)
+        self.client.signer = FakeSigner(sign_delay=0.005)
+        for api_key_index in range(3):
+            self.client.signer.CreateClient(b"https://host", b"00", 300, api_key_index, 12)
+        self.client.signing_pool = None
+        self.client.tx_trace = None
+        # several threads, as a user provided executor may have: only the signer lock serializes them
+        self.client.signing_executor = ThreadPoolExecutor(max_workers=4)
+
+    async def asyncTearDown(self):
+        self.client.signing_executor.shutdown()
+
+    async def test_concurrent_signatures_use_their_own_api_key(self):
+        results = await asyncio.gather(
+            *(
+                self.client.sign_cancel_order_async(0, order_index, nonce=order_index, api_key_index=order_index % 3)
+                for order_index in range(12)
+            )
+        )
+        for order_index, (tx_info, error) in enumerate(results):
+            self.assertIsNone(error)
+            self.assertEqual(json.loads(tx_info)["ApiKeyIndex"], order_index % 3)
+            self.assertEqual(json.loads(tx_info)["Index"], order_index)
+        self.assertEqual(self.client.signer.max_concurrent_signing, 1)
+
+    async def test_current_api_key_is_kept(self):
+        tx_info, error = await self.client.sign_cancel_order_async(0, 1, nonce=1, api_key_index=1)
+        self.assertEqual(json.loads(tx_info)["ApiKeyIndex"], 1)
+        tx_info, error = await self.client.sign_cancel_order_async(0, 2, nonce=2)
+        self.assertEqual(json.loads(tx_info)["ApiKeyIndex"], 1)
+
+    async def test_switch_error_is_raised(self):
+        with self.assertRaises(Exception) as raised:
+            await self.client.sign_cancel_order_async(0, 1, nonce=1, api_key_index=9)
+        self.assertIn("error switching api key", str(raised.exception))
+
+    async def test_keys_of_the_signing_pool_are_signed_there(self):
+        self.client.signing_pool = FakeSigningPool({2})
+        self.assertEqual(await self.client.sign_cancel_order_async(0, 1, nonce=1, api_key_index=2), ("pool", None))
+        self.assertEqual(self.client.signing_pool.signed, [(2, "sign_cancel_order", (0, 1, 1))])
+        tx_info, _ = await self.client.sign_cancel_order_async(0, 1, nonce=1, api_key_index=0)
+        self.assertEqual(json.loads(tx_info)["ApiKeyIndex"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+from types import SimpleNamespace
+from unittest import mock
+
+from lighter import signer_client, signing_pool
+from lighter.errors import ValidationError
+from lighter.signing_pool import SigningPool, partition_api_keys
+
+
+class FakeSigner:
+    """Stands in for the signer library: like it, the API key selected by SwitchAPIKey is global to the process."""
+
+    def __init__(self, sign_delay=0.0):
+        self.sign_delay = sign_delay
+        self.clients = {}  # api_key_index -> (url, private key, chain id, account index)
+        self.current_api_key = None
+        self.signing = 0
+        self.max_concurrent_signing = 0
+        self._lock = threading.Lock()
+
+    def CreateClient(self, url, private_key, chain_id, api_key_index, account_index):
+        self.clients[api_key_index] = (url.decode("utf-8"), private_key.decode("utf-8"), chain_id, account_index)
+        self.current_api_key = api_key_index
+        return None
+
+    def SwitchAPIKey(self, api_key_index):
+        if api_key_index not in self.clients:
+            return b"no client"
+        self.current_api_key = api_key_index
+        return None
+
+    def SignCancelOrder(self, market_index, order_index, nonce):
+        api_key_index = self.current_api_key
+        with self._lock:
+            self.signing += 1
+            self.max_concurrent_signing = max(self.max_concurrent_signing, self.signing)
+        time.sleep(self.sign_delay)
+        with self._lock:
+            self.signing -= 1
+        tx_info = {"ApiKeyIndex": api_key_index, "MarketIndex": market_index, "Index": order_index, "Nonce": nonce}
+        # the selected key changing while signing would mean the signature used the wrong key
+        err = b"api key switched while signing" if self.current_api_key != api_key_index else None
+        return SimpleNamespace(str=json.dumps(tx_info).encode("utf-8"), err=err)
+
+
+class ImmediateExecutor:
+    """Runs the submitted calls synchronously, recording them, in place of a worker process."""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, *args):
+        self.calls.append(args)
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class TestPartitionApiKeys(unittest.TestCase):
+    def test_round_robin_over_sorted_keys(self):
+        self.assertEqual(partition_api_keys([7, 3, 5, 4, 6], 2), {3: 0, 4: 1, 5: 0, 6: 1, 7: 0})
+
+    def test_single_worker(self):
+        self.assertEqual(partition_api_keys(range(3), 1), {0: 0, 1: 0, 2: 0})
+
+    def test_more_workers_than_keys(self):
+        self.assertEqual(partition_api_keys([9, 2], 4), {2: 0, 9: 1})
+
+
+class TestSigningWorker(unittest.TestCase):
+    def setUp(self):
+        self.signer = FakeSigner()
+        patcher = mock.patch.object(signer_client, "_initialize_signer", return_value=self.signer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, signing_pool, "_worker_client", None)
+
+    def test_init_worker_creates_a_client_per_key(self):
+        signing_pool._init_worker("https://testnet.zklighter.elliot.ai", 300, 12, {4: "aa", 2: "bb"})
+        client = signing_pool._worker_client
+        self.assertEqual((client.account_index, client.chain_id, client.api_key_index), (12, 300, 2))
+        self.assertEqual(
+            self.signer.clients,
+            {
+                2: ("https://testnet.zklighter.elliot.ai", "bb", 300, 12),
+                4: ("https://testnet.zklighter.elliot.ai", "aa", 300, 12),
+            },
+        )
+
+    def test_sign_selects_the_api_key(self):
+        signing_pool._init_worker("https://testnet.zklighter.elliot.ai", 300, 12, {2: "bb", 4: "aa"})
+        for api_key_index in (4, 2, 4):
+            tx_info, error = signing_pool._sign(api_key_index, "sign_cancel_order", (0, 17, 5))
+            self.assertIsNone(error)
+            self.assertEqual(json.loads(tx_info), {"ApiKeyIndex": api_key_index, "MarketIndex": 0, "Index": 17, "Nonce": 5})
+
+    def test_sign_with_unknown_api_key_raises(self):
+        signing_pool._init_worker("https://testnet.zklighter.elliot.ai", 300, 12, {2: "bb"})
+        with self.assertRaises(Exception):
+            signing_pool._sign(3, "sign_cancel_order", (0, 17, 5))
+
+
+class TestSigningPool(unittest.IsolatedAsyncioTestCase):
+    async def test_routes_keys_to_their_worker(self):
+        keys = {api_key_index: "0x%02x" % api_key_index for api_key_index in range(3, 8)}
+        pool = SigningPool("https://testnet.zklighter.elliot.ai", keys, 12, workers=2)
+        self.addCleanup(pool.close)
+        self.assertEqual(pool.routes, {3: 0, 4: 1, 5: 0, 6: 1, 7: 0})
+        self.assertIn(4, pool)
+        self.assertNotIn(8, pool)
+        # each worker gets its own keys, without the 0x prefix
+        self.assertEqual([executor._initargs[3] for executor in pool.executors], [
+            {3: "03", 5: "05", 7: "07"},
+            {4: "04", 6: "06"},
+        ])
+
+        pool.executors = [ImmediateExecutor(), ImmediateExecutor()]
+        with mock.patch.object(signing_pool, "_sign", lambda *args: args):
+            self.assertEqual(await pool.sign(6, "sign_cancel_order", 0, 17, 5), (6, "sign_cancel_order", (0, 17, 5)))
+        self.assertEqual([len(executor.calls) for executor in pool.executors], [0, 1])
+        with self.assertRaises(ValidationError):
+            await pool.sign(8, "sign_cancel_order", 0, 17, 5)
+
+    async def test_workers_are_capped_by_keys(self):
+        pool = SigningPool("https://mainnet.zklighter.elliot.ai", {0: "aa", 1: "bb"}, 12, workers=8)
+        self.addCleanup(pool.close)
+        self.assertEqual(len(pool.executors), 2)
+        self.assertEqual(pool.executors[0]._initargs[1], 304)
+
+    def test_no_keys(self):
+        with self.assertRaises(ValidationError):
+            SigningPool("https://testnet.zklighter.elliot.ai", {}, 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
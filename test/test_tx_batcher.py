@@ -0,0 +1,48 @@
+import asyncio
+import json
+import unittest
+
+from lighter.models.resp_send_tx import RespSendTx
+from lighter.models.resp_send_tx_batch import RespSendTxBatch
+from lighter.tx_batcher import TxBatcher
+
+
+class FakeTransactionApi:
+    def __init__(self, fail=False):
+        self.requests = []
+        self.fail = fail
+
+    async def send_tx(self, tx_type, tx_info):
+        self.requests.append([tx_info])
+        return RespSendTx(code=200, tx_hash=tx_info, predicted_execution_time_ms=1)
+
+    async def send_tx_batch(self, tx_types, tx_infos):
+        tx_infos = json.loads(tx_infos)
+        self.requests.append(tx_infos)
+        if self.fail:
+            raise Exception("batch failed")
+        return RespSendTxBatch(code=200, tx_hash=tx_infos, predicted_execution_time_ms=1)
+
+
+class TestTxBatcher(unittest.IsolatedAsyncioTestCase):
+    async def test_coalesces_concurrent_txs(self):
+        tx_api = FakeTransactionApi()
+        batcher = TxBatcher(tx_api, window=0.01, max_batch_size=3)
+        responses = await self._send_all(batcher, 7)
+        self.assertEqual([response.tx_hash for response in responses], [f"tx{i}" for i in range(7)])
+        self.assertEqual(tx_api.requests, [["tx0", "tx1", "tx2"], ["tx3", "tx4", "tx5"], ["tx6"]])
+        self.assertEqual((batcher.batches_sent, batcher.txs_sent), (3, 7))
+
+    async def test_batch_failure_reaches_every_caller(self):
+        batcher = TxBatcher(FakeTransactionApi(fail=True), window=0.01)
+        results = await self._send_all(batcher, 2, return_exceptions=True)
+        self.assertTrue(all(isinstance(result, Exception) for result in results))
+
+    async def _send_all(self, batcher, count, return_exceptions=False):
+        return await asyncio.gather(
+            *(batcher.send_tx(14, f"tx{i}") for i in range(count)), return_exceptions=return_exceptions
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
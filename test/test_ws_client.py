@@ -0,0 +1,299 @@
+import asyncio
+import json
+import unittest
+
+from websockets.asyncio.server import serve
+
+from lighter.ws_client import ChannelDispatcher, DispatchOverflowPolicy, WsClient
+
+
+class SyncWs:
+    """Connection of `run`, `send` returns once the frame is written."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+class AsyncWs:
+    """Connection of `run_async`, `send` yields to the event loop like a real socket write may."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        await asyncio.sleep(0)
+        self.sent.append(json.loads(message))
+
+
+def channels(ws, message_type="subscribe"):
+    return [message["channel"] for message in ws.sent if message["type"] == message_type]
+
+
+def make_client(order_book_ids=(), account_ids=()):
+    return WsClient(host="localhost", order_book_ids=order_book_ids, account_ids=account_ids)
+
+
+class TestWsClientSubscriptions(unittest.IsolatedAsyncioTestCase):
+    async def test_connect_replays_subscriptions(self):
+        client = make_client(order_book_ids=[0, 1], account_ids=[7])
+        client.ws = ws = AsyncWs()
+        await client.handle_connected_async(ws)
+        self.assertTrue(client._connected)
+        self.assertEqual(channels(ws), ["order_book/0", "order_book/1", "account_all/7"])
+
+    async def test_subscribe_during_replay_is_sent_once(self):
+        client = make_client(order_book_ids=[0, 1])
+        client.ws = ws = AsyncWs()
+        connecting = asyncio.ensure_future(client.handle_connected_async(ws))
+        await asyncio.sleep(0)
+        await client.subscribe(order_book_ids=[1, 2], account_ids=[7])
+        await connecting
+        self.assertEqual(sorted(channels(ws)), ["account_all/7", "order_book/0", "order_book/1", "order_book/2"])
+
+        await client.subscribe(order_book_ids=[3])
+        self.assertEqual(channels(ws)[-1], "order_book/3")
+
+    async def test_unsubscribe_during_replay_skips_no_channel(self):
+        client = make_client(order_book_ids=[0, 1, 2, 3])
+        client.ws = ws = AsyncWs()
+        connecting = asyncio.ensure_future(client.handle_connected_async(ws))
+        await asyncio.sleep(0)
+        await client.unsubscribe(order_book_ids=[0])
+        await connecting
+        subscribed = set(channels(ws)) - set(channels(ws, "unsubscribe"))
+        self.assertEqual(subscribed, {"order_book/1", "order_book/2", "order_book/3"})
+        self.assertEqual(client.subscriptions["order_books"], [1, 2, 3])
+
+    async def test_ids_are_compared_as_strings(self):
+        client = make_client(order_book_ids=[0, "1"], account_ids=[7])
+        client.ws = ws = AsyncWs()
+        await client.handle_connected_async(ws)
+        await client.subscribe(order_book_ids=["0", 1])
+        self.assertEqual(client.subscriptions["order_books"], [0, "1"])
+
+        await client.unsubscribe(order_book_ids=["0", 1], account_ids=["7"])
+        self.assertEqual(client.subscriptions, {"order_books": [], "accounts": []})
+        self.assertEqual(channels(ws, "unsubscribe"), ["order_book/0", "order_book/1", "account_all/7"])
+
+    async def test_sync_connection(self):
+        client = make_client(order_book_ids=[0])
+        client.ws = ws = SyncWs()
+        client.handle_connected(ws)
+        await client.subscribe(order_book_ids=[1])
+        await client.unsubscribe(order_book_ids=[0])
+        self.assertEqual(channels(ws), ["order_book/0", "order_book/1"])
+        self.assertEqual(channels(ws, "unsubscribe"), ["order_book/0"])
+
+    async def test_subscribe_before_connect_is_deferred(self):
+        client = make_client()
+        client.ws = ws = AsyncWs()
+        await client.subscribe(order_book_ids=[0])
+        self.assertEqual(ws.sent, [])
+        await client.handle_connected_async(ws)
+        self.assertEqual(channels(ws), ["order_book/0"])
+
+
+SNAPSHOT = {"asks": [{"price": "101.0", "size": "1"}], "bids": [{"price": "100.0", "size": "2"}], "offset": 1}
+DELTA = {"asks": [{"price": "101.0", "size": "3"}], "bids": [], "offset": 2}
+
+
+class TestWsClientResync(unittest.IsolatedAsyncioTestCase):
+    async def test_account_only_client_is_resynced_on_reconnect(self):
+        client = make_client(account_ids=[7])
+        client.ws = ws = AsyncWs()
+        await client.handle_connected_async(ws)
+        client._connected = False
+        client._handle_disconnect()
+        self.assertIsNotNone(client._disconnected_at)
+
+        await client.handle_connected_async(ws)
+        self.assertIsNone(client._disconnected_at)
+        self.assertGreaterEqual(client.last_resync_seconds, 0)
+
+    async def test_order_books_are_resynced_by_their_snapshot(self):
+        client = make_client(order_book_ids=[0])
+        client.on_order_book_update = lambda market_id, order_book: None
+        client.ws = ws = AsyncWs()
+        await client.handle_connected_async(ws)
+        client.on_message(ws, {"type": "subscribed/order_book", "channel": "order_book:0", "order_book": SNAPSHOT})
+        client._connected = False
+        client._handle_disconnect()
+
+        await client.handle_connected_async(ws)
+        self.assertIsNotNone(client._disconnected_at)
+        self.assertIsNone(client.last_resync_seconds)
+        client.on_message(ws, {"type": "update/order_book", "channel": "order_book:0", "order_book": DELTA})
+        self.assertIsNone(client.get_order_book(0))
+
+        client.on_message(ws, {"type": "subscribed/order_book", "channel": "order_book:0", "order_book": SNAPSHOT})
+        self.assertIsNone(client._disconnected_at)
+        self.assertGreaterEqual(client.last_resync_seconds, 0)
+        self.assertEqual(client.get_order_book(0).best_ask(), ("101.0", "1"))
+
+    async def test_unsubscribe_while_disconnected_does_not_resync(self):
+        client = make_client(order_book_ids=[0])
+        client.on_order_book_update = lambda market_id, order_book: None
+        client.ws = ws = AsyncWs()
+        await client.handle_connected_async(ws)
+        client.on_message(ws, {"type": "subscribed/order_book", "channel": "order_book:0", "order_book": SNAPSHOT})
+        client._connected = False
+        client._handle_disconnect()
+
+        await client.unsubscribe(order_book_ids=[0])
+        self.assertIsNone(client.last_resync_seconds)
+        await client.handle_connected_async(ws)
+        self.assertGreaterEqual(client.last_resync_seconds, 0)
+
+    async def test_run_async_reconnects(self):
+        connections = []
+
+        async def handler(ws):
+            connections.append(ws)
+            await ws.send(json.dumps({"type": "connected"}))
+            async for message in ws:
+                channel = json.loads(message)["channel"].replace("/", ":")
+                await ws.send(json.dumps({"type": "subscribed/account_all", "channel": channel}))
+                if len(connections) == 1:
+                    return  # drops the first connection
+
+        server = await serve(handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        updates = []
+        client = WsClient(
+            host=f"127.0.0.1:{port}",
+            account_ids=[7],
+            on_account_update=lambda account_id, message: updates.append(account_id),
+            reconnect=True,
+            reconnect_initial_delay=0.01,
+        )
+        client.base_url = client.base_url.replace("wss://", "ws://")
+        task = asyncio.ensure_future(client.run_async())
+        try:
+            for _ in range(200):
+                if len(updates) == 2 and client._connected:
+                    break
+                await asyncio.sleep(0.01)
+            self.assertEqual(updates, ["7", "7"])
+            self.assertEqual(client.reconnect_count, 1)
+            self.assertIsNone(client._disconnected_at)
+            self.assertGreaterEqual(client.last_resync_seconds, 0)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            server.close()
+            await server.wait_closed()
+
+
+class TestChannelDispatcher(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.received = []
+        self.gate = asyncio.Event()  # the callback is stuck until the gate opens
+
+    async def callback(self, value):
+        await self.gate.wait()
+        self.received.append(value)
+
+    async def drain(self, dispatcher, count):
+        self.gate.set()
+        for _ in range(100):
+            if dispatcher.delivered == count:
+                break
+            await asyncio.sleep(0)
+        dispatcher.close()
+
+    def fill(self, policy, count=5, maxsize=2):
+        dispatcher = ChannelDispatcher(self.callback, maxsize=maxsize, overflow_policy=policy)
+        for value in range(count):
+            dispatcher.put_nowait((value,))
+        return dispatcher
+
+    async def test_conflate_replaces_newest(self):
+        dispatcher = self.fill(DispatchOverflowPolicy.CONFLATE)
+        self.assertEqual(dispatcher.stats(), {"depth": 2, "delivered": 0, "dropped": 0, "conflated": 3})
+        await self.drain(dispatcher, 2)
+        self.assertEqual(self.received, [0, 4])
+        self.assertEqual(dispatcher.stats(), {"depth": 0, "delivered": 2, "dropped": 0, "conflated": 3})
+
+    async def test_drop_oldest(self):
+        dispatcher = self.fill(DispatchOverflowPolicy.DROP_OLDEST)
+        self.assertEqual(dispatcher.stats(), {"depth": 2, "delivered": 0, "dropped": 3, "conflated": 0})
+        await self.drain(dispatcher, 2)
+        self.assertEqual(self.received, [3, 4])
+        self.assertEqual(dispatcher.stats(), {"depth": 0, "delivered": 2, "dropped": 3, "conflated": 0})
+
+    async def test_block_keeps_everything_and_waits_for_capacity(self):
+        dispatcher = self.fill(DispatchOverflowPolicy.BLOCK, count=4)
+        self.assertEqual(dispatcher.stats(), {"depth": 4, "delivered": 0, "dropped": 0, "conflated": 0})
+        waiting = asyncio.ensure_future(dispatcher.wait_for_capacity())
+        for _ in range(5):
+            await asyncio.sleep(0)
+        # the consumer took one update and is stuck in the callback, the queue is still full
+        self.assertFalse(waiting.done())
+        self.assertEqual(dispatcher.depth, 3)
+
+        self.gate.set()
+        await asyncio.wait_for(waiting, 1)
+        self.assertLess(dispatcher.depth, dispatcher.maxsize)
+        await self.drain(dispatcher, 4)
+        self.assertEqual(self.received, [0, 1, 2, 3])
+        self.assertEqual(dispatcher.stats(), {"depth": 0, "delivered": 4, "dropped": 0, "conflated": 0})
+
+    async def test_close_releases_a_reader_waiting_for_capacity(self):
+        dispatcher = self.fill(DispatchOverflowPolicy.BLOCK, count=4)
+        waiting = asyncio.ensure_future(dispatcher.wait_for_capacity())
+        for _ in range(5):
+            await asyncio.sleep(0)
+        self.assertFalse(waiting.done())
+
+        dispatcher.close()
+        await asyncio.wait_for(waiting, 1)
+        self.assertEqual(dispatcher.depth, 0)
+        # a closed dispatcher doesn't make anyone wait
+        await asyncio.wait_for(dispatcher.wait_for_capacity(), 1)
+        self.assertEqual(self.received, [])
+
+    async def test_failing_callback_doesnt_stop_delivery(self):
+        def callback(value):
+            if value == 0:
+                raise ValueError("callback failed")
+            self.received.append(value)
+
+        dispatcher = ChannelDispatcher(callback, maxsize=2, overflow_policy=DispatchOverflowPolicy.BLOCK)
+        dispatcher.put_nowait((0,))
+        dispatcher.put_nowait((1,))
+        with self.assertLogs("lighter.ws_client", "ERROR"):
+            await self.drain(dispatcher, 2)
+        self.assertEqual(self.received, [1])
+        self.assertEqual(dispatcher.delivered, 2)
+
+    async def test_client_pauses_reading_while_a_blocked_queue_is_full(self):
+        client = WsClient(
+            host="localhost",
+            order_book_ids=[0],
+            on_order_book_update=lambda market_id, order_book: self.callback(order_book["offset"]),
+            dispatch_queue_size=2,
+            dispatch_overflow_policy=DispatchOverflowPolicy.BLOCK,
+        )
+        client.ws = ws = AsyncWs()
+        await client.on_message_async(ws, json.dumps({"type": "connected"}))
+        snapshot = {"type": "subscribed/order_book", "channel": "order_book:0", "order_book": SNAPSHOT}
+        await client.on_message_async(ws, json.dumps(snapshot))
+        delta = {"type": "update/order_book", "channel": "order_book:0", "order_book": DELTA}
+        await client.on_message_async(ws, json.dumps(delta))
+        # the queue is full now, the next message is only handled once the callback catches up
+        reading = asyncio.ensure_future(client.on_message_async(ws, json.dumps(delta)))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        self.assertFalse(reading.done())
+        self.gate.set()
+        await asyncio.wait_for(reading, 1)
+        stats = client.dispatch_stats()["order_book:0"]
+        self.assertEqual((stats["dropped"], stats["conflated"]), (0, 0))
+        client._close_dispatcher("order_book:0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import socket
+import unittest
+
+from websockets.asyncio.server import serve
+
+from lighter.errors import TxOutcomeUnknownError
+from lighter.exceptions import BadRequestException
+from lighter.ws_tx_client import WsTxClient
+from test.test_signer_client import FakeSignerClient
+
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeStream:
+    """`/stream` endpoint answering each sendtx with the tx's Nonce as hash, in `reply_order` once all arrived."""
+
+    def __init__(self, reply_order=None, respond=True, error=None):
+        self.reply_order = reply_order
+        self.respond = respond
+        self.error = error
+        self.received = []
+
+    async def handler(self, ws):
+        await ws.send(json.dumps({"type": "connected"}))
+        batch = []
+        async for message in ws:
+            message = json.loads(message)
+            self.received.append(message)
+            if not self.respond:
+                continue
+            batch.append(message["data"])
+            if self.reply_order is not None and len(batch) < len(self.reply_order):
+                continue
+            for i in self.reply_order or range(len(batch)):
+                data = batch[i]
+                if self.error is not None:
+                    await ws.send(json.dumps({"id": data["id"], "error": self.error}))
+                else:
+                    reply = {"id": data["id"], "code": 200, "tx_hash": str(data["tx_info"]["Nonce"])}
+                    await ws.send(json.dumps({"type": "jsonapi/sendtx", "data": reply}))
+            batch = []
+
+
+class TestWsTxClient(unittest.IsolatedAsyncioTestCase):
+    async def start(self, stream, timeout=1.0):
+        self.server = await serve(stream.handler, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.client = WsTxClient(f"http://127.0.0.1:{port}", timeout=timeout)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_responses_are_matched_by_request_id(self):
+        await self.start(FakeStream(reply_order=[2, 0, 1]))
+        responses = await asyncio.gather(*(self.client.send_tx(14, json.dumps({"Nonce": nonce})) for nonce in range(3)))
+        self.assertEqual([response.tx_hash for response in responses], ["0", "1", "2"])
+        self.assertEqual(self.client.pending, {})
+
+    async def test_timeout_leaves_the_outcome_unknown(self):
+        stream = FakeStream(respond=False)
+        await self.start(stream, timeout=0.05)
+        with self.assertRaises(TxOutcomeUnknownError):
+            await self.client.send_tx(14, json.dumps({"Nonce": 0}))
+        self.assertEqual(len(stream.received), 1)
+
+    async def test_error_is_a_bad_request(self):
+        await self.start(FakeStream(error="invalid nonce"))
+        with self.assertRaises(BadRequestException) as raised:
+            await self.client.send_tx(14, json.dumps({"Nonce": 0}))
+        self.assertIn("invalid nonce", str(raised.exception))
+
+
+class TestSignerClientOverWs(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = FakeSignerClient()
+        self.server = None
+
+    async def asyncTearDown(self):
+        await self.client.ws_tx_client.close()
+        self.client.signing_executor.shutdown()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def test_falls_back_to_rest_when_not_connected(self):
+        self.client.ws_tx_client = WsTxClient(f"http://127.0.0.1:{unused_port()}")
+        _, response, error = await self.client.create_order(0, 1, 1000, 170000, True, 0, 1)
+        self.assertIsNone(error)
+        self.assertEqual(response.code, 200)
+        self.assertEqual(len(self.client.tx_api.sent), 1)
+
+    async def test_falls_back_to_rest_without_a_greeting(self):
+        closed = asyncio.Event()
+
+        async def handler(ws):
+            # accepts the connection, never sends the "connected" message
+            await ws.wait_closed()
+            closed.set()
+
+        self.server = await serve(handler, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.client.ws_tx_client = WsTxClient(f"http://127.0.0.1:{port}", timeout=0.05)
+        _, response, error = await self.client.create_order(0, 1, 1000, 170000, True, 0, 1)
+        self.assertIsNone(error)
+        self.assertEqual(response.code, 200)
+        self.assertEqual(len(self.client.tx_api.sent), 1)
+        self.assertIsNone(self.client.ws_tx_client.ws)
+        # the connection which never got greeted is closed
+        await asyncio.wait_for(closed.wait(), 1)
+        tracker = self.client.nonce_manager.trackers[0]
+        self.assertEqual((tracker.in_flight, tracker.next_nonce), (set(), 1))
+
+    async def test_unknown_outcome_is_not_resent(self):
+        self.server = await serve(FakeStream(respond=False).handler, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.client.ws_tx_client = WsTxClient(f"http://127.0.0.1:{port}", timeout=0.05)
+        with self.assertRaises(TxOutcomeUnknownError):
+            await self.client.create_order(0, 1, 1000, 170000, True, 0, 1)
+        self.assertEqual(self.client.tx_api.sent, [])
+        # the nonce stays used, the next tx doesn't reuse it
+        tracker = self.client.nonce_manager.trackers[0]
+        self.assertEqual((tracker.in_flight, tracker.next_nonce), (set(), 1))
+
+
+if __name__ == "__main__":
+    unittest.main()